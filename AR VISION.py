@@ -5,6 +5,8 @@ import numpy as np
 import sys
 import time
 
+from assets import AssetCache
+
 pygame.init()
 WIDTH, HEIGHT = 900, 600
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
@@ -37,8 +39,7 @@ selected_skin_index = 0
 # -------------------------
 # LOAD CUSTOM BALL IMAGE
 # -------------------------
-ball_image = pygame.image.load("ball.png").convert_alpha()
-ball_image = pygame.transform.scale(ball_image, (60, 60))  # size of picture ball
+ball_image = AssetCache().get("ball.png", (60, 60))  # size of picture ball, baked once
 
 
 def draw_text_center(text, font, color, x, y):
@@ -1,179 +1,294 @@
 import cv2
 import mediapipe as mp
-import collections
 import time
 import threading
-import speech_recognition as sr
 import numpy as np
 
+from preprocess import FramePreprocessor
+from profiling import StageTimer
+from landmark_log import LandmarkRecorder
+from features import HandFeatures, log_features
+from gestures import Gesture, GestureEngine
+from pipeline import ModelPipeline
+from events import EventBus, Fusion, FusionRule
+
 mp_drawing = mp.solutions.drawing_utils
 mp_holistic = mp.solutions.holistic
 
-cap = cv2.VideoCapture(0)
-
 HISTORY_LEN = 5
-left_y_hist = collections.deque(maxlen=HISTORY_LEN)
-right_y_hist = collections.deque(maxlen=HISTORY_LEN)
-left_x_hist = collections.deque(maxlen=HISTORY_LEN)
-right_x_hist = collections.deque(maxlen=HISTORY_LEN)
+# each frame's hands and pose as arrays (slot 0 = left, 1 = right) plus the gesture features
+FEATURES = HandFeatures(n_hands=2, history=HISTORY_LEN, pose=True)
 
-phase_67 = 0
 DETECTION_COOLDOWN_67 = 0.3
-last_detection_67 = 0
 gesture_counter_67 = 0
 audio_counter_67 = 0
 THRESH_Y = 0.02
 
-kaby_phase = 0
-kaby_last = 0
 KABY_COOLDOWN = 0.4
 kaby_counter = 0
 
+# audio and vision post timestamped detections here; the loop fuses them, so a "67" said
+# while doing the gesture scores once. Only the loop thread touches the counters.
+FUSION_WINDOW = 0.8  # seconds between voice and gesture that still count as the same "67"
+# seconds from when a "67" is said to its event reaching BUS, per AUDIO_BACKEND: a gesture waits
+# this long past the window for its voice before it scores alone. "google" only returns once
+# the phrase is followed by a pause (pause_threshold, 0.8 s) and the request has come back.
+AUDIO_DELAY = {"google": 3.0, "spotter": 0.4}
+BUS = EventBus()
+AUDIO_EVENTS = BUS.producer("audio")
+VISION_EVENTS = BUS.producer("vision")
+RULE_67 = FusionRule("67", ("gesture_67", "audio_67"), window=FUSION_WINDOW)  # delay set by the listener
+FUSION = Fusion([RULE_67])
+score_67 = 0  # fused: voice, gesture or both at once
+
+# both hands need a full movement history before any gesture phase can fire
+BOTH_TRACKED = ["full.left", "full.right"]
+GESTURES = [
+    # one hand up while the other goes down, then the reverse
+    Gesture("67", [
+        [f"dy.left < {-THRESH_Y}", f"dy.right > {THRESH_Y}"],
+        [f"dy.left > {THRESH_Y}", f"dy.right < {-THRESH_Y}"],
+    ], cooldown=DETECTION_COOLDOWN_67, require=BOTH_TRACKED, wait_for_cooldown=True),
+    # palms up and spreading apart, then both hands still moving sideways
+    Gesture("khaby", [
+        ["dx.left < 0", "dx.right > 0", "palm_up.left", "palm_up.right"],
+        ["abs(dx.left) > 0.03", "abs(dx.right) > 0.03"],
+    ], cooldown=KABY_COOLDOWN, require=BOTH_TRACKED),
+]
+ENGINE = GestureEngine(GESTURES)
+
 GOAL = 10
 PRIZE_UNLOCKED = False
 
-def get_hand_center_y(hand_landmarks):
-    indices = [0, 1, 2, 5, 9, 13, 17]
-    return sum([hand_landmarks.landmark[i].y for i in indices]) / len(indices)
-
-def palm_up(hand):
-    wrist = hand.landmark[0].y
-    index_mcp = hand.landmark[5].y
-    pinky_mcp = hand.landmark[17].y
-    return index_mcp < wrist and pinky_mcp < wrist
+TIMER = StageTimer()
+show_hud = False  # toggled with 'h'
+PROFILE_EXPORT = None  # e.g. "arm_profile" writes arm_profile.json/.csv on exit
+RECORD_LANDMARKS = None  # e.g. "arm.lmk" appends every frame's landmarks (see landmark_log.py)
+# "google" is the online recognizer; "spotter" spots "67" offline against recorded templates
+# (spotter.py) and falls back to "google" while KEYWORD_TEMPLATES has none
+AUDIO_BACKEND = "google"
+KEYWORD_TEMPLATES = "keywords/67"  # WAVs of the keyword, made with `python spotter.py enroll keywords/67`
+# models to run (see pipeline.PIPELINES): "hands", "hands+pose" or "holistic";
+# `python bench.py --scenario pipelines` compares their cost and detections
+PIPELINE = "holistic"
 
 def listen_for_67():
-    global audio_counter_67
+    """Post spoken "67"s on the microphone to BUS, with the AUDIO_BACKEND recognizer."""
+    if AUDIO_BACKEND == "google":
+        return _listen_google()
+    from spotter import KeywordSpotter, MicStream, load_templates
+    templates = load_templates(KEYWORD_TEMPLATES)
+    if not templates:
+        print(f"Warning: no keyword templates in {KEYWORD_TEMPLATES}/, using the online recognizer "
+              f"(record some with: python spotter.py enroll {KEYWORD_TEMPLATES})")
+        return _listen_google()
+    spotter = KeywordSpotter(templates)
+    RULE_67.delay = AUDIO_DELAY["spotter"]
+    try:
+        with MicStream() as mic:
+            for hit in spotter.listen(mic):
+                AUDIO_EVENTS.post("audio_67", hit.at)
+                print(f"Audio detected '67' ({hit.latency * 1000:.0f} ms)")
+    except (ImportError, OSError) as e:
+        print("Audio '67' off: no microphone:", e)
+
+def _listen_google():
+    import speech_recognition as sr
+    RULE_67.delay = AUDIO_DELAY["google"]
     recognizer = sr.Recognizer()
     mic = sr.Microphone()
+    with mic as source:
+        # once; the recognizer keeps adapting its energy threshold while listening
+        recognizer.adjust_for_ambient_noise(source)
     while True:
         try:
             with mic as source:
-                recognizer.adjust_for_ambient_noise(source)
                 audio = recognizer.listen(source, phrase_time_limit=3)
+            # when the phrase started, from the audio itself: listen() returns a pause after it ends
+            said_at = time.time() - len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
             text = recognizer.recognize_google(audio)
-            if "67" in text or "sixty seven" in text.lower():
+        except sr.UnknownValueError:
+            continue
+        except sr.RequestError as e:
+            print("Audio '67' recognizer unavailable:", e)
+            time.sleep(5.0)
+            continue
+        if "67" in text or "sixty seven" in text.lower():
+            AUDIO_EVENTS.post("audio_67", said_at)
+            print("Audio detected '67'")
+
+def update_gestures(vector, now):
+    """Step every gesture on one frame's feature vector (GestureEngine.pack / pack_log)."""
+    global gesture_counter_67, kaby_counter
+    for name in ENGINE.step(vector, now):
+        if name == "67":
+            gesture_counter_67 += 1
+            VISION_EVENTS.post("gesture_67", now)
+            print("67 gestures detected:", gesture_counter_67)
+        elif name == "khaby":
+            kaby_counter += 1
+            print("Khaby Lame gesture detected:", kaby_counter)
+
+def fuse_events(now):
+    """Drain BUS through FUSION and count what came out."""
+    global audio_counter_67, score_67
+    for event in FUSION.feed(BUS.drain(), now):
+        if event.kind == "67":
+            score_67 += 1
+            if "audio_67" in event.data["kinds"]:
                 audio_counter_67 += 1
-                print("Audio detected '67':", audio_counter_67)
-        except Exception:
-            pass
-
-audio_thread = threading.Thread(target=listen_for_67, daemon=True)
-audio_thread.start()
-
-with mp_holistic.Holistic(min_detection_confidence=0.5, min_tracking_confidence=0.5) as holistic:
-    start_time = time.time()
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        frame = cv2.flip(frame, 1)
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = holistic.process(frame_rgb)
-
-        left_center_y = None
-        right_center_y = None
-        left_center_x = None
-        right_center_x = None
-
-        if results.left_hand_landmarks:
-            mp_drawing.draw_landmarks(frame, results.left_hand_landmarks, mp_holistic.HAND_CONNECTIONS)
-            left_center_y = get_hand_center_y(results.left_hand_landmarks)
-            left_y_hist.append(left_center_y)
-            left_center_x = results.left_hand_landmarks.landmark[0].x
-            left_x_hist.append(left_center_x)
-
-        if results.right_hand_landmarks:
-            mp_drawing.draw_landmarks(frame, results.right_hand_landmarks, mp_holistic.HAND_CONNECTIONS)
-            right_center_y = get_hand_center_y(results.right_hand_landmarks)
-            right_y_hist.append(right_center_y)
-            right_center_x = results.right_hand_landmarks.landmark[0].x
-            right_x_hist.append(right_center_x)
-
-        if len(left_y_hist) == HISTORY_LEN and len(right_y_hist) == HISTORY_LEN:
-            dy_left = left_y_hist[-1] - left_y_hist[0]
-            dy_right = right_y_hist[-1] - right_y_hist[0]
-            if phase_67 == 0 and dy_left < -THRESH_Y and dy_right > THRESH_Y:
-                phase_67 = 1
-            elif phase_67 == 1 and dy_left > THRESH_Y and dy_right < -THRESH_Y:
-                current_time = time.time()
-                if current_time - last_detection_67 > DETECTION_COOLDOWN_67:
-                    gesture_counter_67 += 1
-                    last_detection_67 = current_time
-                    phase_67 = 0
-                    print("67 gestures detected:", gesture_counter_67)
-
-        if len(left_x_hist) == HISTORY_LEN and len(right_x_hist) == HISTORY_LEN:
-            dx_left = left_x_hist[-1] - left_x_hist[0]
-            dx_right = right_x_hist[-1] - right_x_hist[0]
-            left_up = results.left_hand_landmarks and palm_up(results.left_hand_landmarks)
-            right_up = results.right_hand_landmarks and palm_up(results.right_hand_landmarks)
-            if kaby_phase == 0:
-                if dx_left < 0 and dx_right > 0 and left_up and right_up:
-                    kaby_phase = 1
-            elif kaby_phase == 1:
-                current_time = time.time()
-                if abs(dx_left) > 0.03 and abs(dx_right) > 0.03:
-                    if current_time - kaby_last > KABY_COOLDOWN:
-                        kaby_counter += 1
-                        kaby_last = current_time
-                        print("Khaby Lame gesture detected:", kaby_counter)
-                    kaby_phase = 0
-
-        if results.pose_landmarks:
-            mp_drawing.draw_landmarks(frame, results.pose_landmarks, mp_holistic.POSE_CONNECTIONS)
-
-        total_score = gesture_counter_67 + audio_counter_67 + kaby_counter
-        progress = min(total_score / GOAL, 1.0)
-        h, w, _ = frame.shape
-        bar_w = int(w * 0.6)
-        bar_h = 28
-        bar_x = int((w - bar_w) / 2)
-        bar_y = 20
-        cv2.rectangle(frame, (bar_x, bar_y), (bar_x + bar_w, bar_y + bar_h), (50, 50, 50), -1)
-        filled_w = int(bar_w * progress)
-        if progress < 0.5:
-            color = (0, 0, 255)
-        elif progress < 0.9:
-            color = (0, 215, 255)
-        else:
-            color = (0, 255, 0)
-        cv2.rectangle(frame, (bar_x, bar_y), (bar_x + filled_w, bar_y + bar_h), color, -1)
-        cv2.rectangle(frame, (bar_x, bar_y), (bar_x + bar_w, bar_y + bar_h), (200, 200, 200), 2)
-        cv2.putText(frame, f"Goal: {total_score}/{GOAL}", (bar_x + 10, bar_y + bar_h - 6), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255,255,255), 2)
-
-        cv2.putText(frame, f"Gesture 67: {gesture_counter_67}", (10, h - 80), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,0,255), 2)
-        cv2.putText(frame, f"Audio 67: {audio_counter_67}", (10, h - 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255,255,255), 2)
-        cv2.putText(frame, f"Khaby: {kaby_counter}", (10, h - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,255,0), 2)
-
-        if not PRIZE_UNLOCKED and total_score >= GOAL:
-            PRIZE_UNLOCKED = True
-            prize_start = time.time()
-
-        if PRIZE_UNLOCKED:
-            elapsed = time.time() - prize_start
-            overlay = frame.copy()
-            cv2.rectangle(overlay, (0, 0), (w, h), (0, 0, 0), -1)
-            alpha = 0.6
-            cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, frame)
-            cv2.putText(frame, "PRIZE UNLOCKED!", (int(w*0.12), int(h*0.4)), cv2.FONT_HERSHEY_SIMPLEX, 2.2, (255,215,0), 5)
-            cv2.putText(frame, "You hit 670!", (int(w*0.34), int(h*0.5)), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255,255,255), 3)
-            num_confetti = 80
-            for i in range(num_confetti):
-                np.random.seed(i + int(elapsed*100))
-                cx = int(np.random.rand() * w)
-                cy = int(np.random.rand() * h)
-                r = int(3 + np.random.rand() * 8)
-                cv2.circle(frame, (cx, cy), r, (int(np.random.rand()*255), int(np.random.rand()*255), int(np.random.rand()*255)), -1)
-            if elapsed > 8:
-                PRIZE_UNLOCKED = False
-                gesture_counter_67 = 0
-                audio_counter_67 = 0
-                kaby_counter = 0
-
-        cv2.imshow("67 Motion + Audio + Goal", frame)
-        if cv2.waitKey(1) & 0xFF == 27:
-            break
-
-cap.release()
-cv2.destroyAllWindows()
+
+def reset_gestures():
+    """Forget gesture history and zero the counters, e.g. between benchmark runs."""
+    global gesture_counter_67, audio_counter_67, kaby_counter, score_67, PRIZE_UNLOCKED
+    FEATURES.reset()
+    ENGINE.reset()
+    BUS.clear()
+    FUSION.reset()
+    gesture_counter_67 = audio_counter_67 = kaby_counter = score_67 = 0
+    PRIZE_UNLOCKED = False
+
+def run(cap, max_frames=None, display=True, record=None, pipeline=None):
+    """Run the gesture loop on any cv2.VideoCapture-like source; returns frames processed.
+
+    `display=False` skips the OpenCV window, for headless benchmark runs.
+    `record` is a landmark_log path to append every frame's landmarks to.
+    `pipeline` names the models to run; default PIPELINE.
+    """
+    global gesture_counter_67, audio_counter_67, kaby_counter, score_67, PRIZE_UNLOCKED, show_hud
+    prize_start = 0.0
+    recorder = None
+    if record:
+        recorder = LandmarkRecorder(record, max_hands=2, pose=True,
+                                    meta={"source": "arm_tracking", "pipeline": pipeline or PIPELINE})
+    # each model laps its own "<model>.process" stage on TIMER
+    with ModelPipeline(pipeline or PIPELINE, timer=TIMER) as models:
+        start_time = time.time()
+        # camera, mirror and RGB buffers are allocated once and refilled every frame
+        preprocess = FramePreprocessor(mirror_pixels=True)
+        raw = None
+        frames = 0
+        while cap.isOpened() and (max_frames is None or frames < max_frames):
+            TIMER.begin_frame()
+            ret, raw = cap.read(raw)
+            if not ret:
+                break
+            read_at = time.time()
+            TIMER.lap("cap.read")
+            frame, frame_rgb = preprocess.process(raw)
+            TIMER.lap("preprocess")
+            results = models.process(frame_rgb)
+
+            left = results.left_hand_landmarks
+            right = results.right_hand_landmarks
+            if left:
+                mp_drawing.draw_landmarks(frame, left, mp_holistic.HAND_CONNECTIONS)
+            if right:
+                mp_drawing.draw_landmarks(frame, right, mp_holistic.HAND_CONNECTIONS)
+            TIMER.lap("hands")
+
+            # only a recording needs every landmark converted; the gestures read the palm points
+            feat = FEATURES.from_landmarks(read_at, (left, right), results.pose_landmarks,
+                                           copy=recorder is not None)
+            if recorder is not None:
+                recorder.append_arrays(frames, read_at, time.time(), feat.hands, feat.hand_mask,
+                                       feat.pose if feat.pose_present else None)
+            update_gestures(ENGINE.pack(feat), read_at)
+            fuse_events(time.time())
+            TIMER.lap("gestures")
+
+            if results.pose_landmarks:
+                mp_drawing.draw_landmarks(frame, results.pose_landmarks, mp_holistic.POSE_CONNECTIONS)
+
+            total_score = score_67 + kaby_counter
+            progress = min(total_score / GOAL, 1.0)
+            h, w, _ = frame.shape
+            bar_w = int(w * 0.6)
+            bar_h = 28
+            bar_x = int((w - bar_w) / 2)
+            bar_y = 20
+            cv2.rectangle(frame, (bar_x, bar_y), (bar_x + bar_w, bar_y + bar_h), (50, 50, 50), -1)
+            filled_w = int(bar_w * progress)
+            if progress < 0.5:
+                color = (0, 0, 255)
+            elif progress < 0.9:
+                color = (0, 215, 255)
+            else:
+                color = (0, 255, 0)
+            cv2.rectangle(frame, (bar_x, bar_y), (bar_x + filled_w, bar_y + bar_h), color, -1)
+            cv2.rectangle(frame, (bar_x, bar_y), (bar_x + bar_w, bar_y + bar_h), (200, 200, 200), 2)
+            cv2.putText(frame, f"Goal: {total_score}/{GOAL}", (bar_x + 10, bar_y + bar_h - 6), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255,255,255), 2)
+
+            cv2.putText(frame, f"Gesture 67: {gesture_counter_67}", (10, h - 80), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,0,255), 2)
+            cv2.putText(frame, f"Audio 67: {audio_counter_67}", (10, h - 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255,255,255), 2)
+            cv2.putText(frame, f"Khaby: {kaby_counter}", (10, h - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,255,0), 2)
+
+            if not PRIZE_UNLOCKED and total_score >= GOAL:
+                PRIZE_UNLOCKED = True
+                prize_start = time.time()
+
+            if PRIZE_UNLOCKED:
+                elapsed = time.time() - prize_start
+                overlay = frame.copy()
+                cv2.rectangle(overlay, (0, 0), (w, h), (0, 0, 0), -1)
+                alpha = 0.6
+                cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, frame)
+                cv2.putText(frame, "PRIZE UNLOCKED!", (int(w*0.12), int(h*0.4)), cv2.FONT_HERSHEY_SIMPLEX, 2.2, (255,215,0), 5)
+                cv2.putText(frame, "You hit 670!", (int(w*0.34), int(h*0.5)), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (255,255,255), 3)
+                num_confetti = 80
+                for i in range(num_confetti):
+                    np.random.seed(i + int(elapsed*100))
+                    cx = int(np.random.rand() * w)
+                    cy = int(np.random.rand() * h)
+                    r = int(3 + np.random.rand() * 8)
+                    cv2.circle(frame, (cx, cy), r, (int(np.random.rand()*255), int(np.random.rand()*255), int(np.random.rand()*255)), -1)
+                if elapsed > 8:
+                    PRIZE_UNLOCKED = False
+                    gesture_counter_67 = 0
+                    audio_counter_67 = 0
+                    kaby_counter = 0
+                    score_67 = 0
+
+            if show_hud:
+                for i, line in enumerate(TIMER.hud_lines()):
+                    cv2.putText(frame, line, (10, 80 + 20 * i), cv2.FONT_HERSHEY_PLAIN, 1.1, (255, 255, 0), 1)
+            TIMER.lap("overlay")
+
+            frames += 1
+            key = -1
+            if display:
+                cv2.imshow("67 Motion + Audio + Goal", frame)
+                key = cv2.waitKey(1) & 0xFF
+                TIMER.lap("display")
+            TIMER.end_frame()
+            if key == 27:
+                break
+            if key == ord("h"):
+                show_hud = not show_hud
+    if recorder is not None:
+        recorder.close()
+    return frames
+
+
+def replay_gestures(log):
+    """Run a recorded arm_tracking log through the detectors; no camera or model involved.
+
+    The features of the whole log are computed in one vectorized pass,
+    so only the gesture engine steps frame by frame.
+    """
+    vectors = ENGINE.pack_log(log_features(log.frames, HISTORY_LEN))
+    for vector, now in zip(vectors, log.frames["captured_at"].tolist()):
+        update_gestures(vector, now)
+    return {"67": gesture_counter_67, "khaby": kaby_counter}
+
+
+if __name__ == "__main__":
+    audio_thread = threading.Thread(target=listen_for_67, daemon=True)
+    audio_thread.start()
+
+    cap = cv2.VideoCapture(0)
+    run(cap, record=RECORD_LANDMARKS)
+    cap.release()
+    cv2.destroyAllWindows()
+    if PROFILE_EXPORT:
+        TIMER.export(PROFILE_EXPORT)
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import time
+
+import pygame
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = os.path.join(ASSET_DIR, ".asset_cache")
+
+# every (size, flip_x) the games ask for, so `python assets.py` can bake them ahead of time
+ASSET_SIZES = {
+    "ice_platform.png": [((40, 140), False), ((20, 70), False), ((60, 30), False), ((120, 70), False)],
+    "lava_platform.png": [((40, 140), False), ((40, 140), True), ((20, 70), True), ((60, 30), False),
+                          ((120, 70), False)],
+    "ball.png": [((60, 60), False)],
+}
+
+
+class AssetCache:
+    """Images baked once at the size they are drawn at.
+
+    The first request for (name, size, flip_x) decodes the source PNG, scales
+    it and writes the raw RGBA pixels to CACHE_DIR. Later runs read those few
+    KB back instead of decoding the full-resolution PNG. Baked files are keyed
+    by the source's mtime and size, so editing an image rebakes it.
+    """
+
+    def __init__(self, root=ASSET_DIR, cache_dir=CACHE_DIR):
+        self.root = root
+        self.cache_dir = cache_dir
+        self._surfaces = {}
+        self._sources = {}
+        self.baked = 0
+        self.loaded = 0
+
+    def get(self, name, size, flip_x=False):
+        """Return the image at `size`; raises FileNotFoundError / pygame.error like image.load."""
+        key = (name, tuple(size), flip_x)
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            return surf
+
+        path = self._baked_path(name, key[1], flip_x)
+        surf = self._load_baked(path, key[1])
+        if surf is None:
+            surf = self._bake(name, key[1], flip_x, path)
+        if pygame.display.get_surface() is not None:
+            surf = surf.convert_alpha()
+        self._surfaces[key] = surf
+        return surf
+
+    def _baked_path(self, name, size, flip_x):
+        st = os.stat(os.path.join(self.root, name))
+        stamp = f"{name}|{st.st_mtime_ns}|{st.st_size}"
+        digest = hashlib.sha1(stamp.encode()).hexdigest()[:12]
+        stem = os.path.splitext(name)[0]
+        return os.path.join(self.cache_dir, f"{stem}-{self._variant(size, flip_x)}-{digest}.rgba")
+
+    @staticmethod
+    def _variant(size, flip_x):
+        return f"{size[0]}x{size[1]}" + ("-flip" if flip_x else "")
+
+    def _load_baked(self, path, size):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) != size[0] * size[1] * 4:
+            return None  # truncated write; bake again
+        self.loaded += 1
+        return pygame.image.frombytes(data, size, "RGBA")
+
+    def _bake(self, name, size, flip_x, path):
+        src = self._sources.get(name)
+        if src is None:
+            src = pygame.image.load(os.path.join(self.root, name))
+            self._sources[name] = src  # several sizes of one image share a single decode
+        surf = pygame.transform.scale(src, size)
+        if flip_x:
+            surf = pygame.transform.flip(surf, True, False)
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._prune(name, size, flip_x)
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(pygame.image.tobytes(surf, "RGBA"))
+            os.replace(tmp, path)
+        except OSError:
+            pass  # read-only install: still works, just without the on-disk cache
+        self.baked += 1
+        return surf
+
+    def _prune(self, name, size, flip_x):
+        # drop bakes of older versions of this source at this size
+        prefix = f"{os.path.splitext(name)[0]}-{self._variant(size, flip_x)}-"
+        for fn in os.listdir(self.cache_dir):
+            if fn.startswith(prefix):
+                os.remove(os.path.join(self.cache_dir, fn))
+
+    def bake_all(self, sizes=None):
+        for name, variants in (sizes or ASSET_SIZES).items():
+            if not os.path.exists(os.path.join(self.root, name)):
+                continue
+            for size, flip_x in variants:
+                self.get(name, size, flip_x)
+
+    def release_sources(self):
+        """Free decoded full-resolution sources once everything needed is baked."""
+        self._sources.clear()
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    cache = AssetCache()
+    cache.bake_all()
+    print(f"baked {cache.baked}, reused {cache.loaded} in {(time.perf_counter() - start) * 1000:.1f} ms "
+          f"-> {CACHE_DIR}")
@@ -0,0 +1,203 @@
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from physics import SUBSTEPS, SPEEDUP_PER_HIT, ENGLISH_DIVISOR
+
+
+class BatchPongSim:
+    """Headless Pong: steps `n` independent matches at once as NumPy arrays.
+
+    Same rules and units as physics.PongSim (pixels per 1/60 s tick).
+    `paddle_h`, `ball_speed` and `smooth` may be scalars or length-n arrays,
+    so a parameter sweep is just one batch with different values per match.
+    Defaults match finalGame with paddle images loaded.
+    """
+
+    def __init__(self, n, width=900, height=600, left_face=100, right_face=800,
+                 paddle_h=140, ball_speed=25, smooth=0.65, ball_r=10, substeps=SUBSTEPS):
+        self.n = n
+        self.width = width
+        self.height = height
+        self.left_face = left_face
+        self.right_face = right_face
+        self.ball_r = ball_r
+        self.substeps = substeps
+
+        self.paddle_h = np.broadcast_to(np.asarray(paddle_h, dtype=np.float64), (n,)).copy()
+        self.ball_speed = np.broadcast_to(np.asarray(ball_speed, dtype=np.float64), (n,)).copy()
+        self.smooth = np.broadcast_to(np.asarray(smooth, dtype=np.float64), (n,)).copy()
+
+        self.p1_y = np.full(n, height // 2, dtype=np.float64)
+        self.p2_y = np.full(n, height // 2, dtype=np.float64)
+
+        self.ball_x = np.full(n, width // 2, dtype=np.float64)
+        self.ball_y = np.full(n, height // 2, dtype=np.float64)
+        self.ball_vx = self.ball_speed.copy()
+        self.ball_vy = np.trunc(self.ball_speed * 0.6)
+
+        self.s1 = np.zeros(n, dtype=np.int64)
+        self.s2 = np.zeros(n, dtype=np.int64)
+        self.hits = np.zeros(n, dtype=np.int64)
+        self.ticks = 0
+
+    def step(self, p1_target, p2_target):
+        """Advance every match one tick towards the given paddle targets."""
+        self.ticks += 1
+
+        # smooth movement (int() in the scalar sim truncates toward zero)
+        top = self.height - self.paddle_h
+        keep = self.smooth
+        self.p1_y = np.clip(np.trunc(self.p1_y * keep + p1_target * (1 - keep)), 0, top)
+        self.p2_y = np.clip(np.trunc(self.p2_y * keep + p2_target * (1 - keep)), 0, top)
+
+        for _ in range(self.substeps):
+            self._substep(1.0 / self.substeps)
+
+        # scoring
+        out_l = self.ball_x < 0
+        out_r = ~out_l & (self.ball_x > self.width)
+        self.s2 += out_l
+        self.s1 += out_r
+        out = out_l | out_r
+        self.ball_x[out] = self.width // 2
+        self.ball_y[out] = self.height // 2
+        vx = self.ball_vx
+        self.ball_vx = np.where(out_l, np.where(vx < 0, -vx, self.ball_speed), vx)
+        self.ball_vx = np.where(out_r, np.where(vx > 0, -vx, -self.ball_speed), self.ball_vx)
+
+    def _substep(self, frac):
+        x0, y0 = self.ball_x, self.ball_y
+        vx, vy = self.ball_vx, self.ball_vy
+        x1 = x0 + vx * frac
+        y1 = y0 + vy * frac
+        r = self.ball_r
+        ph = self.paddle_h
+        lf, rf = self.left_face, self.right_face
+
+        # swept paddle collision against each inner face
+        cross_l = (vx < 0) & (x0 - r >= lf) & (x1 - r < lf)
+        cross_r = (vx > 0) & (x0 + r <= rf) & (x1 + r > rf)
+        dx = np.where(cross_l | cross_r, x1 - x0, 1.0)
+        t = np.where(cross_l, (lf + r - x0) / dx, (rf - r - x0) / dx)
+        yc = y0 + (y1 - y0) * t
+        hit_l = cross_l & (self.p1_y <= yc) & (yc <= self.p1_y + ph)
+        hit_r = cross_r & (self.p2_y <= yc) & (yc <= self.p2_y + ph)
+
+        x1 = np.where(hit_l, 2 * (lf + r) - x1, x1)
+        x1 = np.where(hit_r, 2 * (rf - r) - x1, x1)
+        vy = np.where(hit_l, vy + (yc - (self.p1_y + ph / 2)) / ENGLISH_DIVISOR, vy)
+        vy = np.where(hit_r, vy + (yc - (self.p2_y + ph / 2)) / ENGLISH_DIVISOR, vy)
+        vx = np.where(hit_l, np.abs(vx) + SPEEDUP_PER_HIT, vx)
+        vx = np.where(hit_r, -np.abs(vx) - SPEEDUP_PER_HIT, vx)
+        self.hits += hit_l | hit_r
+
+        # wall bounce: reflect the overshoot back into the field
+        low = y1 < 0
+        high = y1 > self.height
+        y1 = np.where(low, -y1, np.where(high, 2 * self.height - y1, y1))
+        vy = np.where(low, np.abs(vy), np.where(high, -np.abs(vy), vy))
+
+        self.ball_x, self.ball_y = x1, y1
+        self.ball_vx, self.ball_vy = vx, vy
+
+    def run(self, steps, policy=None, inputs=None):
+        """Run `steps` ticks driven by a policy or by recorded inputs.
+
+        `policy(sim)` returns (p1_target, p2_target). `inputs` is an array of
+        shape (T, 2) or (T, n, 2) of recorded targets, replayed cyclically.
+        """
+        if policy is None and inputs is None:
+            policy = tracking_policy()
+        if inputs is not None:
+            inputs = np.asarray(inputs, dtype=np.float64)
+        for i in range(steps):
+            if inputs is not None:
+                row = inputs[i % len(inputs)]
+                self.step(row[..., 0], row[..., 1])
+            else:
+                self.step(*policy(self))
+        return self
+
+    def rallies(self):
+        return self.s1 + self.s2
+
+    def summary(self):
+        points = self.rallies()
+        return {
+            "matches": self.n,
+            "ticks": self.ticks,
+            "points": int(points.sum()),
+            "hits": int(self.hits.sum()),
+            "hits_per_point": float(self.hits.sum() / max(1, points.sum())),
+        }
+
+
+def tracking_policy(noise_px=0.0, lag=0.0, seed=None):
+    """Scripted players that aim the paddle centre at the ball with noise.
+
+    `lag` in [0, 1) blends towards the previous target to mimic slow hands.
+    """
+    rng = np.random.default_rng(seed)
+    prev = {}
+
+    def policy(sim):
+        targets = []
+        for key in ("p1", "p2"):
+            aim = sim.ball_y - sim.paddle_h / 2
+            if noise_px:
+                aim = aim + rng.normal(0.0, noise_px, sim.n)
+            if lag and key in prev:
+                aim = prev[key] * lag + aim * (1 - lag)
+            prev[key] = aim
+            targets.append(aim)
+        return targets[0], targets[1]
+
+    return policy
+
+
+def sweep(steps=3600, repeats=64, ball_speeds=(15, 20, 25, 30), paddle_hs=(100, 140, 180),
+          smooths=(0.5, 0.65, 0.8), noise_px=40.0, seed=0):
+    """Play every (ball_speed, paddle_h, smooth) combination `repeats` times in one batch.
+
+    Returns a list of dicts with the mean hits per point for each combination.
+    """
+    combos = list(itertools.product(ball_speeds, paddle_hs, smooths))
+    grid = np.repeat(np.array(combos, dtype=np.float64), repeats, axis=0)
+    sim = BatchPongSim(len(grid), ball_speed=grid[:, 0], paddle_h=grid[:, 1], smooth=grid[:, 2])
+    sim.run(steps, policy=tracking_policy(noise_px=noise_px, lag=0.5, seed=seed))
+
+    hits = sim.hits.reshape(len(combos), repeats).sum(axis=1)
+    points = sim.rallies().reshape(len(combos), repeats).sum(axis=1)
+    return [{"ball_speed": b, "paddle_h": h, "smooth": s, "hits_per_point": float(hits[i] / max(1, points[i]))}
+            for i, (b, h, s) in enumerate(combos)]
+
+
+def benchmark(matches=4096, steps=1000):
+    """Return throughput in matches*steps per second."""
+    sim = BatchPongSim(matches)
+    policy = tracking_policy(noise_px=40.0, lag=0.5, seed=0)
+    sim.run(10, policy=policy)  # warm-up
+    start = time.perf_counter()
+    sim.run(steps, policy=policy)
+    elapsed = time.perf_counter() - start
+    return matches * steps / elapsed, sim
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless batch Pong benchmark / parameter sweep")
+    parser.add_argument("--matches", type=int, default=4096)
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--sweep", action="store_true", help="run the BALL_SPEED/PADDLE_H/SMOOTH sweep")
+    args = parser.parse_args()
+
+    if args.sweep:
+        for row in sweep():
+            print(f"BALL_SPEED={row['ball_speed']:>4.0f}  PADDLE_H={row['paddle_h']:>4.0f}  "
+                  f"SMOOTH={row['smooth']:.2f}  hits/point={row['hits_per_point']:.2f}")
+    else:
+        rate, sim = benchmark(args.matches, args.steps)
+        print(f"{args.matches} matches x {args.steps} steps: {rate:,.0f} match-steps/sec")
+        print(sim.summary())
@@ -0,0 +1,364 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from profiling import StageTimer
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+# metric -> +1 if higher is better, -1 if lower is better; only these gate a run
+GATED = {"fps": 1, "inference_hz": 1, "work_p50_ms": -1, "work_p95_ms": -1}
+# sub-millisecond frame work jitters by more than the tolerance; ignore changes below this
+MIN_DELTA_MS = 0.25
+
+
+class _PacedSource:
+    """cv2.VideoCapture-like base: `read(image)` at the source's frame rate.
+
+    With `realtime=False` frames come as fast as they are asked for, which
+    measures throughput instead of behaviour at camera speed. `frames` ends
+    the stream after that many reads (None = endless).
+    """
+
+    def __init__(self, fps, frames=None, realtime=True):
+        self.fps = fps
+        self.frames = frames
+        self.realtime = realtime
+        self.read_count = 0
+        self._next_due = None
+        self._open = True
+
+    def isOpened(self):
+        return self._open
+
+    def release(self):
+        self._open = False
+
+    def set(self, prop, value):
+        return False
+
+    def get(self, prop):
+        return self.fps if prop == cv2.CAP_PROP_FPS else 0.0
+
+    def read(self, image=None):
+        if not self._open or (self.frames is not None and self.read_count >= self.frames):
+            return False, image
+        if self.realtime:
+            now = time.perf_counter()
+            if self._next_due is None:
+                self._next_due = now
+            elif self._next_due > now:
+                time.sleep(self._next_due - now)
+            self._next_due = max(self._next_due + 1.0 / self.fps, time.perf_counter() - 1.0 / self.fps)
+        ok, image = self._grab(image)
+        if ok:
+            self.read_count += 1
+        return ok, image
+
+    def _grab(self, image):
+        raise NotImplementedError
+
+
+class SyntheticCamera(_PacedSource):
+    """Deterministic frames: two skin-coloured blobs moving over a gradient.
+
+    No model will find hands in them, but every stage still does its real
+    work on real-sized images, so timings are comparable between runs.
+    """
+
+    def __init__(self, size=(640, 480), fps=30, frames=None, realtime=True):
+        super().__init__(fps, frames, realtime)
+        w, h = size
+        self.size = size
+        ramp = np.linspace(40, 90, w, dtype=np.uint8)
+        self._background = np.empty((h, w, 3), np.uint8)
+        self._background[:] = ramp[None, :, None]
+
+    def _grab(self, image):
+        w, h = self.size
+        if image is None or image.shape != self._background.shape:
+            image = np.empty_like(self._background)
+        np.copyto(image, self._background)
+        t = self.read_count / self.fps
+        for i, phase in enumerate((0.0, math.pi)):
+            cx = int(w * (0.3 + 0.4 * i))
+            cy = int(h * (0.5 + 0.3 * math.sin(2 * math.pi * 0.5 * t + phase)))
+            cv2.circle(image, (cx, cy), h // 10, (120, 160, 220), -1)
+        return True, image
+
+
+class ReplayCamera(_PacedSource):
+    """Play a recorded video file back as if it were the webcam, looping at the end."""
+
+    def __init__(self, path, frames=None, realtime=True, loop=True):
+        self._cap = cv2.VideoCapture(path)
+        if not self._cap.isOpened():
+            raise OSError(f"cannot open video {path!r}")
+        super().__init__(self._cap.get(cv2.CAP_PROP_FPS) or 30.0, frames, realtime)
+        self.loop = loop
+
+    def release(self):
+        super().release()
+        self._cap.release()
+
+    def _grab(self, image):
+        ok, image = self._cap.read(image)
+        if not ok and self.loop:
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, image = self._cap.read(image)
+        return ok, image
+
+
+def make_source(video=None, frames=None, realtime=True):
+    """Factory for CameraCapture / arm_tracking.run: a replayed video, else synthetic frames."""
+    def factory():
+        if video:
+            return ReplayCamera(video, frames=frames, realtime=realtime)
+        return SyntheticCamera(frames=frames, realtime=realtime)
+    return factory
+
+
+def _distribution(values_s):
+    if not values_s:
+        return {}
+    ms = np.sort(np.asarray(values_s)) * 1000.0
+    return {q: float(np.percentile(ms, q)) for q in (50, 95, 99)} | {"max": float(ms[-1])}
+
+
+def _report(timer, wall, frames, inferences):
+    """Summary of one run; `work` is the frame minus time spent idling for the frame cap."""
+    frame_times = timer.samples("frame")
+    idle = timer.samples("idle")
+    work = [f - i for f, i in zip(frame_times, idle)] if len(idle) == len(frame_times) else frame_times
+    report = {"frames": frames, "seconds": wall, "fps": frames / wall if wall else 0.0,
+              "inference_hz": inferences / wall if wall else 0.0}
+    for name, values in (("frame", frame_times), ("work", work)):
+        for q, v in _distribution(values).items():
+            report[f"{name}_p{q}_ms" if q != "max" else f"{name}_max_ms"] = v
+    report["stages"] = {stage: {"p50_ms": row["p50_ms"], "p95_ms": row["p95_ms"]}
+                        for stage, row in timer.summary().items()}
+    return report
+
+
+def bench_game(source, seconds=10.0):
+    """Drive finalGame.run_game headless for `seconds` from `source`."""
+    import pygame
+    import finalGame as game
+
+    game.TIMER = timer = StageTimer(window=1_000_000)
+    session = game.start_tracking(source)
+    try:
+        if not game.wait_for_session(session):
+            raise RuntimeError(f"tracking did not start: {session.error}")
+        # ESC after `seconds`, exactly as a player leaving the match
+        pygame.time.set_timer(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_ESCAPE),
+                              int(seconds * 1000), loops=1)
+        start = time.perf_counter()
+        inferences = session.tracker.inferences
+        game.run_game(session)
+        wall = time.perf_counter() - start
+        inferences = session.tracker.inferences - inferences
+    finally:
+        session.close()
+    return _report(timer, wall, len(timer.samples("frame")), inferences)
+
+
+def bench_arm(source, frames=300, pipeline=None):
+    """Run the arm_tracking loop headless on `frames` frames from `source`."""
+    import arm_tracking
+
+    arm_tracking.TIMER = timer = StageTimer(window=1_000_000)
+    cap = source()
+    try:
+        start = time.perf_counter()
+        done = arm_tracking.run(cap, max_frames=frames, display=False, pipeline=pipeline)
+        wall = time.perf_counter() - start
+    finally:
+        cap.release()
+    # one pass of the model pipeline per frame
+    return _report(timer, wall, done, done)
+
+
+def bench_pipelines(source, frames=300):
+    """arm_tracking under each pipeline.PIPELINES setup: per-model cost and gestures detected.
+
+    Gesture counts only mean something on a recorded video of someone
+    doing the gestures; on synthetic frames every setup finds nothing.
+    """
+    import arm_tracking
+    from pipeline import PIPELINES
+
+    results = {}
+    for name, models in PIPELINES.items():
+        arm_tracking.reset_gestures()
+        rep = bench_arm(source, frames, pipeline=name)
+        rep["models"] = {m: rep["stages"].get(f"{m}.process", {}).get("p50_ms", 0.0) for m in models}
+        rep["gestures"] = {"67": arm_tracking.gesture_counter_67, "khaby": arm_tracking.kaby_counter}
+        results[f"pipeline_{name}"] = rep
+    arm_tracking.reset_gestures()
+    return results
+
+
+def print_pipelines(results):
+    print(f"\n{'pipeline':<18}{'models (p50 ms)':<36}{'total':>8}{'fps':>8}{'67':>5}{'khaby':>7}")
+    for scenario, rep in results.items():
+        models = "  ".join(f"{m} {ms:.1f}" for m, ms in rep["models"].items())
+        print(f"{scenario[len('pipeline_'):]:<18}{models:<36}{sum(rep['models'].values()):8.1f}"
+              f"{rep['fps']:8.1f}{rep['gestures']['67']:5d}{rep['gestures']['khaby']:7d}")
+
+
+def bench_players(seconds=5.0, counts=(1, 2, 3, 4)):
+    """Game frame time against player count: 1-2 players share one arena, 3-4 use two.
+
+    Hands come from synthetic landmark logs through a ReplaySession, so
+    this measures the game side only (the one inference pass for up to
+    four hands is what `bench_game` times).
+    """
+    import tempfile
+
+    import pygame
+    import finalGame as game
+    from landmark_log import LandmarkLog, ReplaySession, synthetic_log
+
+    results = {}
+    arenas = game.ARENAS
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in counts:
+            path = os.path.join(tmp, f"players{n}.lmk")
+            synthetic_log(path, seconds + 5.0, hands=n)
+            session = ReplaySession(LandmarkLog(path))
+            game.ARENAS = (n + 1) // 2
+            game.TIMER = timer = StageTimer(window=1_000_000)
+            pygame.time.set_timer(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_ESCAPE),
+                                  int(seconds * 1000), loops=1)
+            start = time.perf_counter()
+            game.run_game(session)
+            wall = time.perf_counter() - start
+            results[f"players_{n}"] = _report(timer, wall, len(timer.samples("frame")), session.inferences)
+    game.ARENAS = arenas
+    return results
+
+
+def scenario_of(name):
+    """The --scenario choice that produces the result called `name`."""
+    if name.startswith("players_"):
+        return "players"
+    if name.startswith("pipeline_"):
+        return "pipelines"
+    return name
+
+
+def compare(results, baseline, tolerance=0.15, selected="all"):
+    """Return a list of regression messages (empty when every gated metric is within tolerance).
+
+    A baseline scenario the `selected` run should have produced but did not
+    is a failure too, so a scenario that silently stops running gets noticed.
+    """
+    failures = []
+    ran = ("game", "arm", "players") if selected == "all" else (selected,)
+    for scenario, base in baseline.items():
+        current = results.get(scenario)
+        if current is None:
+            if scenario_of(scenario) in ran:
+                failures.append(f"{scenario}: in the baseline but missing from this run")
+            continue
+        for metric, sign in GATED.items():
+            if metric not in base or metric not in current or not base[metric]:
+                continue
+            change = (current[metric] - base[metric]) / base[metric]
+            if metric.endswith("_ms") and abs(current[metric] - base[metric]) < MIN_DELTA_MS:
+                continue
+            if sign * change < -tolerance:
+                failures.append(f"{scenario}.{metric}: {base[metric]:.2f} -> {current[metric]:.2f} "
+                                f"({change:+.0%}, allowed {tolerance:.0%})")
+    return failures
+
+
+def print_report(results, baseline=None):
+    for scenario, rep in results.items():
+        print(f"[{scenario}] {rep['frames']} frames in {rep['seconds']:.1f} s: "
+              f"{rep['fps']:.1f} fps, inference {rep['inference_hz']:.1f} Hz")
+        for name in ("frame", "work"):
+            print(f"  {name:<6} p50 {rep.get(name + '_p50_ms', 0):7.2f}  p95 {rep.get(name + '_p95_ms', 0):7.2f}  "
+                  f"p99 {rep.get(name + '_p99_ms', 0):7.2f}  max {rep.get(name + '_max_ms', 0):7.2f} ms")
+        base = (baseline or {}).get(scenario, {})
+        for metric in GATED:
+            if metric in base and base[metric]:
+                print(f"  {metric:<14}{base[metric]:9.2f} -> {rep[metric]:9.2f} "
+                      f"({(rep[metric] - base[metric]) / base[metric]:+.0%})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless replay benchmark for the Pong game and arm_tracking")
+    parser.add_argument("--video", help="recorded video to replay (default: synthetic frames)")
+    parser.add_argument("--scenario", choices=("game", "arm", "players", "pipelines", "all"), default="all",
+                        help="'all' runs game, arm and players; 'pipelines' compares arm_tracking model setups")
+    parser.add_argument("--seconds", type=float, default=10.0, help="length of the game run")
+    parser.add_argument("--frames", type=int, default=300, help="frames for each arm_tracking run")
+    parser.add_argument("--player-seconds", type=float, default=5.0, help="length of each player-count run")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--no-baseline", action="store_true",
+                        help="only report; without it a missing baseline is an error")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--json", help="also write the full report here")
+    args = parser.parse_args(argv)
+
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    results = {}
+    if args.scenario in ("game", "all"):
+        # the game reads its camera in real time, like a webcam would deliver it
+        results["game"] = bench_game(make_source(args.video), args.seconds)
+    if args.scenario in ("arm", "all"):
+        # arm_tracking reads synchronously, so unpaced frames measure its throughput
+        results["arm"] = bench_arm(make_source(args.video, realtime=False), args.frames)
+    if args.scenario in ("players", "all"):
+        results.update(bench_players(args.player_seconds))
+    if args.scenario == "pipelines":
+        results.update(bench_pipelines(make_source(args.video, realtime=False), args.frames))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({s: {m: r[m] for m in GATED} for s, r in results.items()}, f, indent=2)
+        print_report(results)
+        print(f"baseline saved to {args.baseline}")
+        return 0
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+    if args.scenario == "pipelines":
+        print_pipelines(results)
+    if args.no_baseline:
+        return 0
+    if baseline is None:
+        print(f"\nno baseline at {args.baseline}: run with --save-baseline to create one, "
+              f"or --no-baseline to only report", file=sys.stderr)
+        return 2
+
+    failures = compare(results, baseline, args.tolerance, args.scenario)
+    if failures:
+        print("\nPERFORMANCE REGRESSION:", file=sys.stderr)
+        for line in failures:
+            print("  " + line, file=sys.stderr)
+        return 1
+    print("\nok: within tolerance of baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+import collections
+import threading
+import time
+
+import cv2
+
+
+class CameraCapture:
+    """Pull webcam frames on a background thread into a small ring buffer.
+
+    The newest frame always wins: when the buffer is full the oldest frame is
+    dropped, so readers never see stale frames and never block on the device.
+
+    Frames are read into a small pool of reused arrays, so steady-state
+    capture allocates nothing. A frame taken with `latest(hold=True)` is
+    never read into again until `release(frame)`: while it is held, its
+    pool slot gets a fresh array instead. Unheld frames stay valid for
+    `buffer_size + 4` further captures.
+
+    `pause()` stops reading but keeps the device open, so `resume()` delivers
+    a frame within one camera interval. If reads keep failing for
+    `reconnect_after` seconds the device is released and reopened.
+    """
+
+    def __init__(self, src=0, buffer_size=2, reconnect_after=1.0, timer=None):
+        self.src = src
+        self.timer = timer  # optional profiling.StageTimer
+        self.buffer_size = buffer_size
+        self.reconnect_after = reconnect_after
+        self._frames = collections.deque(maxlen=buffer_size)
+        # ring buffer + one being written + one in the worker + one published + one on screen
+        self._pool = [None] * (buffer_size + 4)
+        self._pool_index = 0
+        self._held = collections.Counter()  # id(frame) -> holds not yet released
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+        self._cap = None
+        self._started_at = 0.0
+        self._active = threading.Event()
+        self.first_frame = threading.Event()  # set once the device delivers a frame
+
+        self.frame_id = 0
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self.read_failures = 0
+        self.reconnects = 0
+        self._reopen_streak = 0
+        self.last_frame_time = 0.0
+        self.capture_interval = 0.0  # rolling average seconds between frames
+        self.resolution = None  # requested (w, h); None keeps the device default
+        self._applied_resolution = None
+        self._default_resolution = None
+
+    def start(self):
+        if self._running:
+            return self
+        self._cap = self._open()
+        self._started_at = time.perf_counter()
+        self._running = True
+        self._active.set()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def _open(self):
+        # a callable source builds its own VideoCapture-like reader (video replay, synthetic frames)
+        return self.src() if callable(self.src) else cv2.VideoCapture(self.src)
+
+    def stop(self):
+        self._running = False
+        self._active.set()  # wake the thread if it is paused
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+        with self._lock:
+            self._frames.clear()
+
+    def pause(self):
+        self._active.clear()
+        with self._lock:
+            self._frames.clear()
+
+    def resume(self):
+        # restart the health clock so the paused gap doesn't look like a dead camera
+        self.last_frame_time = 0.0
+        self._started_at = time.perf_counter()
+        self._active.set()
+
+    @property
+    def paused(self):
+        return not self._active.is_set()
+
+    def _run(self):
+        while self._running:
+            if not self._active.wait(0.1):
+                continue
+            if self._cap is None or not self._cap.isOpened():
+                self._reopen()
+                continue
+            if self.resolution != self._applied_resolution:
+                self._apply_resolution()
+
+            buf = self._pool[self._pool_index]
+            if buf is not None:
+                with self._lock:
+                    if id(buf) in self._held:
+                        buf = None  # still being read elsewhere: let OpenCV allocate a replacement
+            t0 = time.perf_counter()
+            ret, frame = self._cap.read(buf)
+            now = time.perf_counter()
+            if self.timer is not None:
+                self.timer.add("cap.read", now - t0)
+            if not ret:
+                self.read_failures += 1
+                if now - (self.last_frame_time or self._started_at) > self.reconnect_after:
+                    self._reopen()
+                else:
+                    time.sleep(0.01)
+                continue
+
+            # OpenCV fills the pooled array in place when the size matches
+            self._pool[self._pool_index] = frame
+            self._pool_index = (self._pool_index + 1) % len(self._pool)
+
+            with self._lock:
+                if len(self._frames) == self._frames.maxlen:
+                    self.frames_dropped += 1
+                self.frame_id += 1
+                self._frames.append((self.frame_id, now, frame))
+
+            if self.last_frame_time:
+                dt = now - self.last_frame_time
+                self.capture_interval = dt if not self.capture_interval else \
+                    self.capture_interval * 0.9 + dt * 0.1
+            self.last_frame_time = now
+            self.frames_captured += 1
+            self._reopen_streak = 0
+            self.first_frame.set()
+
+    def set_resolution(self, size):
+        """Ask for (w, h) frames, or None for the device default; applied by the capture thread."""
+        self.resolution = tuple(size) if size else None
+
+    def _apply_resolution(self):
+        cap = self._cap
+        if self._default_resolution is None:
+            self._default_resolution = (cap.get(cv2.CAP_PROP_FRAME_WIDTH), cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        w, h = self.resolution or self._default_resolution
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, w)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, h)
+        self._applied_resolution = self.resolution
+
+    def _reopen(self):
+        """Release the device and open it again, backing off while it stays unavailable."""
+        if self._cap is not None:
+            self._cap.release()
+        delay = min(2.0, 0.25 * 2 ** self._reopen_streak)
+        self._reopen_streak += 1
+        end = time.perf_counter() + delay
+        while self._running and time.perf_counter() < end:
+            time.sleep(0.05)
+        if not self._running:
+            return
+        self._cap = self._open()
+        self._applied_resolution = None  # a fresh device starts at its default size
+        self.reconnects += 1
+        self.last_frame_time = 0.0
+        self._started_at = time.perf_counter()
+
+    def latest(self, hold=False):
+        """Return (frame_id, timestamp, frame) for the newest frame, or None.
+
+        Never blocks. Older buffered frames are discarded and counted as dropped.
+        With `hold`, the frame is not overwritten until it is `release`d.
+        """
+        with self._lock:
+            if not self._frames:
+                return None
+            item = self._frames.pop()
+            self.frames_dropped += len(self._frames)
+            self._frames.clear()
+            if hold:
+                self._held[id(item[2])] += 1
+        return item
+
+    def hold(self, frame):
+        """Keep the capture thread from reading into `frame` until `release(frame)`."""
+        with self._lock:
+            self._held[id(frame)] += 1
+
+    def release(self, frame):
+        with self._lock:
+            key = id(frame)
+            self._held[key] -= 1
+            if self._held[key] <= 0:
+                del self._held[key]
+
+    def healthy(self, max_age=1.0, warmup=5.0):
+        """True while the thread is running and frames arrived recently."""
+        if not self._running or self._cap is None or not self._cap.isOpened():
+            return False
+        now = time.perf_counter()
+        if not self.last_frame_time:
+            return now - self._started_at < warmup  # still negotiating with the device
+        return now - self.last_frame_time < max_age
+
+    def stats(self):
+        return {
+            "captured": self.frames_captured,
+            "dropped": self.frames_dropped,
+            "read_failures": self.read_failures,
+            "reconnects": self.reconnects,
+            "capture_interval_ms": self.capture_interval * 1000.0,
+            "capture_fps": 1.0 / self.capture_interval if self.capture_interval else 0.0,
+        }
@@ -0,0 +1,273 @@
+import argparse
+import collections
+import time
+
+import numpy as np
+
+from landmark_log import HAND_POINTS, POSE_POINTS, LandmarkList, frame_dtype
+
+# wrist, thumb CMC/MCP and the four finger MCPs: a stable palm centre
+PALM_POINTS = [0, 1, 2, 5, 9, 13, 17]
+WRIST, INDEX_MCP, PINKY_MCP = 0, 5, 17
+
+
+def _projection():
+    """(21*3, 4) matrix taking a flattened hand to center_y, wrist_x, index-wrist dy, pinky-wrist dy."""
+    m = np.zeros((HAND_POINTS, 3, 4))
+    m[PALM_POINTS, 1, 0] = 1.0 / len(PALM_POINTS)
+    m[WRIST, 0, 1] = 1.0
+    m[INDEX_MCP, 1, 2], m[WRIST, 1, 2] = 1.0, -1.0
+    m[PINKY_MCP, 1, 3], m[WRIST, 1, 3] = 1.0, -1.0
+    return m.reshape(HAND_POINTS * 3, 4)
+
+
+PROJECTION = _projection()
+
+
+class HandFeatures:
+    """Per-frame gesture features of live or logged hands, plus the landmarks as arrays.
+
+    The features are per-hand lists, updated every frame:
+
+    present              hands seen in this frame
+    center_y, wrist_x    palm centre height and wrist x (last sighting)
+    palm_up              wrist below the index and pinky knuckles
+    dy, dx               newest minus oldest over the last `history` sightings
+    vy, vx               the same deltas per second
+    full                 hands with `history` sightings; deltas are 0 until then
+
+    A live frame reads only the palm landmarks the features use, in plain
+    Python like the per-hand code this replaces: at two hands that is
+    cheaper than any NumPy conversion of the hand. `hands` (n_hands, 21, 3)
+    and `pose` (33, 4), float32 as landmark_log records them, are filled
+    only when asked (`copy=True`, for recording). Whole logs go through
+    `log_features`, which is vectorized over frames. A hand that is
+    missing from a frame keeps its history.
+    """
+
+    def __init__(self, n_hands=2, history=5, pose=False):
+        self.n_hands = n_hands
+        self.history = history
+        self.hands = np.zeros((n_hands, HAND_POINTS, 3), np.float32)
+        self.pose = np.zeros((POSE_POINTS, 4), np.float32) if pose else None
+        self._flat = self.hands.reshape(n_hands, HAND_POINTS * 3)
+        self.reset()
+
+    def reset(self):
+        # (center_y, wrist_x, t) of each hand's last `history` sightings
+        self._recent = [collections.deque(maxlen=self.history) for _ in range(self.n_hands)]
+        self.center_y = [0.0] * self.n_hands
+        self.wrist_x = [0.0] * self.n_hands
+        self.pose_present = False
+        self._update(0.0, [None] * self.n_hands)
+
+    @property
+    def hand_mask(self):
+        return sum(1 << i for i, seen in enumerate(self.present) if seen)
+
+    @property
+    def vy(self):
+        return [d / s if s > 0 else 0.0 for d, s in zip(self.dy, self._span)]
+
+    @property
+    def vx(self):
+        return [d / s if s > 0 else 0.0 for d, s in zip(self.dx, self._span)]
+
+    def from_landmarks(self, now, hands, pose=None, copy=False):
+        """Load MediaPipe landmark lists (None for a missing hand) and update the features.
+
+        With `copy`, `hands` and `pose` are filled with every landmark too.
+        """
+        rows = [None] * self.n_hands
+        for i in range(min(self.n_hands, len(hands))):
+            hand = hands[i]
+            if hand is None:
+                continue
+            points = hand.landmark
+            wrist = points[WRIST]
+            y = wrist.y
+            center = sum([points[j].y for j in PALM_POINTS]) / len(PALM_POINTS)
+            rows[i] = (center, wrist.x, points[INDEX_MCP].y - y, points[PINKY_MCP].y - y)
+            if copy:
+                self.hands[i] = np.fromiter((c for p in points for c in (p.x, p.y, p.z)),
+                                            np.float32, HAND_POINTS * 3).reshape(HAND_POINTS, 3)
+        self.pose_present = pose is not None
+        if copy and pose is not None and self.pose is not None:
+            self.pose[:] = np.fromiter((c for p in pose.landmark for c in (p.x, p.y, p.z, p.visibility)),
+                                       np.float32, POSE_POINTS * 4).reshape(POSE_POINTS, 4)
+        return self._update(now, rows)
+
+    def from_arrays(self, now, hands, hand_mask, pose=None):
+        """Load landmark_log-style arrays, projecting all hands with one matrix product."""
+        hand_mask = int(hand_mask)
+        np.copyto(self.hands, hands[:self.n_hands])
+        self.pose_present = pose is not None
+        if pose is not None and self.pose is not None:
+            np.copyto(self.pose, pose)
+        proj = (self._flat @ PROJECTION).tolist()
+        return self._update(now, [proj[i] if hand_mask >> i & 1 else None for i in range(self.n_hands)])
+
+    def _update(self, now, rows):
+        """`rows` holds (center_y, wrist_x, index dy, pinky dy) per hand, None where it is missing."""
+        n = self.n_hands
+        self.present = [row is not None for row in rows]
+        self.palm_up = [row is not None and row[2] < 0 and row[3] < 0 for row in rows]
+        self.full, self.dy, self.dx, self._span = [False] * n, [0.0] * n, [0.0] * n, [0.0] * n
+        for i, row in enumerate(rows):
+            recent = self._recent[i]
+            if row is not None:
+                self.center_y[i] = y = row[0]
+                self.wrist_x[i] = x = row[1]
+                recent.append((y, x, now))
+            if len(recent) == self.history:
+                y0, x0, t0 = recent[0]
+                y1, x1, t1 = recent[-1]
+                self.full[i] = True
+                self.dy[i], self.dx[i], self._span[i] = y1 - y0, x1 - x0, t1 - t0
+        return self
+
+
+def log_features(frames, history=5):
+    """HandFeatures' outputs for every frame of a landmark log at once.
+
+    `frames` is a LandmarkLog.frames array. Returns a dict of (n_frames,
+    n_hands) arrays with the same values a frame-by-frame HandFeatures
+    would have produced; the only Python loop is over hand slots.
+    """
+    n = len(frames)
+    n_hands = frames["hands"].shape[1]
+    t = np.asarray(frames["captured_at"], dtype=np.float64)
+    mask = np.asarray(frames["hand_mask"])
+    flat = np.asarray(frames["hands"], dtype=np.float32).reshape(n, n_hands, HAND_POINTS * 3)
+    proj = flat @ PROJECTION
+    present = (mask[:, None] >> np.arange(n_hands)) & 1 == 1
+    out = {
+        "present": present,
+        "center_y": proj[:, :, 0],
+        "wrist_x": proj[:, :, 1],
+        "palm_up": present & (proj[:, :, 2] < 0) & (proj[:, :, 3] < 0),
+        "full": np.zeros((n, n_hands), bool),
+    }
+    for name in ("dy", "dx", "vy", "vx"):
+        out[name] = np.zeros((n, n_hands))
+    for s in range(n_hands):
+        seen = np.flatnonzero(present[:, s])
+        if len(seen) < history:
+            continue
+        # the newest sighting at or before each frame, and the one `history - 1` sightings earlier
+        k = np.searchsorted(seen, np.arange(n), side="right") - 1
+        ok = k >= history - 1
+        newest, oldest = seen[k[ok]], seen[k[ok] - (history - 1)]
+        out["full"][ok, s] = True
+        out["dy"][ok, s] = proj[newest, s, 0] - proj[oldest, s, 0]
+        out["dx"][ok, s] = proj[newest, s, 1] - proj[oldest, s, 1]
+        span = t[newest] - t[oldest]
+        out["vy"][ok, s] = np.divide(out["dy"][ok, s], span, out=np.zeros(len(span)), where=span > 0)
+        out["vx"][ok, s] = np.divide(out["dx"][ok, s], span, out=np.zeros(len(span)), where=span > 0)
+    return out
+
+
+class _LegacyFeatures:
+    """The previous per-landmark code, kept as the benchmark's reference."""
+
+    def __init__(self, history=5):
+        self.y = [collections.deque(maxlen=history) for _ in range(2)]
+        self.x = [collections.deque(maxlen=history) for _ in range(2)]
+        self.history = history
+
+    @staticmethod
+    def center_y(hand):
+        indices = [0, 1, 2, 5, 9, 13, 17]
+        return sum([hand.landmark[i].y for i in indices]) / len(indices)
+
+    @staticmethod
+    def palm_up(hand):
+        wrist = hand.landmark[0].y
+        return hand.landmark[5].y < wrist and hand.landmark[17].y < wrist
+
+    def update(self, hands):
+        for i, hand in enumerate(hands):
+            if hand:
+                self.y[i].append(self.center_y(hand))
+                self.x[i].append(hand.landmark[0].x)
+        full = [len(self.y[i]) == self.history for i in range(2)]
+        dy = [self.y[i][-1] - self.y[i][0] if full[i] else 0.0 for i in range(2)]
+        dx = [self.x[i][-1] - self.x[i][0] if full[i] else 0.0 for i in range(2)]
+        up = [bool(hand and self.palm_up(hand)) for hand in hands]
+        return full, dy, dx, up
+
+
+def _synthetic_frames(n, seed=0):
+    """Two waving hands that drop out now and then, as landmark lists and as log arrays."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(n) / 30.0
+    arrays = rng.uniform(0.3, 0.7, (n, 2, HAND_POINTS, 3)).astype(np.float32)
+    arrays[:, 0, :, 1] += (0.1 * np.sin(2 * np.pi * 1.5 * t))[:, None].astype(np.float32)
+    arrays[:, 1, :, 1] -= (0.1 * np.sin(2 * np.pi * 1.5 * t))[:, None].astype(np.float32)
+    masks = np.where(rng.random((n, 2)) < 0.9, 1, 0) * np.array([1, 2])
+    masks = masks.sum(axis=1)
+    lists = [[LandmarkList(arrays[i, s].tolist()) if masks[i] & (1 << s) else None for s in range(2)]
+             for i in range(n)]
+    return t, arrays, masks, lists
+
+
+def _best_of(run, repeat=5):
+    """Fastest of `repeat` runs, in seconds; `run` builds its own fresh state."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(frames=3000):
+    """Per-frame feature cost of the legacy per-landmark code against HandFeatures and log_features."""
+    t, arrays, masks, lists = _synthetic_frames(frames)
+    now = t.tolist()
+    log = np.zeros(frames, frame_dtype(2))
+    log["captured_at"], log["hand_mask"], log["hands"] = t, masks, arrays
+
+    def legacy():
+        update = _LegacyFeatures().update
+        for hands in lists:
+            update(hands)
+
+    def landmarks():
+        update = HandFeatures().from_landmarks
+        for i, hands in enumerate(lists):
+            update(now[i], hands)
+
+    def from_arrays():
+        update = HandFeatures().from_arrays
+        for i in range(frames):
+            update(now[i], arrays[i], masks[i])
+
+    timings = [("legacy, per landmark", _best_of(legacy)),
+               ("HandFeatures.from_landmarks", _best_of(landmarks)),
+               ("HandFeatures.from_arrays", _best_of(from_arrays)),
+               ("log_features (whole log)", _best_of(lambda: log_features(log)))]
+
+    reference, feat, replay = _LegacyFeatures(), HandFeatures(), HandFeatures()
+    batch = log_features(log)
+    for i, hands in enumerate(lists):
+        full, dy, dx, up = reference.update(hands)
+        f = feat.from_landmarks(now[i], hands)
+        assert f.full == full and f.palm_up == up
+        assert np.allclose(f.dy, dy, atol=1e-9) and np.allclose(f.dx, dx, atol=1e-9)
+        r = replay.from_arrays(now[i], arrays[i], masks[i])
+        assert r.full == full and r.palm_up == up and r.hand_mask == masks[i]
+        assert np.allclose(r.dy, dy, atol=1e-6) and np.allclose(r.vy, f.vy, atol=1e-5)
+        assert (batch["full"][i] == f.full).all() and (batch["palm_up"][i] == f.palm_up).all()
+        assert np.allclose(batch["dy"][i], f.dy, atol=1e-9) and np.allclose(batch["vx"][i], f.vx, atol=1e-6)
+
+    for name, total in timings:
+        print(f"{name:<29}{total / frames * 1e6:8.2f} us/frame")
+    print(f"features identical on {frames} frames")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gesture feature extraction micro-benchmark")
+    parser.add_argument("--frames", type=int, default=3000)
+    args = parser.parse_args()
+    benchmark(args.frames)
@@ -0,0 +1,253 @@
+import argparse
+import math
+
+import numpy as np
+
+# how far past the newest measurement a filter will extrapolate before holding still
+MAX_HORIZON = 0.12
+
+
+class ExponentialFilter:
+    """The original paddle blend, y = y*smooth + target*(1-smooth) per 1/60 s tick.
+
+    Applied per elapsed time rather than per frame, so it behaves the same
+    at any frame rate. No prediction: this is the lagging baseline.
+    """
+
+    def __init__(self, smooth=0.65, tick_hz=60.0):
+        self.smooth = smooth
+        self.tick_hz = tick_hz
+        self.reset()
+
+    def reset(self):
+        self._target = None
+        self._y = None
+        self._t = None
+
+    def update(self, t, x):
+        if self._y is None:
+            self._y = x
+            self._t = t
+        self._target = x
+
+    def predict(self, t):
+        if self._y is None:
+            return None
+        dt = max(0.0, t - self._t)
+        self._y += (self._target - self._y) * (1.0 - self.smooth ** (dt * self.tick_hz))
+        self._t = max(self._t, t)
+        return self._y
+
+
+class OneEuroFilter:
+    """One-Euro filter (Casiez et al.) with linear extrapolation.
+
+    The cutoff rises with speed: heavy smoothing while the hand is still,
+    little lag while it moves. `predict(t)` continues the filtered position
+    along the filtered velocity up to MAX_HORIZON past the last sample.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.05, d_cutoff=4.0, max_horizon=MAX_HORIZON):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.max_horizon = max_horizon
+        self.reset()
+
+    def reset(self):
+        self._t = None
+        self._x = 0.0
+        self._dx = 0.0
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def update(self, t, x):
+        if self._t is None:
+            self._t, self._x, self._dx = t, x, 0.0
+            return x
+        dt = max(t - self._t, 1e-4)
+        a_d = self._alpha(self.d_cutoff, dt)
+        self._dx += a_d * ((x - self._x) / dt - self._dx)
+        a = self._alpha(self.min_cutoff + self.beta * abs(self._dx), dt)
+        self._x += a * (x - self._x)
+        self._t = t
+        return self._x
+
+    def predict(self, t):
+        if self._t is None:
+            return None
+        return self._x + self._dx * min(max(t - self._t, 0.0), self.max_horizon)
+
+
+class KalmanFilter:
+    """Constant-velocity Kalman filter over [position, velocity].
+
+    `accel_noise` is the white-acceleration spectral density (units^2/s^3)
+    and `meas_noise` the measurement variance (units^2). Prediction uses the
+    estimated velocity, capped at MAX_HORIZON like the One-Euro filter.
+    """
+
+    def __init__(self, accel_noise=4e5, meas_noise=9.0, max_horizon=MAX_HORIZON):
+        self.q = accel_noise
+        self.r = meas_noise
+        self.max_horizon = max_horizon
+        self.reset()
+
+    def reset(self):
+        self._t = None
+        self._x = self._v = 0.0
+        self._p00 = self._p01 = self._p11 = 0.0
+
+    def update(self, t, z):
+        if self._t is None:
+            self._t, self._x, self._v = t, z, 0.0
+            self._p00, self._p01, self._p11 = self.r, 0.0, 1e6
+            return z
+        dt = max(t - self._t, 1e-4)
+        # time update: x' = F x, P' = F P F^T + Q
+        self._x += self._v * dt
+        q = self.q
+        p00 = self._p00 + dt * (2 * self._p01 + dt * self._p11) + q * dt ** 3 / 3
+        p01 = self._p01 + dt * self._p11 + q * dt ** 2 / 2
+        p11 = self._p11 + q * dt
+        # measurement update on position
+        s = p00 + self.r
+        k0, k1 = p00 / s, p01 / s
+        y = z - self._x
+        self._x += k0 * y
+        self._v += k1 * y
+        self._p00, self._p01, self._p11 = (1 - k0) * p00, (1 - k0) * p01, p11 - k1 * p01
+        self._t = t
+        return self._x
+
+    def predict(self, t):
+        if self._t is None:
+            return None
+        return self._x + self._v * min(max(t - self._t, 0.0), self.max_horizon)
+
+
+FILTERS = {
+    "exponential": ExponentialFilter,
+    "one_euro": OneEuroFilter,
+    "kalman": KalmanFilter,
+}
+
+
+def make_filter(kind, **params):
+    try:
+        return FILTERS[kind](**params)
+    except KeyError:
+        raise ValueError(f"unknown filter {kind!r}; expected one of {sorted(FILTERS)}") from None
+
+
+def synthetic_trace(seconds=30.0, camera_hz=30.0, latency=0.045, noise=3.0, seed=0):
+    """A hand-like paddle trace with known truth: slow sways, fast swipes and rests.
+
+    Returns (captured_at, done_at, measured, truth_fn) in pixels and seconds.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(0.0, seconds, 1.0 / camera_hz)
+
+    def truth(ts):
+        ts = np.asarray(ts, dtype=np.float64)
+        sway = 160 * np.sin(2 * np.pi * 0.4 * ts)
+        # every 4 s a 250 px swipe, eased over 0.25 s, then held until the swipe back
+        start = 250 * ((ts // 4) % 2)
+        phase = np.clip((ts % 4.0 - 2.0) / 0.25, 0.0, 1.0)
+        swipe = start + (250 - 2 * start) * (3 * phase ** 2 - 2 * phase ** 3)
+        return 175 + sway + swipe
+
+    measured = truth(t) + rng.normal(0, noise, len(t))
+    done_at = t + latency + rng.uniform(0, 0.01, len(t))
+    return t, done_at, measured, truth
+
+
+def trace_from_log(log, player=0):
+    """Paddle target of one player, followed with run_game's PlayerTracker, per frame of a game log."""
+    from landmark_log import game_arenas
+    from players import PlayerTracker
+
+    arenas = game_arenas(log.meta)
+    arena = arenas[player // 2]
+    players = PlayerTracker(2 * len(arenas))
+    frames = log.frames
+    captured_at = np.asarray(frames["captured_at"], dtype=np.float64)
+    palms = np.asarray(frames["hands"][:, :, 9, :2], dtype=np.float64)
+    keep, values = [], []
+    for i, mask in enumerate(np.asarray(frames["hand_mask"])):
+        slots = [s for s in range(log.max_hands) if mask & (1 << s)]
+        j = players.update(captured_at[i], [tuple(palms[i, s]) for s in slots]).get(player)
+        if j is not None:
+            keep.append(i)
+            values.append(palms[i, slots[j], 1] * arena["height"] - arena["paddle_h"] / 2)
+    return (captured_at[keep], np.asarray(frames["done_at"][keep], dtype=np.float64),
+            np.asarray(values, dtype=np.float64))
+
+
+def _moving_average(x, n):
+    return np.convolve(np.pad(x, n // 2, mode="edge"), np.ones(n) / n, mode="valid")
+
+
+def evaluate(filt, captured_at, done_at, measured, truth=None, display_hz=60.0, present_latency=1 / 60):
+    """Replay a trace through `filt` the way run_game uses it and score the paddle it would draw.
+
+    Each display tick feeds every result that has finished inference by
+    then (timestamped by capture time) and asks for the position at the
+    moment the frame reaches the screen. Without a known `truth`, a
+    zero-phase smoothing of the measurements is the reference.
+
+    lag_ms: shift that best aligns the output with the reference (positive = behind).
+    jitter: RMS of the output around its own 5-tick moving average.
+    error: RMS distance between output and reference at display time.
+    """
+    order = np.argsort(done_at)
+    captured_at, done_at, measured = captured_at[order], done_at[order], measured[order]
+    if truth is None:
+        smooth = _moving_average(measured, 5)
+
+        def truth(ts):
+            return np.interp(ts, captured_at, smooth)
+
+    ticks = np.arange(done_at[0], done_at[-1], 1.0 / display_hz)
+    shown = ticks + present_latency
+    out = np.empty(len(ticks))
+    filt.reset()
+    j = 0
+    for k, tick in enumerate(ticks):
+        while j < len(done_at) and done_at[j] <= tick:
+            filt.update(captured_at[j], measured[j])
+            j += 1
+        out[k] = filt.predict(shown[k])
+
+    settle = int(display_hz)  # skip the first second while filters converge
+    out, shown = out[settle:], shown[settle:]
+    shifts = np.arange(-0.1, 0.3001, 0.002)
+    errors = [np.sqrt(np.mean((out - truth(shown - s)) ** 2)) for s in shifts]
+    return {
+        "lag_ms": float(shifts[int(np.argmin(errors))] * 1000.0),
+        "jitter": float(np.sqrt(np.mean((out - _moving_average(out, 5)) ** 2))),
+        "error": float(np.sqrt(np.mean((out - truth(shown)) ** 2))),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Paddle filter lag/jitter on a landmark log or a synthetic trace")
+    parser.add_argument("log", nargs="?", help="game landmark log (see landmark_log.py); default: synthetic")
+    args = parser.parse_args()
+
+    if args.log:
+        from landmark_log import LandmarkLog
+        captured_at, done_at, measured = trace_from_log(LandmarkLog(args.log))
+        truth = None
+        print(f"{args.log}: {len(measured)} samples, reference = smoothed measurements")
+    else:
+        captured_at, done_at, measured, truth = synthetic_trace()
+        print(f"synthetic trace: {len(measured)} samples, 45 ms inference latency, 3 px noise")
+
+    print(f"{'filter':<13}{'lag ms':>8}{'jitter px':>11}{'error px':>10}")
+    for name in FILTERS:
+        res = evaluate(make_filter(name), captured_at, done_at, measured, truth)
+        print(f"{name:<13}{res['lag_ms']:8.0f}{res['jitter']:11.2f}{res['error']:10.2f}")
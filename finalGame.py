@@ -1,36 +1,49 @@
-import cv2
-import mediapipe as mp
+from startup import StartupTimeline
+
+# started before anything heavy is imported so the whole startup is measured
+TIMELINE = StartupTimeline()
+
 import pygame
 import numpy as np
 import sys
 import time
 import os
 
+# cv2 / mediapipe are imported lazily by TrackingSession so the menu comes up first
+from tracking import TrackingSession
+from profiling import StageTimer
+from physics import PongSim
+from players import PlayerTracker
+from filters import make_filter
+from quality import QualityGovernor, QUALITY_LEVELS
+from sprites import GlowCache, TextCache
+from renderer import DirtyRenderer
+from assets import AssetCache
+
 pygame.init()
 WIDTH, HEIGHT = 900, 600
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Hand-Tracking Pong")
 clock = pygame.time.Clock()
+TIMELINE.mark("import")
 
 FONT = pygame.font.SysFont("Arial", 36)
 SMALL = pygame.font.SysFont("Arial", 24)
+MONO = pygame.font.SysFont("Courier New", 15)
 
 # Try to load paddle images, fall back to default if not found
+ASSETS = AssetCache()
 try:
-    # Load paddle images (make sure these files exist in the same directory)
-    ice_paddle_img = pygame.image.load("ice_platform.png").convert_alpha()
-    lava_paddle_img = pygame.image.load("lava_platform.png").convert_alpha()
-
-    # Scale images to paddle dimensions
+    # Paddle images come pre-scaled from the asset cache (see assets.py)
     PADDLE_H = 140  # Keep the same height
     PADDLE_W = 40  # Made slightly wider for better visuals
 
-    # Scale images
-    ice_paddle_img = pygame.transform.scale(ice_paddle_img, (PADDLE_W, PADDLE_H))
-    lava_paddle_img = pygame.transform.scale(lava_paddle_img, (PADDLE_W, PADDLE_H))
+    ice_paddle_img = ASSETS.get("ice_platform.png", (PADDLE_W, PADDLE_H))
+    lava_paddle_img = ASSETS.get("lava_platform.png", (PADDLE_W, PADDLE_H))
 
     # Create flipped versions for player 2 (optional, for visual consistency)
-    lava_paddle_img_flipped = pygame.transform.flip(lava_paddle_img, True, False)
+    lava_paddle_img_flipped = ASSETS.get("lava_platform.png", (PADDLE_W, PADDLE_H), flip_x=True)
+    ASSETS.release_sources()
 
     USE_IMAGES = True
 except (pygame.error, FileNotFoundError) as e:
@@ -41,16 +54,49 @@ except (pygame.error, FileNotFoundError) as e:
     PADDLE_W = 20
     PADDLE_H = 140
 
-# If images loaded successfully, we need to adjust paddle positions slightly
-if USE_IMAGES:
-    PADDLE_OFFSET = PADDLE_W // 2  # Center the images properly
-
 BALL_SPEED = 25
-SMOOTH = 0.65
+SMOOTH = 0.65  # blend of the "exponential" paddle filter
+
+# paddle filter (see filters.py): "one_euro", "kalman", or "exponential" for the old lagging blend
+PADDLE_FILTER = "one_euro"
+PADDLE_FILTER_PARAMS = {}
+DISPLAY_LATENCY = 1 / 60  # paddles are predicted to where the hand will be when the frame is shown
 GLOW = 12
 
 SHAKE_INTENSITY = 20
 
+# menus block on input instead of repainting at 60 FPS; this caps how long they sleep
+MENU_IDLE_TIMEOUT_MS = 500
+
+# camera view: "pip" draws a small picture-in-picture inside the game window, "off" shows none
+CAMERA_PREVIEW = "pip"
+PREVIEW_SIZE = (192, 144)
+PREVIEW_HZ = 15
+
+# per-stage frame timings; F3 toggles the on-screen HUD during a match
+TIMER = StageTimer()
+show_hud = False
+HUD_REFRESH = 0.25  # seconds between HUD text refreshes
+# file prefix to write <prefix>.json / <prefix>.csv timings after each match, or None
+PROFILE_EXPORT = None
+
+# track each hand on a small crop around its last position instead of the full frame
+ROI_TRACKING = True
+
+# append every match's hand landmarks to this file (see landmark_log.py), or None
+RECORD_LANDMARKS = None
+
+# matches played at once, stacked in the window; each needs two players, all from one camera
+ARENAS = 1
+
+# step camera/inference/effects quality down when frames run long and back up with headroom (see quality.py)
+ADAPTIVE_QUALITY = True
+quality_level = 0  # index into QUALITY_LEVELS, kept between matches
+
+# effect settings of the active quality level
+glow_size = GLOW
+shake_intensity = SHAKE_INTENSITY
+
 PADDLE_COLOR = (0, 255, 180)
 BG_COLOR = (10, 10, 30)
 
@@ -73,8 +119,11 @@ paddle_skin_names = list(PADDLE_SKINS.keys())
 selected_paddle_skin_index = 0
 
 
+TEXT = TextCache()
+
+
 def draw_text_center(text, font, color, x, y):
-    surf = font.render(text, True, color)
+    surf = TEXT.render(text, font, color)
     rect = surf.get_rect(center=(x, y))
     screen.blit(surf, rect)
     return rect
@@ -96,83 +145,96 @@ def fade_in(duration_ms=300):
             break
 
 
+GLOW_SPRITES = GlowCache()
+
+
 def draw_glow_rect(x, y, w, h, color):
-    # small glow effect
-    for i in range(GLOW, 0, -3):
-        gl = (max(0, color[0] - i * 2), max(0, color[1] - i), max(0, color[2] - i))
-        pygame.draw.rect(screen, gl, (x - i // 2, y - i // 2, w + i, h + i), border_radius=10)
-    pygame.draw.rect(screen, color, (x, y, w, h), border_radius=10)
+    # glow is pre-rendered once per (size, color) and then just blitted
+    surf, (ox, oy) = GLOW_SPRITES.get("rect", (w, h), color, glow_size)
+    return screen.blit(surf, (x - ox, y - oy))
 
 
 def draw_glow_circle(x, y, r, color):
-    for i in range(GLOW, 0, -3):
-        gl = (max(0, color[0] - i * 2), max(0, color[1] - i), max(0, color[2] - i))
-        pygame.draw.circle(screen, gl, (x, y), r + i)
-    pygame.draw.circle(screen, color, (x, y), r)
+    surf, (ox, oy) = GLOW_SPRITES.get("circle", r, color, glow_size)
+    return screen.blit(surf, (x - r - ox, y - r - oy))
 
 
-def draw_paddle(x, y, player=1):
-    """Draw paddle with image or fallback to rectangle"""
+def draw_paddle(x, y, player=1, size=None):
+    """Draw paddle with image or fallback to rectangle, returning the touched rect.
+
+    `size` defaults to the full-size paddle; smaller arenas pass their own.
+    """
+    w, h = size or (PADDLE_W, PADDLE_H)
     if USE_IMAGES:
         if player == 1:
-            # Player 1 uses selected paddle skin
-            if PADDLE_SKINS[paddle_skin_names[selected_paddle_skin_index]] == "ice":
-                screen.blit(ice_paddle_img, (x - PADDLE_OFFSET, y))
-            else:
-                screen.blit(ice_paddle_img, (x - PADDLE_OFFSET, y))  # Default to ice
+            # Player 1 uses selected paddle skin (ice is the only one drawn so far)
+            img = ASSETS.get("ice_platform.png", (w, h))
         else:
-            # Player 2 always uses lava (or opposite skin)
-            screen.blit(lava_paddle_img_flipped if USE_IMAGES else lava_paddle_img,
-                        (x - PADDLE_OFFSET, y))
+            # Player 2 always uses lava, mirrored to face the ball
+            img = ASSETS.get("lava_platform.png", (w, h), flip_x=True)
+        return screen.blit(img, (x - w // 2, y))
     else:
         # Fallback to rectangle with glow
-        draw_glow_rect(x, y, PADDLE_W, PADDLE_H,
-                       (0, 200, 255) if player == 1 else (255, 100, 0))
+        return draw_glow_rect(x, y, w, h, (0, 200, 255) if player == 1 else (255, 100, 0))
+
+
+def paddle_preview(skin_index, size):
+    # baked from the full-size source on first use, then served from memory
+    return ASSETS.get("ice_platform.png" if skin_index == 0 else "lava_platform.png", size)
+
+
+def wait_for_events(timeout_ms=MENU_IDLE_TIMEOUT_MS):
+    """Sleep until input arrives (or the timeout passes), then return all pending events."""
+    first = pygame.event.wait(timeout_ms)
+    events = [] if first.type == pygame.NOEVENT else [first]
+    return events + pygame.event.get()
 
 
 def menu_loop():
     fade_in(250)
+    last_view = None
     while True:
-        screen.fill((18, 18, 28))
         mx, my = pygame.mouse.get_pos()
 
-        draw_text_center("HAND-TRACKING PONG", FONT, (235, 235, 245), WIDTH // 2, 90)
-
         play_rect = pygame.Rect(WIDTH // 2 - 150, 220, 300, 70)
         skins_rect = pygame.Rect(WIDTH // 2 - 150, 320, 300, 70)
         quit_rect = pygame.Rect(WIDTH // 2 - 150, 420, 300, 70)
 
-        # hover
-        pygame.draw.rect(screen, (70, 70, 80) if play_rect.collidepoint(mx, my) else (50, 50, 60), play_rect,
-                         border_radius=14)
-        pygame.draw.rect(screen, (70, 70, 80) if skins_rect.collidepoint(mx, my) else (50, 50, 60), skins_rect,
-                         border_radius=14)
-        pygame.draw.rect(screen, (70, 70, 80) if quit_rect.collidepoint(mx, my) else (50, 50, 60), quit_rect,
-                         border_radius=14)
+        # only repaint and present when the hover state changes
+        view = (play_rect.collidepoint(mx, my), skins_rect.collidepoint(mx, my), quit_rect.collidepoint(mx, my))
+        if view != last_view:
+            last_view = view
+            screen.fill((18, 18, 28))
 
-        draw_text_center("PLAY", FONT, (255, 255, 255), WIDTH // 2, 255)
-        draw_text_center("SKINS", FONT, (255, 255, 255), WIDTH // 2, 355)
-        draw_text_center("QUIT", FONT, (255, 255, 255), WIDTH // 2, 455)
+            draw_text_center("HAND-TRACKING PONG", FONT, (235, 235, 245), WIDTH // 2, 90)
 
-        # preview of current ball skin
-        preview_color = SKINS[skin_names[selected_skin_index]]
-        pygame.draw.circle(screen, preview_color, (WIDTH // 2, 160), 28)
+            # hover
+            pygame.draw.rect(screen, (70, 70, 80) if play_rect.collidepoint(mx, my) else (50, 50, 60), play_rect,
+                             border_radius=14)
+            pygame.draw.rect(screen, (70, 70, 80) if skins_rect.collidepoint(mx, my) else (50, 50, 60), skins_rect,
+                             border_radius=14)
+            pygame.draw.rect(screen, (70, 70, 80) if quit_rect.collidepoint(mx, my) else (50, 50, 60), quit_rect,
+                             border_radius=14)
 
-        # preview of paddle skin
-        if USE_IMAGES:
-            paddle_preview_y = 180
-            if selected_paddle_skin_index == 0:  # Ice
-                preview_img = pygame.transform.scale(ice_paddle_img, (60, 30))
-            else:  # Lava
-                preview_img = pygame.transform.scale(lava_paddle_img, (60, 30))
-            screen.blit(preview_img, (WIDTH // 2 - 30, paddle_preview_y))
+            draw_text_center("PLAY", FONT, (255, 255, 255), WIDTH // 2, 255)
+            draw_text_center("SKINS", FONT, (255, 255, 255), WIDTH // 2, 355)
+            draw_text_center("QUIT", FONT, (255, 255, 255), WIDTH // 2, 455)
 
-        draw_text_center("Ball & Paddle Preview", SMALL, (200, 200, 200), WIDTH // 2, 200)
+            # preview of current ball skin
+            preview_color = SKINS[skin_names[selected_skin_index]]
+            pygame.draw.circle(screen, preview_color, (WIDTH // 2, 160), 28)
 
-        pygame.display.flip()
-        clock.tick(60)
+            # preview of paddle skin
+            if USE_IMAGES:
+                paddle_preview_y = 180
+                preview_img = paddle_preview(selected_paddle_skin_index, (60, 30))
+                screen.blit(preview_img, (WIDTH // 2 - 30, paddle_preview_y))
 
-        for e in pygame.event.get():
+            draw_text_center("Ball & Paddle Preview", SMALL, (200, 200, 200), WIDTH // 2, 200)
+
+            pygame.display.flip()
+
+        for e in wait_for_events():
             if e.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -184,6 +246,8 @@ def menu_loop():
                 if quit_rect.collidepoint(e.pos):
                     pygame.quit()
                     sys.exit()
+            if e.type == pygame.WINDOWEXPOSED:
+                last_view = None  # window was uncovered: repaint
 
 
 def skins_loop():
@@ -191,79 +255,79 @@ def skins_loop():
     fade_in(200)
     current_tab = "ball"  # "ball" or "paddle"
 
+    last_view = None
     while True:
-        screen.fill((16, 18, 28))
-        mx, my = pygame.mouse.get_pos()
+        # only repaint and present when the selection changes
+        view = (current_tab, selected_skin_index, selected_paddle_skin_index)
+        if view != last_view:
+            last_view = view
+            screen.fill((16, 18, 28))
+
+            # Tab selection
+            ball_tab_rect = pygame.Rect(WIDTH // 2 - 200, 50, 150, 40)
+            paddle_tab_rect = pygame.Rect(WIDTH // 2 + 50, 50, 150, 40)
+
+            # Draw tabs
+            pygame.draw.rect(screen, (80, 100, 120) if current_tab == "ball" else (50, 50, 60),
+                             ball_tab_rect, border_radius=8)
+            pygame.draw.rect(screen, (120, 80, 80) if current_tab == "paddle" else (50, 50, 60),
+                             paddle_tab_rect, border_radius=8)
+
+            draw_text_center("BALL SKINS", SMALL, (255, 255, 255), ball_tab_rect.centerx, ball_tab_rect.centery)
+            draw_text_center("PADDLE SKINS", SMALL, (255, 255, 255), paddle_tab_rect.centerx, paddle_tab_rect.centery)
+
+            if current_tab == "ball":
+                draw_text_center("SELECT BALL SKIN", FONT, (235, 235, 245), WIDTH // 2, 120)
+
+                # preview box
+                current_name = skin_names[selected_skin_index]
+                current_color = SKINS[current_name]
+                pygame.draw.rect(screen, (40, 40, 50), (WIDTH // 2 - 140, 160, 280, 180), border_radius=12)
+                draw_glow_circle(WIDTH // 2, 250, 50, current_color)
+                draw_text_center(current_name, SMALL, (220, 220, 220), WIDTH // 2, 320)
 
-        # Tab selection
-        ball_tab_rect = pygame.Rect(WIDTH // 2 - 200, 50, 150, 40)
-        paddle_tab_rect = pygame.Rect(WIDTH // 2 + 50, 50, 150, 40)
+                # arrows
+                left_rect = pygame.Rect(WIDTH // 2 - 240, 230, 50, 50)
+                right_rect = pygame.Rect(WIDTH // 2 + 190, 230, 50, 50)
 
-        # Draw tabs
-        pygame.draw.rect(screen, (80, 100, 120) if current_tab == "ball" else (50, 50, 60),
-                         ball_tab_rect, border_radius=8)
-        pygame.draw.rect(screen, (120, 80, 80) if current_tab == "paddle" else (50, 50, 60),
-                         paddle_tab_rect, border_radius=8)
+            else:  # paddle tab
+                draw_text_center("SELECT PADDLE SKIN", FONT, (235, 235, 245), WIDTH // 2, 120)
 
-        draw_text_center("BALL SKINS", SMALL, (255, 255, 255), ball_tab_rect.centerx, ball_tab_rect.centery)
-        draw_text_center("PADDLE SKINS", SMALL, (255, 255, 255), paddle_tab_rect.centerx, paddle_tab_rect.centery)
+                if USE_IMAGES:
+                    current_name = paddle_skin_names[selected_paddle_skin_index]
+                    pygame.draw.rect(screen, (40, 40, 50), (WIDTH // 2 - 140, 160, 280, 180), border_radius=12)
 
-        if current_tab == "ball":
-            draw_text_center("SELECT BALL SKIN", FONT, (235, 235, 245), WIDTH // 2, 120)
+                    # Show paddle preview
+                    preview_img = paddle_preview(selected_paddle_skin_index, (120, 70))
 
-            # preview box
-            current_name = skin_names[selected_skin_index]
-            current_color = SKINS[current_name]
-            pygame.draw.rect(screen, (40, 40, 50), (WIDTH // 2 - 140, 160, 280, 180), border_radius=12)
-            draw_glow_circle(WIDTH // 2, 250, 50, current_color)
-            draw_text_center(current_name, SMALL, (220, 220, 220), WIDTH // 2, 320)
+                    screen.blit(preview_img, (WIDTH // 2 - 60, 200))
+                    draw_text_center(current_name, SMALL, (220, 220, 220), WIDTH // 2, 320)
 
-            # arrows
-            left_rect = pygame.Rect(WIDTH // 2 - 240, 230, 50, 50)
-            right_rect = pygame.Rect(WIDTH // 2 + 190, 230, 50, 50)
+                    # arrows
+                    left_rect = pygame.Rect(WIDTH // 2 - 240, 230, 50, 50)
+                    right_rect = pygame.Rect(WIDTH // 2 + 190, 230, 50, 50)
+                else:
+                    draw_text_center("Images not available", SMALL, (255, 100, 100), WIDTH // 2, 250)
+                    draw_text_center("Using default rectangles", SMALL, (200, 200, 200), WIDTH // 2, 280)
+                    left_rect = pygame.Rect(0, 0, 0, 0)  # Empty rects
+                    right_rect = pygame.Rect(0, 0, 0, 0)
 
-        else:  # paddle tab
-            draw_text_center("SELECT PADDLE SKIN", FONT, (235, 235, 245), WIDTH // 2, 120)
+            # Draw arrows (only if we have skins to cycle through)
+            if (current_tab == "ball" and len(skin_names) > 1) or \
+                    (current_tab == "paddle" and USE_IMAGES and len(paddle_skin_names) > 1):
+                pygame.draw.rect(screen, (60, 60, 70), left_rect, border_radius=8)
+                pygame.draw.rect(screen, (60, 60, 70), right_rect, border_radius=8)
+                draw_text_center("<", FONT, (255, 255, 255), left_rect.centerx, left_rect.centery)
+                draw_text_center(">", FONT, (255, 255, 255), right_rect.centerx, right_rect.centery)
 
-            if USE_IMAGES:
-                current_name = paddle_skin_names[selected_paddle_skin_index]
-                pygame.draw.rect(screen, (40, 40, 50), (WIDTH // 2 - 140, 160, 280, 180), border_radius=12)
+            # back button
+            back_rect = pygame.Rect(WIDTH // 2 - 80, 420, 160, 50)
+            pygame.draw.rect(screen, (70, 70, 80), back_rect, border_radius=10)
+            draw_text_center("BACK", SMALL, (255, 255, 255), WIDTH // 2, 445)
 
-                # Show paddle preview
-                if selected_paddle_skin_index == 0:  # Ice
-                    preview_img = pygame.transform.scale(ice_paddle_img, (120, 70))
-                else:  # Lava
-                    preview_img = pygame.transform.scale(lava_paddle_img, (120, 70))
+            pygame.display.flip()
 
-                screen.blit(preview_img, (WIDTH // 2 - 60, 200))
-                draw_text_center(current_name, SMALL, (220, 220, 220), WIDTH // 2, 320)
-
-                # arrows
-                left_rect = pygame.Rect(WIDTH // 2 - 240, 230, 50, 50)
-                right_rect = pygame.Rect(WIDTH // 2 + 190, 230, 50, 50)
-            else:
-                draw_text_center("Images not available", SMALL, (255, 100, 100), WIDTH // 2, 250)
-                draw_text_center("Using default rectangles", SMALL, (200, 200, 200), WIDTH // 2, 280)
-                left_rect = pygame.Rect(0, 0, 0, 0)  # Empty rects
-                right_rect = pygame.Rect(0, 0, 0, 0)
-
-        # Draw arrows (only if we have skins to cycle through)
-        if (current_tab == "ball" and len(skin_names) > 1) or \
-                (current_tab == "paddle" and USE_IMAGES and len(paddle_skin_names) > 1):
-            pygame.draw.rect(screen, (60, 60, 70), left_rect, border_radius=8)
-            pygame.draw.rect(screen, (60, 60, 70), right_rect, border_radius=8)
-            draw_text_center("<", FONT, (255, 255, 255), left_rect.centerx, left_rect.centery)
-            draw_text_center(">", FONT, (255, 255, 255), right_rect.centerx, right_rect.centery)
-
-        # back button
-        back_rect = pygame.Rect(WIDTH // 2 - 80, 420, 160, 50)
-        pygame.draw.rect(screen, (70, 70, 80), back_rect, border_radius=10)
-        draw_text_center("BACK", SMALL, (255, 255, 255), WIDTH // 2, 445)
-
-        pygame.display.flip()
-        clock.tick(60)
-
-        for e in pygame.event.get():
+        for e in wait_for_events():
             if e.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit()
@@ -284,158 +348,292 @@ def skins_loop():
                         selected_paddle_skin_index = (selected_paddle_skin_index + 1) % len(paddle_skin_names)
                 elif back_rect.collidepoint(e.pos):
                     return "menu"
+            if e.type == pygame.WINDOWEXPOSED:
+                last_view = None  # window was uncovered: repaint
             if e.type == pygame.KEYDOWN:
                 if e.key == pygame.K_ESCAPE:
                     return "menu"
 
 
-def run_game():
-    cap = cv2.VideoCapture(0)
-    mp_hands = mp.solutions.hands
-    mp_draw = mp.solutions.drawing_utils
-    hands = mp_hands.Hands(min_detection_confidence=0.5,
-                           min_tracking_confidence=0.5,
-                           max_num_hands=2)
+def render_hud(lines):
+    """Render the timing HUD to its own surface (done a few times a second, not every frame)."""
+    rows = [MONO.render(line, True, (220, 230, 255)) for line in lines]
+    surf = pygame.Surface((max(r.get_width() for r in rows) + 12, len(rows) * 17 + 8), pygame.SRCALPHA)
+    surf.fill((0, 0, 0, 170))
+    for i, r in enumerate(rows):
+        surf.blit(r, (6, 4 + i * 17))
+    return surf
 
-    # Adjust paddle positions based on whether we're using images
-    if USE_IMAGES:
-        p1_x = 40 + PADDLE_OFFSET
-        p2_x = WIDTH - 40 - PADDLE_OFFSET
-    else:
-        p1_x = 40
-        p2_x = WIDTH - 40 - PADDLE_W
 
-    p1_y = HEIGHT // 2
-    p2_y = HEIGHT // 2
-    p1_target = p1_y
-    p2_target = p2_y
+def wait_for_session(session):
+    """Usually instant: the session has been loading while the player was in the menus."""
+    while not session.ready.wait(0.05):
+        for e in pygame.event.get():
+            if e.type == pygame.QUIT or (e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE):
+                return False
+        screen.fill(BG_COLOR)
+        draw_text_center("Starting camera...", SMALL, (200, 200, 200), WIDTH // 2, HEIGHT // 2)
+        pygame.display.flip()
+    if not session.ok():
+        print(f"Warning: hand tracking unavailable: {session.error}")
+        return False
+    return True
+
 
-    ball_x = WIDTH // 2
-    ball_y = HEIGHT // 2
-    ball_vx = BALL_SPEED
-    ball_vy = int(BALL_SPEED * 0.6)
+class Arena:
+    """One match laid out in `rect` of the window, scaled to the rect's height.
 
-    s1 = 0
-    s2 = 0
+    With a single arena this is the classic full-window game. `players` are
+    the PlayerTracker ids on the left and right paddles.
+    """
+
+    def __init__(self, rect, players):
+        self.rect = pygame.Rect(rect)
+        self.players = players
+        sx, sy = self.rect.w / WIDTH, self.rect.h / HEIGHT
+        self.paddle_size = (max(1, round(PADDLE_W * sy)), max(1, round(PADDLE_H * sy)))
+        self.ball_r = max(3, round(10 * sy))
+        pw, ph = self.paddle_size
+        margin = round(40 * sx)
+
+        # Adjust paddle positions based on whether we're using images
+        if USE_IMAGES:
+            self.p1_x = margin + pw // 2
+            self.p2_x = self.rect.w - margin - pw // 2
+        else:
+            self.p1_x = margin
+            self.p2_x = self.rect.w - margin - pw
+
+        # x of each paddle's inner face, where the ball bounces
+        left_face = self.p1_x + pw
+        right_face = self.p2_x - (pw if USE_IMAGES else 0)
+        # the filters do the smoothing, so the sim moves paddles straight to their targets
+        self.sim = PongSim(self.rect.w, self.rect.h, left_face, right_face, ph, BALL_SPEED * sx, 0.0,
+                           ball_r=self.ball_r)
+        self.score_shown = None
+        self.score_surf = None
+        if USE_IMAGES:
+            # bake/load the paddle images for this size now rather than on the first frame
+            ASSETS.get("ice_platform.png", self.paddle_size)
+            ASSETS.get("lava_platform.png", self.paddle_size, flip_x=True)
+
+    def target(self, y):
+        """Paddle top for a normalized hand y."""
+        return int(y * self.rect.h - self.paddle_size[1] / 2)
+
+    def aim(self, paddle_filters, t):
+        y1 = paddle_filters[self.players[0]].predict(t)
+        y2 = paddle_filters[self.players[1]].predict(t)
+        if y1 is not None:
+            self.sim.p1_target = int(y1)
+        if y2 is not None:
+            self.sim.p2_target = int(y2)
+
+    def draw(self, renderer, shake_x, shake_y, ball_color):
+        sim = self.sim
+        ox, oy = self.rect.x + shake_x, self.rect.y + shake_y
+
+        # Draw paddles with images
+        renderer.add(draw_paddle(ox + self.p1_x, oy + sim.p1_y, player=1, size=self.paddle_size))
+        renderer.add(draw_paddle(ox + self.p2_x, oy + sim.p2_y, player=2, size=self.paddle_size))
+
+        # Draw ball
+        renderer.add(draw_glow_circle(ox + int(sim.ball_x), oy + int(sim.ball_y), self.ball_r, ball_color))
+
+        # score (only looked up again when it changes)
+        if self.score_shown != (sim.s1, sim.s2):
+            self.score_shown = (sim.s1, sim.s2)
+            self.score_surf = TEXT.render(f"{sim.s1}   -   {sim.s2}", FONT, (230, 230, 255))
+        renderer.add(screen.blit(self.score_surf, (self.rect.centerx - self.score_surf.get_width() // 2,
+                                                   self.rect.y + 18)))
+
+    def meta(self):
+        sim = self.sim
+        return {"rect": list(self.rect), "width": sim.width, "height": sim.height, "left_face": sim.left_face,
+                "right_face": sim.right_face, "paddle_h": sim.paddle_h, "ball_speed": sim.ball_speed,
+                "ball_r": sim.ball_r, "smooth": sim.smooth, "players": list(self.players)}
+
+
+def arena_rects(count):
+    """Full-width arenas stacked top to bottom."""
+    h = HEIGHT // count
+    return [pygame.Rect(0, i * h, WIDTH, h) for i in range(count)]
+
+
+def apply_quality(level, session, preview, renderer):
+    """Push one QUALITY_LEVELS entry to the camera, the inference worker and the effects."""
+    global glow_size, shake_intensity
+    session.capture.set_resolution(level["camera"])
+    session.tracker.set_quality(roi_size=level["roi_size"], detect_scale=level["detect_scale"],
+                                model_complexity=level["model_complexity"], max_rate_hz=level["inference_hz"])
+    preview.enabled = level["preview"] and CAMERA_PREVIEW == "pip"
+    glow_size = level["glow"]
+    shake_intensity = SHAKE_INTENSITY if level["shake"] else 0
+    # the preview may have vanished and every glow changed size
+    renderer.invalidate()
+
+
+def run_game(session):
+    global show_hud, quality_level
+    if not wait_for_session(session):
+        return
+    # already imported by the session thread, so this is just a lookup
+    from preview import CameraPreview
+
+    cap = session.capture
+    tracker = session.tracker
+    # the tracker knows its skeleton, so replays need no inference stack
+    preview = CameraPreview(PREVIEW_SIZE, PREVIEW_HZ, enabled=CAMERA_PREVIEW == "pip",
+                            connections=tracker.connections)
+    session.resume()
+    last_result_id = None
+
+    # players 0/1 share the first arena, 2/3 the second, ...
+    arenas = [Arena(rect, (2 * i, 2 * i + 1)) for i, rect in enumerate(arena_rects(ARENAS))]
+    players = PlayerTracker(2 * len(arenas))
+    params = dict(PADDLE_FILTER_PARAMS)
+    if PADDLE_FILTER == "exponential":
+        params.setdefault("smooth", SMOOTH)
+    paddle_filters = [make_filter(PADDLE_FILTER, **params) for _ in range(players.n_players)]
+    last_time = time.perf_counter()
+
+    # static parts of the frame live on a cached background
+    background = pygame.Surface((WIDTH, HEIGHT)).convert()
+    background.fill(BG_COLOR)
+    for arena in arenas[1:]:
+        pygame.draw.line(background, (60, 60, 90), arena.rect.topleft, arena.rect.topright, 2)
+    inst_surf = TEXT.render("ESC to return to menu", SMALL, (150, 150, 180))
+    background.blit(inst_surf, (WIDTH - inst_surf.get_width() - 10, HEIGHT - 30))
+    renderer = DirtyRenderer(screen, background)
+    hud_surf = None
+    hud_updated = 0.0
+    governor = QualityGovernor(QUALITY_LEVELS, target_fps=60, start=quality_level)
+    apply_quality(governor.current, session, preview, renderer)
+    recorder = None
+    if RECORD_LANDMARKS:
+        from landmark_log import LandmarkRecorder
+        recorder = LandmarkRecorder(RECORD_LANDMARKS, max_hands=players.n_players, meta={
+            "source": "finalGame", "arenas": [a.meta() for a in arenas],
+            "paddle_filter": PADDLE_FILTER, "paddle_filter_params": params})
 
     running = True
+    frame_start = time.perf_counter()
     while running:
+        TIMER.begin_frame()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 running = False
             # allow returning to menu with ESC
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 running = False
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                show_hud = not show_hud
+        TIMER.lap("events")
+
+        # the capture thread reopens a dropped camera by itself; keep the match going meanwhile
+        camera_ok = cap.healthy()
+
+        # read the most recent inference result without waiting on it; its frame is held
+        # so the capture thread cannot refill it while the preview reads it
+        result = tracker.latest(hold=True)
+        new_result = result is not None and result.frame_id != last_result_id
+        TIMER.lap("result")
+        if new_result:
+            last_result_id = result.frame_id
+            preview.update(result.frame, result.multi_hand_landmarks)
+        tracker.release(result)
+        TIMER.lap("preview")
+
+        if new_result and recorder is not None:
+            recorder.append(result.frame_id, result.captured_at, result.done_at,
+                            result.multi_hand_landmarks or ())
+
+        # hand detection: each hand stays with the player it was matched to last time,
+        # and its paddle target is timestamped with when the camera saw it
+        if new_result and result.multi_hand_landmarks:
+            hands = result.multi_hand_landmarks
+            assigned = players.update(result.captured_at, [(h.landmark[9].x, h.landmark[9].y) for h in hands])
+            for player in players.joined:
+                paddle_filters[player].reset()  # a new hand in a freed slot starts from its own position
+            for player, j in assigned.items():
+                target = arenas[player // 2].target(hands[j].landmark[9].y)
+                paddle_filters[player].update(result.captured_at, target)
+
+        # aim the paddles at where the hands will be once this frame is on screen
+        now = time.perf_counter()
+        for arena in arenas:
+            arena.aim(paddle_filters, now + DISPLAY_LATENCY)
+
+        # step the fixed-timestep simulations by however much real time passed
+        hit = sum(arena.sim.advance(now - last_time) for arena in arenas) > 0
+        last_time = now
+        TIMER.lap("physics")
+
+        shake = hit and shake_intensity > 0
+        shake_x = np.random.randint(-shake_intensity, shake_intensity) if shake else 0
+        shake_y = np.random.randint(-shake_intensity, shake_intensity) if shake else 0
+
+        # redraw only what moved; shake moves everything so it gets a full flip
+        renderer.begin(full=shake)
 
-        # read camera frame
-        ret, frame = cap.read()
-        if not ret:
-            # camera failed: break and go back to menu
-            break
-
-        frame = cv2.flip(frame, 1)
-        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = hands.process(rgb)
-
-        # hand detection: map to paddle targets
-        if results.multi_hand_landmarks:
-            detected = []
-            for h in results.multi_hand_landmarks:
-                detected.append((h.landmark[9].x, h))
-            detected.sort(key=lambda x: x[0])  # leftmost first
-
-            if len(detected) >= 1:
-                _, h1 = detected[0]
-                p1_target = int(h1.landmark[9].y * HEIGHT - PADDLE_H / 2)
-                mp_draw.draw_landmarks(frame, h1, mp_hands.HAND_CONNECTIONS)
-            if len(detected) >= 2:
-                _, h2 = detected[1]
-                p2_target = int(h2.landmark[9].y * HEIGHT - PADDLE_H / 2)
-                mp_draw.draw_landmarks(frame, h2, mp_hands.HAND_CONNECTIONS)
-
-        # smooth movement
-        p1_y = int(p1_y * SMOOTH + p1_target * (1 - SMOOTH))
-        p2_y = int(p2_y * SMOOTH + p2_target * (1 - SMOOTH))
-        p1_y = max(0, min(HEIGHT - PADDLE_H, p1_y))
-        p2_y = max(0, min(HEIGHT - PADDLE_H, p2_y))
-
-        # move ball
-        ball_x += ball_vx
-        ball_y += ball_vy
-
-        # wall bounce
-        if ball_y <= 0 or ball_y >= HEIGHT:
-            ball_vy *= -1
-
-        # collisions - adjust collision detection for image paddles
-        hit = False
-        # Player 1 collision (left paddle)
-        if ball_x - 10 <= p1_x + (PADDLE_W if USE_IMAGES else PADDLE_W) and \
-                p1_y <= ball_y <= p1_y + PADDLE_H:
-            # Adjust collision point based on image width
-            collision_margin = PADDLE_W if USE_IMAGES else PADDLE_W
-            if ball_x - 10 <= p1_x + collision_margin:
-                ball_vx = abs(ball_vx) + 0.6
-                ball_vy += (ball_y - (p1_y + PADDLE_H / 2)) / 15
-                hit = True
-
-        # Player 2 collision (right paddle)
-        if ball_x + 10 >= p2_x - (PADDLE_W if USE_IMAGES else 0) and \
-                p2_y <= ball_y <= p2_y + PADDLE_H:
-            # Adjust collision point for image position
-            collision_point = p2_x - (PADDLE_W if USE_IMAGES else 0)
-            if ball_x + 10 >= collision_point:
-                ball_vx = -abs(ball_vx) - 0.6
-                ball_vy += (ball_y - (p2_y + PADDLE_H / 2)) / 15
-                hit = True
-
-        shake_x = np.random.randint(-SHAKE_INTENSITY, SHAKE_INTENSITY) if hit else 0
-        shake_y = np.random.randint(-SHAKE_INTENSITY, SHAKE_INTENSITY) if hit else 0
-
-        # scoring
-        if ball_x < 0:
-            s2 += 1
-            ball_x, ball_y = WIDTH // 2, HEIGHT // 2
-            ball_vx = -ball_vx if ball_vx < 0 else BALL_SPEED
-        if ball_x > WIDTH:
-            s1 += 1
-            ball_x, ball_y = WIDTH // 2, HEIGHT // 2
-            ball_vx = -ball_vx if ball_vx > 0 else -BALL_SPEED
-
-        screen.fill(BG_COLOR)
-
-        # Draw paddles with images
-        draw_paddle(p1_x + shake_x, p1_y + shake_y, player=1)
-        draw_paddle(p2_x + shake_x, p2_y + shake_y, player=2)
-
-        # Draw ball
         ball_color = SKINS[skin_names[selected_skin_index]]
-        draw_glow_circle(int(ball_x) + shake_x, int(ball_y) + shake_y, 10, ball_color)
-
-        # score
-        score_surf = FONT.render(f"{s1}   -   {s2}", True, (230, 230, 255))
-        screen.blit(score_surf, (WIDTH // 2 - score_surf.get_width() // 2, 18))
-
-        # Instructions
-        inst_surf = SMALL.render("ESC to return to menu", True, (150, 150, 180))
-        screen.blit(inst_surf, (WIDTH - inst_surf.get_width() - 10, HEIGHT - 30))
-
-        pygame.display.flip()
+        for arena in arenas:
+            arena.draw(renderer, shake_x, shake_y, ball_color)
+
+        renderer.add(preview.draw(screen, (10, HEIGHT - PREVIEW_SIZE[1] - 10)))
+
+        if not camera_ok:
+            renderer.add(draw_text_center("Camera lost - reconnecting...", SMALL, (255, 100, 100),
+                                          WIDTH // 2, HEIGHT - 60))
+
+        if show_hud:
+            if hud_surf is None or now - hud_updated > HUD_REFRESH:
+                hud_updated = now
+                stats = tracker.stats()
+                hud_surf = render_hud(TIMER.hud_lines() + [
+                    f"fps {clock.get_fps():5.1f}  inference {stats['inference_hz']:5.1f} Hz",
+                    f"players {len(players.active())}/{players.n_players}",
+                    governor.status(),
+                ])
+            renderer.add(screen.blit(hud_surf, (10, 60)))
+        TIMER.lap("draw")
+
+        renderer.present()
+        TIMER.lap("present")
+        busy = time.perf_counter() - frame_start
         clock.tick(60)
+        TIMER.lap("idle")
+        TIMER.end_frame()
+        frame_end = time.perf_counter()
+        if ADAPTIVE_QUALITY and governor.observe(frame_end - frame_start, busy, frame_end):
+            apply_quality(governor.current, session, preview, renderer)
+            hud_surf = None
+        frame_start = frame_end
+
+    session.pause()
+    quality_level = governor.level
+    if recorder is not None:
+        recorder.close()
+    if PROFILE_EXPORT:
+        TIMER.export(PROFILE_EXPORT)
 
-        cv2.imshow("Camera Feed (With Landmarks) - press ESC to return", frame)
-        if cv2.waitKey(1) & 0xFF == 27:
-            # user pressed ESC in the camera window
-            break
+    return
 
-    cap.release()
-    hands.close()
-    cv2.destroyAllWindows()
 
-    return
+def start_tracking(source=0):
+    # one inference pass finds every player's hand
+    return TrackingSession(TIMELINE, camera_index=source, max_num_hands=2 * ARENAS, roi_tracking=ROI_TRACKING,
+                           timer=TIMER).start()
 
 
 def main():
+    # one session for the whole run: camera + model load in the background while the
+    # menu is up, then just pause/resume between matches
+    session = start_tracking()
+    # the window's first frame (fade_in's starting colour), marked once for the startup timeline
+    screen.fill((20, 20, 30))
+    pygame.display.flip()
+    TIMELINE.mark("window-up")
     state = "menu"
     while True:
         if state == "menu":
@@ -445,7 +643,11 @@ def main():
             next_state = skins_loop()
             state = next_state
         elif state == "play" or state == "game":
-            run_game()
+            if session.failed():
+                # no camera at startup: try again from scratch
+                session.close()
+                session = start_tracking()
+            run_game(session)
             # after game ends, always return to menu
             state = "menu"
         else:
@@ -0,0 +1,275 @@
+import argparse
+import operator
+import re
+import time
+
+import numpy as np
+
+# per-hand features a condition can read (see features.HandFeatures)
+FEATURES = ("present", "full", "center_y", "wrist_x", "palm_up", "dy", "dx", "vy", "vx")
+HANDS = {"left": 0, "right": 1}
+# below this many gestures a plain-Python pass, which stops at each gesture's first failing
+# condition, beats the batched one's ~4 us of fixed NumPy overhead (crossover ~16; see `benchmark`)
+BATCH_FROM = 16
+
+_OPS = {"<": operator.lt, ">": operator.gt, "<=": operator.le, ">=": operator.ge}
+
+_CONDITION = re.compile(r"^\s*(abs\()?\s*(\w+)\.(\w+)\s*(\))?\s*(?:(<=|>=|<|>)\s*(\S+))?\s*$")
+
+
+class Gesture:
+    """A gesture declared as a sequence of phases.
+
+    Each phase is a list of conditions that must all hold on one frame to
+    move to the next phase; the gesture is detected when the last phase
+    holds, at most once per `cooldown` seconds. A condition is a string
+    over one hand's feature, e.g. "dy.left < -0.02", "abs(dx.right) > 0.03",
+    or a bare "palm_up.left" for a flag. `require` conditions are added to
+    every phase. With `wait_for_cooldown` a completed sequence inside the
+    cooldown stays on its last phase until the cooldown has passed;
+    otherwise it starts over.
+    """
+
+    def __init__(self, name, phases, cooldown=0.0, require=(), wait_for_cooldown=False):
+        if not phases:
+            raise ValueError(f"gesture {name!r} has no phases")
+        self.name = name
+        self.phases = [list(require) + list(phase) for phase in phases]
+        if not all(self.phases):
+            raise ValueError(f"gesture {name!r} has a phase without conditions")
+        self.cooldown = cooldown
+        self.wait_for_cooldown = wait_for_cooldown
+
+
+def parse_condition(text, n_hands=2):
+    """"abs(dx.left) > 0.03" -> ("dx", 0, True, ">", 0.03)."""
+    m = _CONDITION.match(text)
+    if m is None or bool(m.group(1)) != bool(m.group(4)):
+        raise ValueError(f"bad gesture condition {text!r}")
+    _, feature, hand, _, op, value = m.groups()
+    if feature not in FEATURES:
+        raise ValueError(f"unknown feature {feature!r} in {text!r}; expected one of {FEATURES}")
+    index = HANDS[hand] if hand in HANDS else int(hand) if hand.isdigit() else None
+    if index is None or index >= n_hands:
+        raise ValueError(f"unknown hand {hand!r} in {text!r}")
+    if op is None:
+        op, value = ">", 0.5  # a bare flag
+    return feature, index, m.group(1) is not None, op, float(value)
+
+
+class GestureEngine:
+    """Evaluate every declared gesture against one frame of features.
+
+    All conditions of all phases are compiled into flat arrays (feature
+    column, sign, threshold) and checked together with a few NumPy calls
+    per frame, AND-reduced per phase with `np.logical_and.reduceat`. That
+    costs a fixed few microseconds plus a small per-condition term, so it
+    grows far slower than checking gestures one by one, but a handful of
+    gestures are still cheaper in plain Python, stopping at each one's
+    first failing condition; below `batch_from` that direct path is used.
+    Either way the gestures whose current phase held go through the same
+    `_advance`.
+
+    Features come in as one vector per frame (`pack` for a live
+    HandFeatures, `pack_log` for a whole `features.log_features` result),
+    holding only the (feature, hand, abs) columns some condition reads.
+    """
+
+    def __init__(self, gestures, n_hands=2, batch_from=BATCH_FROM):
+        self.gestures = list(gestures)
+        self.names = [g.name for g in self.gestures]
+        self.n_hands = n_hands
+        self.batched = len(self.gestures) >= batch_from
+        # the direct path's conditions: per gesture, per phase, (column, operator, value)
+        self._direct = []
+        columns = {}
+        cond_col, cond_sign, cond_thr = [], [], []
+        phase_start, offsets = [], []
+        for g in self.gestures:
+            offsets.append(len(phase_start))
+            self._direct.append([])
+            for phase in g.phases:
+                phase_start.append(len(cond_col))
+                self._direct[-1].append([])
+                for text in phase:
+                    feature, hand, use_abs, op, value = parse_condition(text, n_hands)
+                    cond_col.append(columns.setdefault((feature, hand, use_abs), len(columns)))
+                    self._direct[-1][-1].append((cond_col[-1], _OPS[op], value))
+                    # x < t  <=>  -x > -t, and x > t  <=>  x >= t + 1 ulp: every comparison is one ">="
+                    if op in (">", "<"):
+                        value = np.nextafter(value, np.inf if op == ">" else -np.inf)
+                    sign = 1.0 if op in (">", ">=") else -1.0
+                    cond_sign.append(sign)
+                    cond_thr.append(sign * value)
+        self.columns = list(columns)
+        self._features = sorted({f for f, _, _ in self.columns}, key=FEATURES.index)
+        self._cond_col = np.asarray(cond_col, np.intp)
+        self._cond_sign = np.asarray(cond_sign)
+        self._cond_thr = np.asarray(cond_thr)
+        self._phase_start = np.asarray(phase_start, np.intp)
+        self._offset = offsets
+        self._last_phase = [len(g.phases) - 1 for g in self.gestures]
+        # per-frame scratch for the batched path
+        self._hold = np.empty(len(cond_col), bool)
+        self.reset()
+
+    def reset(self):
+        self.phase = [0] * len(self.gestures)
+        self._last = [-np.inf] * len(self.gestures)
+        # each gesture's current phase as an index into the flat phase arrays
+        self._cursor = np.asarray(self._offset, np.intp)
+        self.counts = dict.fromkeys(self.names, 0)
+
+    def pack(self, features):
+        """One frame's feature vector (a list) from a features.HandFeatures."""
+        rows = {feature: getattr(features, feature) for feature in self._features}
+        return [abs(rows[feature][hand]) if use_abs else rows[feature][hand]
+                for feature, hand, use_abs in self.columns]
+
+    def pack_log(self, features):
+        """(n_frames, columns) feature vectors from a features.log_features dict."""
+        vectors = np.stack([np.asarray(features[f][:, h], np.float64) for f, h, _ in self.columns], axis=1)
+        used_abs = [use_abs for _, _, use_abs in self.columns]
+        vectors[:, used_abs] = np.abs(vectors[:, used_abs])
+        return vectors
+
+    def step(self, vector, now):
+        """Advance every gesture by one frame; returns the names detected on it."""
+        if not self.batched:
+            return self._step_direct(vector.tolist() if isinstance(vector, np.ndarray) else vector, now)
+        x = np.asarray(vector)[self._cond_col]
+        x *= self._cond_sign
+        hold = np.greater_equal(x, self._cond_thr, out=self._hold)
+        fired = np.logical_and.reduceat(hold, self._phase_start)[self._cursor].nonzero()[0]
+        return self._advance(fired.tolist(), now) if len(fired) else ()
+
+    def _step_direct(self, values, now):
+        fired = []
+        phase = self.phase
+        for i, phases in enumerate(self._direct):
+            for column, op, value in phases[phase[i]]:
+                if not op(values[column], value):
+                    break
+            else:
+                fired.append(i)
+        return self._advance(fired, now) if fired else ()
+
+    def _advance(self, fired, now):
+        """Move on each gesture whose current phase held: next phase, or detection and cooldown."""
+        found = []
+        phase, last = self.phase, self._last
+        for i in fired:
+            gesture = self.gestures[i]
+            if phase[i] < self._last_phase[i]:
+                phase[i] += 1
+            elif now - last[i] > gesture.cooldown:
+                found.append(gesture.name)
+                self.counts[gesture.name] += 1
+                last[i] = now
+                phase[i] = 0
+            elif not gesture.wait_for_cooldown:
+                phase[i] = 0
+            self._cursor[i] = self._offset[i] + phase[i]
+        return found
+
+
+class _ReferenceEngine:
+    """The same semantics, one gesture and one condition at a time: the benchmark's baseline."""
+
+    def __init__(self, gestures, n_hands=2):
+        self.gestures = gestures
+        self.columns = GestureEngine(gestures, n_hands).columns
+        self._parsed = [[[parse_condition(c, n_hands) for c in phase] for phase in g.phases] for g in gestures]
+        self.phase = [0] * len(gestures)
+        self._last = [-float("inf")] * len(gestures)
+
+    def step(self, vector, now):
+        values = dict(zip(self.columns, vector.tolist()))
+        found = []
+        for i, g in enumerate(self.gestures):
+            ok = True
+            for feature, hand, use_abs, op, value in self._parsed[i][self.phase[i]]:
+                x = values[feature, hand, use_abs]  # pack / pack_log already took the abs
+                if not {"<": x < value, ">": x > value, "<=": x <= value, ">=": x >= value}[op]:
+                    ok = False
+                    break
+            if not ok:
+                continue
+            if self.phase[i] < len(g.phases) - 1:
+                self.phase[i] += 1
+                continue
+            if now - self._last[i] > g.cooldown:
+                found.append(g.name)
+                self._last[i] = now
+                self.phase[i] = 0
+            elif not g.wait_for_cooldown:
+                self.phase[i] = 0
+        return found
+
+
+def random_gestures(count, seed=0):
+    """`count` plausible two- and three-phase gestures over the movement features."""
+    rng = np.random.default_rng(seed)
+    gestures = []
+    for k in range(count):
+        phases = []
+        for _ in range(rng.integers(2, 4)):
+            conds = []
+            for _ in range(rng.integers(1, 4)):
+                feature = rng.choice(["dy", "dx", "vy", "vx", "center_y"])
+                hand = rng.choice(["left", "right"])
+                op = rng.choice(["<", ">"])
+                scale = {"dy": 0.03, "dx": 0.03, "vy": 0.3, "vx": 0.3, "center_y": 0.2}[feature]
+                value = rng.uniform(-scale, scale) + (0.5 if feature == "center_y" else 0.0)
+                text = f"{feature}.{hand} {op} {value:.4f}"
+                conds.append(f"abs({text.split()[0]}) {op} {abs(value):.4f}" if rng.random() < 0.2 else text)
+            phases.append(conds)
+        gestures.append(Gesture(f"g{k}", phases, cooldown=float(rng.uniform(0.2, 0.6)),
+                                require=["full.left", "full.right"], wait_for_cooldown=bool(rng.random() < 0.5)))
+    return gestures
+
+
+def benchmark(frames=3000, counts=(2, 4, 8, 16, 32, 64, 128, 256)):
+    """Per-frame step cost against gesture count: direct and batched engine vs. one-at-a-time reference."""
+    from features import HandFeatures, _best_of, _synthetic_frames
+
+    t, arrays, masks, _ = _synthetic_frames(frames)
+    feat = HandFeatures()
+    stacked = {name: np.zeros((frames, 2)) for name in FEATURES}
+    for i in range(frames):
+        feat.from_arrays(t[i], arrays[i], masks[i])
+        for name in FEATURES:
+            stacked[name][i] = getattr(feat, name)
+    now = t.tolist()
+
+    def run(make, vectors):
+        found = []
+
+        def once():
+            engine = make()
+            found[:] = [engine.step(vectors[i], now[i]) for i in range(frames)]
+
+        us = _best_of(once) / frames * 1e6
+        return [list(f) for f in found], us
+
+    print(f"{'gestures':>8}{'conditions':>12}{'direct us':>11}{'batched us':>12}{'reference us':>14}"
+          f"{'detections':>12}  default")
+    for count in counts:
+        gestures = random_gestures(count)
+        vectors = GestureEngine(gestures).pack_log(stacked)
+        rows = list(vectors)
+        expected, reference_us = run(lambda: _ReferenceEngine(gestures), vectors)
+        found_direct, direct_us = run(lambda: GestureEngine(gestures, batch_from=count + 1), vectors.tolist())
+        found_batched, batched_us = run(lambda: GestureEngine(gestures, batch_from=0), rows)
+        assert found_direct == expected and found_batched == expected, "engine and reference disagree"
+        engine = GestureEngine(gestures)
+        default = "batched" if engine.batched else "direct"
+        print(f"{count:8d}{len(engine._cond_col):12d}{direct_us:11.1f}{batched_us:12.1f}{reference_us:14.1f}"
+              f"{sum(map(len, expected)):12d}  {default}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gesture engine cost against the number of declared gestures")
+    parser.add_argument("--frames", type=int, default=3000)
+    args = parser.parse_args()
+    benchmark(args.frames)
@@ -0,0 +1,301 @@
+import threading
+import time
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from preprocess import FramePreprocessor, crop_roi, mirror_landmarks
+
+
+class HandResult:
+    """One published inference result.
+
+    `captured_at` is when the camera frame arrived, `done_at` when inference
+    finished; both come from time.perf_counter(). `frame` is the raw,
+    unmirrored camera image (a pooled buffer owned by CameraCapture, held
+    while this is the published result), while the landmarks are already
+    mirrored to the player's view.
+    """
+
+    __slots__ = ("frame_id", "captured_at", "done_at", "frame", "multi_hand_landmarks")
+
+    def __init__(self, frame_id, captured_at, done_at, frame, multi_hand_landmarks):
+        self.frame_id = frame_id
+        self.captured_at = captured_at
+        self.done_at = done_at
+        self.frame = frame
+        self.multi_hand_landmarks = multi_hand_landmarks
+
+    def age(self, now=None):
+        """Seconds since the underlying camera frame was captured."""
+        return (now if now is not None else time.perf_counter()) - self.captured_at
+
+
+def hand_bbox(hand_landmarks):
+    """Normalized (x0, y0, x1, y1) bounding box of a hand's landmarks."""
+    xs = [lm.x for lm in hand_landmarks.landmark]
+    ys = [lm.y for lm in hand_landmarks.landmark]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def remap_landmarks(hand_landmarks, window, frame_w, frame_h):
+    """Convert landmarks from crop-normalized to full-frame-normalized coords in place."""
+    x0, y0, cw, ch = window
+    for lm in hand_landmarks.landmark:
+        lm.x = (x0 + lm.x * cw) / frame_w
+        lm.y = (y0 + lm.y * ch) / frame_h
+    return hand_landmarks
+
+
+class HandInferenceWorker:
+    """Run MediaPipe Hands on the newest captured frame in a background thread.
+
+    The render loop calls `latest()` to read the most recent result without
+    waiting; inference runs as fast as the CPU allows, independent of FPS.
+
+    With `roi_tracking` enabled, each known hand is tracked on a small crop
+    around its last position. A full-frame detect only runs when a tracked
+    hand is lost, or every `redetect_interval` frames while fewer than
+    `max_num_hands` hands are known (to pick up a second player).
+
+    `set_quality()` trades accuracy for speed at runtime: ROI crop size,
+    a downscale for full-frame detection, the model complexity and a cap
+    on the inference rate. Changes are applied by the worker thread
+    before its next frame.
+    """
+
+    QUALITY_SETTINGS = ("roi_size", "detect_scale", "model_complexity", "max_rate_hz")
+
+    def __init__(self, capture, max_num_hands=2,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5,
+                 roi_tracking=False, roi_size=192, roi_margin=0.35, redetect_interval=15,
+                 model_complexity=1, detect_scale=1.0, max_rate_hz=None, timer=None):
+        self.capture = capture
+        self.timer = timer  # optional profiling.StageTimer
+        self.max_num_hands = max_num_hands
+        self.min_detection_confidence = min_detection_confidence
+        self.min_tracking_confidence = min_tracking_confidence
+        self.roi_tracking = roi_tracking
+        self.roi_size = roi_size
+        self.roi_margin = roi_margin
+        self.redetect_interval = redetect_interval
+        self.model_complexity = model_complexity
+        self.detect_scale = detect_scale
+        self.max_rate_hz = max_rate_hz
+        self.connections = mp.solutions.hands.HAND_CONNECTIONS  # for drawing the landmarks
+        self._pending = {}
+        self._detect_buf = None
+        self._rois = []
+        self._since_detect = 0
+
+        self._result = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._running = False
+        self._active = threading.Event()
+        self.ready = threading.Event()  # set once the MediaPipe graphs are built
+
+        self.inferences = 0
+        self.inference_time = 0.0  # rolling average seconds per hands.process
+        self.inference_interval = 0.0  # rolling average seconds between results
+        self._last_done = 0.0
+        self.full_detects = 0
+        self.pixels_per_frame = 0.0  # rolling average pixels fed to the model
+
+    def start(self, active=True):
+        """Start the worker thread; with active=False it only loads the model and waits."""
+        if self._running:
+            return self
+        self._running = True
+        if active:
+            self._active.set()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        self._active.set()  # wake the thread if it is paused
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def pause(self):
+        """Stop inferring and drop the last result, so its pooled frame is not held while paused."""
+        self._active.clear()
+        with self._lock:
+            previous, self._result = self._result, None
+        if previous is not None:
+            self.capture.release(previous.frame)
+
+    def resume(self):
+        self._active.set()
+
+    def set_quality(self, **settings):
+        """Queue new values for any of QUALITY_SETTINGS; unchanged ones are ignored."""
+        unknown = set(settings) - set(self.QUALITY_SETTINGS)
+        if unknown:
+            raise TypeError(f"unknown quality settings: {sorted(unknown)}")
+        with self._lock:
+            self._pending.update((k, v) for k, v in settings.items() if getattr(self, k) != v)
+
+    def _make_hands(self, max_num_hands):
+        return mp.solutions.hands.Hands(min_detection_confidence=self.min_detection_confidence,
+                                        min_tracking_confidence=self.min_tracking_confidence,
+                                        model_complexity=self.model_complexity,
+                                        max_num_hands=max_num_hands)
+
+    def _make_graphs(self):
+        hands = self._make_hands(self.max_num_hands)
+        # one single-hand graph per tracked slot so each keeps its own tracking state
+        slot_hands = [self._make_hands(1) for _ in range(self.max_num_hands)] if self.roi_tracking else []
+        self._crop_bufs = [np.empty((self.roi_size, self.roi_size, 3), np.uint8) for _ in slot_hands]
+        return hands, slot_hands
+
+    def _reconfigure(self, hands, slot_hands):
+        with self._lock:
+            changes, self._pending = self._pending, {}
+        for key, value in changes.items():
+            setattr(self, key, value)
+        if "model_complexity" in changes:
+            hands.close()
+            for h in slot_hands:
+                h.close()
+            self._rois = []
+            return self._make_graphs()
+        if "roi_size" in changes:
+            self._crop_bufs = [np.empty((self.roi_size, self.roi_size, 3), np.uint8) for _ in slot_hands]
+        return hands, slot_hands
+
+    def _detect_input(self, rgb):
+        """The frame full-frame detection sees, shrunk by detect_scale into a reused buffer."""
+        if self.detect_scale >= 1.0:
+            return rgb
+        h, w = rgb.shape[:2]
+        size = (max(1, int(w * self.detect_scale)), max(1, int(h * self.detect_scale)))
+        if self._detect_buf is None or self._detect_buf.shape[:2] != (size[1], size[0]):
+            self._detect_buf = np.empty((size[1], size[0], 3), np.uint8)
+        return cv2.resize(rgb, size, dst=self._detect_buf, interpolation=cv2.INTER_LINEAR)
+
+    def _run(self):
+        # the graphs are created and used on this thread only
+        hands, slot_hands = self._make_graphs()
+        pre = FramePreprocessor()
+        self.ready.set()
+        try:
+            while self._running:
+                if not self._active.wait(0.1):
+                    continue
+                if self._pending:
+                    hands, slot_hands = self._reconfigure(hands, slot_hands)
+                # held until a newer result replaces this one, so readers never see it refilled
+                latest = self.capture.latest(hold=True)
+                if latest is None:
+                    time.sleep(0.002)
+                    continue
+                frame_id, captured_at, frame = latest
+
+                start = time.perf_counter()
+                # no pixel flip: the model sees the raw image and only landmark x is mirrored
+                _, rgb = pre.process(frame)
+                t_pre = time.perf_counter()
+                if self.roi_tracking:
+                    landmarks, pixels = self._process_roi(rgb, hands, slot_hands)
+                else:
+                    detect = self._detect_input(rgb)
+                    landmarks = hands.process(detect).multi_hand_landmarks
+                    pixels = detect.shape[0] * detect.shape[1]
+                for hand in landmarks or ():
+                    mirror_landmarks(hand)
+                done = time.perf_counter()
+                if self.timer is not None:
+                    self.timer.add("preprocess", t_pre - start)
+                    self.timer.add("hands.process", done - t_pre)
+
+                result = HandResult(frame_id, captured_at, done, frame, landmarks)
+                with self._lock:
+                    if self._active.is_set():
+                        previous, self._result = self._result, result
+                    else:  # paused mid-frame: drop it like pause() dropped the last one
+                        previous = result
+                if previous is not None:
+                    self.capture.release(previous.frame)
+                self._update_rates(start, done, pixels)
+                if self.max_rate_hz:
+                    spare = start + 1.0 / self.max_rate_hz - time.perf_counter()
+                    if spare > 0:
+                        time.sleep(spare)
+        finally:
+            hands.close()
+            for h in slot_hands:
+                h.close()
+
+    def _process_roi(self, rgb, hands, slot_hands):
+        h, w = rgb.shape[:2]
+        self._since_detect += 1
+        need_detect = not self._rois or \
+            (len(self._rois) < self.max_num_hands and self._since_detect >= self.redetect_interval)
+
+        tracked = []
+        pixels = 0
+        if not need_detect:
+            for box, slot, buf in zip(self._rois, slot_hands, self._crop_bufs):
+                crop, window = crop_roi(rgb, box, self.roi_margin, self.roi_size, out=buf)
+                pixels += crop.shape[0] * crop.shape[1]
+                found = slot.process(crop).multi_hand_landmarks
+                if not found:
+                    # hand lost: fall back to a full-frame detect on this frame
+                    need_detect = True
+                    break
+                tracked.append(remap_landmarks(found[0], window, w, h))
+
+        if need_detect:
+            self.full_detects += 1
+            self._since_detect = 0
+            detect = self._detect_input(rgb)
+            tracked = hands.process(detect).multi_hand_landmarks or []
+            pixels += detect.shape[0] * detect.shape[1]
+
+        self._rois = [hand_bbox(t) for t in tracked]
+        return (tracked or None), pixels
+
+    def _update_rates(self, start, done, pixels):
+        cost = done - start
+        self.inference_time = cost if not self.inference_time else \
+            self.inference_time * 0.9 + cost * 0.1
+        if self._last_done:
+            dt = done - self._last_done
+            self.inference_interval = dt if not self.inference_interval else \
+                self.inference_interval * 0.9 + dt * 0.1
+        self._last_done = done
+        self.inferences += 1
+        self.pixels_per_frame = pixels if not self.pixels_per_frame else \
+            self.pixels_per_frame * 0.9 + pixels * 0.1
+
+    def latest(self, hold=False):
+        """Return the newest HandResult (or None) without waiting.
+
+        With `hold`, its frame stays intact until `release(result)`, even
+        if newer results are published meanwhile.
+        """
+        with self._lock:
+            result = self._result
+            if hold and result is not None:
+                self.capture.hold(result.frame)
+        return result
+
+    def release(self, result):
+        if result is not None:
+            self.capture.release(result.frame)
+
+    def stats(self):
+        result = self.latest()
+        return {
+            "inferences": self.inferences,
+            "inference_ms": self.inference_time * 1000.0,
+            "inference_hz": 1.0 / self.inference_interval if self.inference_interval else 0.0,
+            "result_age_ms": result.age() * 1000.0 if result is not None else None,
+            "full_detects": self.full_detects,
+            "pixels_per_frame": self.pixels_per_frame,
+        }
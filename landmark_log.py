@@ -0,0 +1,424 @@
+import argparse
+import json
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+MAGIC = b"LMRK"
+VERSION = 1
+HEADER_ALIGN = 64
+HAND_POINTS = 21
+POSE_POINTS = 33
+# the 21-point hand skeleton, the same pairs as mediapipe's hands.HAND_CONNECTIONS
+HAND_CONNECTIONS = frozenset([
+    (0, 1), (1, 2), (2, 3), (3, 4),
+    (0, 5), (5, 6), (6, 7), (7, 8),
+    (5, 9), (9, 10), (10, 11), (11, 12),
+    (9, 13), (13, 14), (14, 15), (15, 16),
+    (13, 17), (0, 17), (17, 18), (18, 19), (19, 20),
+])
+
+
+def frame_dtype(max_hands=2, pose=False):
+    """Fixed-stride record for one inference result.
+
+    `hand_mask` bit i says whether hand slot i holds a hand. The game fills
+    slots in detection order; arm_tracking uses slot 0 = left, 1 = right.
+    """
+    fields = [
+        ("frame_id", "<u4"),
+        ("captured_at", "<f8"),
+        ("done_at", "<f8"),
+        ("hand_mask", "u1"),
+        ("pose_present", "u1"),
+        ("hands", "<f4", (max_hands, HAND_POINTS, 3)),
+    ]
+    if pose:
+        fields.append(("pose", "<f4", (POSE_POINTS, 4)))
+    return np.dtype(fields)
+
+
+class Landmark:
+    __slots__ = ("x", "y", "z", "visibility")
+
+    def __init__(self, x, y, z=0.0, visibility=1.0):
+        self.x, self.y, self.z, self.visibility = x, y, z, visibility
+
+
+class LandmarkList:
+    """Enough of MediaPipe's NormalizedLandmarkList for the game and gesture code."""
+
+    __slots__ = ("landmark",)
+
+    def __init__(self, points):
+        self.landmark = [Landmark(*p) for p in points]
+
+
+def _read_header(f):
+    head = f.read(10)
+    if len(head) < 10 or head[:4] != MAGIC:
+        raise ValueError("not a landmark log")
+    version, header_len = struct.unpack("<HI", head[4:])
+    if version != VERSION:
+        raise ValueError(f"unsupported landmark log version {version}")
+    info = json.loads(f.read(header_len - 10).decode().rstrip())
+    return header_len, info
+
+
+def _header_bytes(info):
+    body = json.dumps(info).encode()
+    header_len = -(-(10 + len(body)) // HEADER_ALIGN) * HEADER_ALIGN
+    return MAGIC + struct.pack("<HI", VERSION, header_len) + body.ljust(header_len - 10)
+
+
+class LandmarkRecorder:
+    """Append inference results to a fixed-stride binary log.
+
+    The file is a small JSON header followed by raw `frame_dtype` records,
+    so a reader can memory-map it as one NumPy array. Opening an existing
+    log with the same layout appends to it (after dropping a partial record
+    left by a crash); a different layout raises ValueError.
+    """
+
+    def __init__(self, path, max_hands=2, pose=False, meta=None):
+        self.path = path
+        self.dtype = frame_dtype(max_hands, pose)
+        self.max_hands = max_hands
+        self.pose = pose
+        info = {"max_hands": max_hands, "pose": pose, "meta": meta or {}}
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, "r+b") as f:
+                header_len, existing = _read_header(f)
+                if (existing["max_hands"], existing["pose"]) != (max_hands, pose):
+                    raise ValueError(f"{path} was recorded with a different layout")
+                whole = (os.path.getsize(path) - header_len) // self.dtype.itemsize
+                f.truncate(header_len + whole * self.dtype.itemsize)
+        else:
+            with open(path, "wb") as f:
+                f.write(_header_bytes(info))
+
+        self._f = open(path, "ab")
+        self._rec = np.zeros((), self.dtype)
+        self.written = 0
+
+    def append(self, frame_id, captured_at, done_at, hands=(), pose=None):
+        """Write one frame. `hands` is a sequence of landmark lists; None leaves a slot empty."""
+        rec = self._rec
+        rec["frame_id"] = frame_id
+        rec["captured_at"] = captured_at
+        rec["done_at"] = done_at
+        mask = 0
+        for i in range(self.max_hands):
+            hand = hands[i] if i < len(hands) else None
+            if hand is None:
+                rec["hands"][i] = 0.0
+                continue
+            mask |= 1 << i
+            rec["hands"][i] = [(lm.x, lm.y, lm.z) for lm in hand.landmark]
+        rec["hand_mask"] = mask
+        rec["pose_present"] = pose is not None
+        if self.pose:
+            if pose is None:
+                rec["pose"] = 0.0
+            else:
+                rec["pose"] = [(lm.x, lm.y, lm.z, lm.visibility) for lm in pose.landmark]
+        self._f.write(rec.tobytes())
+        self.written += 1
+
+    def append_arrays(self, frame_id, captured_at, done_at, hands, hand_mask, pose=None):
+        """Write one frame already in record layout, e.g. from features.HandFeatures."""
+        rec = self._rec
+        rec["frame_id"] = frame_id
+        rec["captured_at"] = captured_at
+        rec["done_at"] = done_at
+        rec["hand_mask"] = hand_mask
+        rec["hands"] = hands[:self.max_hands]
+        rec["pose_present"] = pose is not None
+        if self.pose:
+            rec["pose"] = 0.0 if pose is None else pose
+        self._f.write(rec.tobytes())
+        self.written += 1
+
+    def flush(self):
+        self._f.flush()
+
+    def close(self):
+        if not self._f.closed:
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LandmarkLog:
+    """A recorded log, memory-mapped read-only; `frames` is the structured array."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header_len, info = _read_header(f)
+        self.max_hands = info["max_hands"]
+        self.has_pose = info["pose"]
+        self.meta = info["meta"]
+        self.dtype = frame_dtype(self.max_hands, self.has_pose)
+        count = (os.path.getsize(path) - header_len) // self.dtype.itemsize  # ignore a torn tail
+        if count:
+            self.frames = np.memmap(path, self.dtype, "r", offset=header_len, shape=(count,))
+        else:
+            self.frames = np.zeros(0, self.dtype)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def duration(self):
+        return float(self.frames["done_at"][-1] - self.frames["done_at"][0]) if len(self) else 0.0
+
+    def slot(self, i, s):
+        """Hand slot `s` of frame `i` as a landmark list, or None if empty."""
+        if not self.frames["hand_mask"][i] & (1 << s):
+            return None
+        return LandmarkList(self.frames["hands"][i, s].tolist())
+
+    def hands(self, i):
+        """Every hand present in frame `i`, in slot order."""
+        return [h for h in (self.slot(i, s) for s in range(self.max_hands)) if h is not None]
+
+    def pose(self, i):
+        if not self.has_pose or not self.frames["pose_present"][i]:
+            return None
+        return LandmarkList(self.frames["pose"][i].tolist())
+
+
+class ReplayedResult:
+    """Recorded stand-in for inference.HandResult (no camera image)."""
+
+    __slots__ = ("frame_id", "captured_at", "done_at", "frame", "multi_hand_landmarks")
+
+    def __init__(self, frame_id, captured_at, done_at, multi_hand_landmarks):
+        self.frame_id = frame_id
+        self.captured_at = captured_at
+        self.done_at = done_at
+        self.frame = None
+        self.multi_hand_landmarks = multi_hand_landmarks
+
+
+class ReplaySession:
+    """Drop-in for tracking.TrackingSession that plays a log back instead of the camera.
+
+    Results are published on their recorded schedule, scaled by `speed`,
+    while the session is resumed; it acts as both `capture` and `tracker`.
+    """
+
+    def __init__(self, log, speed=1.0, loop=True):
+        self.log = log
+        self.speed = speed
+        self.loop = loop
+        self.capture = self
+        self.tracker = self
+        self.connections = HAND_CONNECTIONS
+        self.error = None if len(log) else "empty landmark log"
+        self.ready = threading.Event()
+        self.ready.set()
+        self._done_at = np.asarray(log.frames["done_at"], dtype=np.float64)
+        self._offset = 0.0  # log time at the moment of resume
+        self._resumed_at = None
+        self._index = -1
+        self._result = None
+        self.inferences = 0
+
+    def ok(self):
+        return self.error is None
+
+    def failed(self):
+        return self.error is not None
+
+    def start(self):
+        return self
+
+    def _log_time(self):
+        elapsed = (time.perf_counter() - self._resumed_at) * self.speed
+        return self._done_at[0] + self._offset + elapsed
+
+    def resume(self):
+        if self._resumed_at is None:
+            self._resumed_at = time.perf_counter()
+
+    def pause(self):
+        if self._resumed_at is not None:
+            self._offset = self._log_time() - self._done_at[0]
+            self._resumed_at = None
+
+    def close(self):
+        self.pause()
+
+    def healthy(self, max_age=1.0, warmup=5.0):
+        return True
+
+    def latest(self, hold=False):
+        if self._resumed_at is None or not len(self.log):
+            return self._result
+        t = self._log_time()
+        span = self._done_at[-1] - self._done_at[0]
+        if self.loop and span > 0 and t > self._done_at[-1]:
+            t = self._done_at[0] + (t - self._done_at[0]) % span
+        index = int(np.searchsorted(self._done_at, t, side="right")) - 1
+        if index >= 0 and index != self._index:
+            self._index = index
+            rec = self.log.frames[index]
+            self._result = ReplayedResult(self.inferences, float(rec["captured_at"]),
+                                          float(rec["done_at"]), self.log.hands(index))
+            self.inferences += 1
+        return self._result
+
+    def release(self, result):
+        pass  # replayed results have no camera frame
+
+    def set_resolution(self, size):
+        pass  # recorded landmarks have no camera to reconfigure
+
+    def set_quality(self, **settings):
+        pass
+
+    def stats(self):
+        duration = self.log.duration()
+        rate = len(self.log) / duration * self.speed if duration else 0.0
+        return {"inferences": self.inferences, "inference_hz": rate}
+
+
+def game_arenas(meta):
+    """Arena geometry recorded by run_game (older logs stored a single field at the top level)."""
+    return meta.get("arenas") or [dict(meta, players=[0, 1])]
+
+
+def replay_sim(log):
+    """Run the Pong rules over a game log as fast as possible; returns one PongSim per arena.
+
+    Hands go through the same PlayerTracker as in run_game and their paddle
+    targets are applied at each result's recorded `done_at`, the way
+    run_game applies them when a new result shows up. Logs recorded with a
+    paddle filter go through the same filter, sampled at those times.
+    """
+    from physics import PongSim
+    from players import PlayerTracker
+
+    m = log.meta
+    arenas = game_arenas(m)
+    sims = [PongSim(a["width"], a["height"], a["left_face"], a["right_face"], a["paddle_h"],
+                    a["ball_speed"], a.get("smooth", 0.0), ball_r=a.get("ball_r", 10)) for a in arenas]
+    players = PlayerTracker(2 * len(arenas))
+    filters = None
+    if m.get("paddle_filter"):
+        from filters import make_filter
+        filters = [make_filter(m["paddle_filter"], **m.get("paddle_filter_params", {}))
+                   for _ in range(players.n_players)]
+    frames = log.frames
+    captured_at = np.asarray(frames["captured_at"], dtype=np.float64)
+    done_at = np.asarray(frames["done_at"], dtype=np.float64)
+    masks = np.asarray(frames["hand_mask"])
+    palms = np.asarray(frames["hands"][:, :, 9, :2], dtype=np.float64)  # landmark 9, the paddle anchor
+    last = done_at[0] if len(log) else 0.0
+    for i in range(len(log)):
+        for sim in sims:
+            sim.advance(done_at[i] - last)
+        last = done_at[i]
+        mask = masks[i]
+        if mask:
+            slots = [s for s in range(log.max_hands) if mask & (1 << s)]
+            assigned = players.update(captured_at[i], [tuple(palms[i, s]) for s in slots])
+            for player, j in assigned.items():
+                arena, sim = arenas[player // 2], sims[player // 2]
+                target = int(palms[i, slots[j], 1] * arena["height"] - arena["paddle_h"] / 2)
+                if filters is not None:
+                    filters[player].update(captured_at[i], target)
+                elif player % 2 == 0:
+                    sim.p1_target = target
+                else:
+                    sim.p2_target = target
+        if filters is not None:
+            for k, sim in enumerate(sims):
+                y1, y2 = filters[2 * k].predict(done_at[i]), filters[2 * k + 1].predict(done_at[i])
+                if y1 is not None:
+                    sim.p1_target = int(y1)
+                if y2 is not None:
+                    sim.p2_target = int(y2)
+    return sims
+
+
+def synthetic_log(path, seconds=3600.0, fps=30.0, meta=None, hands=2):
+    """Write `seconds` of sine-wave hands spread across the view, for replay-speed checks."""
+    dtype = frame_dtype(hands, False)
+    n = int(seconds * fps)
+    frames = np.zeros(n, dtype)
+    t = np.arange(n) / fps
+    frames["frame_id"] = np.arange(n)
+    frames["captured_at"] = t
+    frames["done_at"] = t + 0.02
+    frames["hand_mask"] = (1 << hands) - 1
+    for s in range(hands):
+        frames["hands"][:, s, :, 0] = (s + 0.5) / hands
+        frames["hands"][:, s, :, 1] = (0.5 + 0.4 * np.sin(2 * np.pi * 0.4 * t + 1.3 * s))[:, None]
+    info = {"max_hands": hands, "pose": False, "meta": meta or {}}
+    with open(path, "wb") as f:
+        f.write(_header_bytes(info))
+        frames.tofile(f)
+    return n
+
+
+# run_game's single-arena field, so `bench` logs replay through the same geometry as recorded games
+DEFAULT_GAME_META = {"source": "synthetic", "arenas": [
+    {"width": 900, "height": 600, "left_face": 100, "right_face": 800, "paddle_h": 140,
+     "ball_speed": 25, "ball_r": 10, "smooth": 0.65, "players": [0, 1]}]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect and replay landmark logs")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    for name, text in (("info", "print the header and frame count"),
+                       ("sim", "replay a game log through the Pong rules, headless"),
+                       ("play", "replay a game log in the game window"),
+                       ("gestures", "replay an arm_tracking log through the gesture detectors")):
+        p = sub.add_parser(name, help=text)
+        p.add_argument("path")
+        if name == "play":
+            p.add_argument("--speed", type=float, default=1.0)
+    p = sub.add_parser("bench", help="write an hour-long synthetic log and time its replay")
+    p.add_argument("--path", default="synthetic_landmarks.lmk")
+    p.add_argument("--seconds", type=float, default=3600.0)
+    args = parser.parse_args(argv)
+
+    if args.cmd == "bench":
+        n = synthetic_log(args.path, args.seconds, meta=DEFAULT_GAME_META)
+        args.cmd = "sim"
+        print(f"wrote {n} frames ({os.path.getsize(args.path) / 1e6:.1f} MB) to {args.path}")
+
+    log = LandmarkLog(args.path)
+    if args.cmd == "info":
+        print(f"{len(log)} frames, {log.duration():.1f} s, {log.max_hands} hand slots, "
+              f"pose={log.has_pose}, {log.dtype.itemsize} bytes/frame")
+        print(json.dumps(log.meta, indent=2))
+    elif args.cmd == "sim":
+        start = time.perf_counter()
+        sims = replay_sim(log)
+        took = time.perf_counter() - start
+        scores = ", ".join(f"{sim.s1}-{sim.s2}" for sim in sims)
+        print(f"{len(log)} frames ({log.duration():.0f} s recorded) replayed in {took:.2f} s "
+              f"({log.duration() / took:.0f}x real time): score {scores}, {sims[0].ticks} ticks")
+    elif args.cmd == "play":
+        import finalGame
+        finalGame.run_game(ReplaySession(log, speed=args.speed))
+    elif args.cmd == "gestures":
+        import arm_tracking
+        start = time.perf_counter()
+        counts = arm_tracking.replay_gestures(log)
+        print(f"{len(log)} frames replayed in {time.perf_counter() - start:.2f} s: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+SIM_HZ = 60  # gameplay constants (BALL_SPEED, SMOOTH, spin) are tuned per 1/60 s tick
+SUBSTEPS = 4
+MAX_STEPS_PER_FRAME = 8  # cap catch-up work so a long stall can't snowball
+
+SPEEDUP_PER_HIT = 0.6
+ENGLISH_DIVISOR = 15
+
+
+class PongSim:
+    """Fixed-timestep Pong rules with swept ball collision.
+
+    Velocities are in pixels per tick. `advance(elapsed)` runs as many whole
+    ticks as real time allows, so gameplay speed no longer depends on the
+    render rate; `step()` runs a single tick and can be called in a tight
+    loop to simulate faster than real time.
+
+    `left_face` / `right_face` are the x coordinates of the paddles' inner
+    faces. Within a tick the ball moves in SUBSTEPS pieces and each piece is
+    swept against the faces and walls, so fast balls can't tunnel through.
+    """
+
+    def __init__(self, width, height, left_face, right_face, paddle_h,
+                 ball_speed, smooth, ball_r=10, substeps=SUBSTEPS):
+        self.width = width
+        self.height = height
+        self.left_face = left_face
+        self.right_face = right_face
+        self.paddle_h = paddle_h
+        self.ball_speed = ball_speed
+        self.smooth = smooth
+        self.ball_r = ball_r
+        self.substeps = substeps
+        self.dt = 1.0 / SIM_HZ
+
+        self.p1_y = height // 2
+        self.p2_y = height // 2
+        self.p1_target = self.p1_y
+        self.p2_target = self.p2_y
+
+        self.ball_x = width // 2
+        self.ball_y = height // 2
+        self.ball_vx = ball_speed
+        self.ball_vy = int(ball_speed * 0.6)
+
+        self.s1 = 0
+        self.s2 = 0
+
+        self.ticks = 0
+        self._accumulator = 0.0
+
+    def advance(self, elapsed, max_steps=MAX_STEPS_PER_FRAME):
+        """Run whole ticks for `elapsed` seconds of real time; return paddle hits."""
+        self._accumulator += elapsed
+        hits = 0
+        steps = 0
+        while self._accumulator >= self.dt and steps < max_steps:
+            hits += self.step()
+            self._accumulator -= self.dt
+            steps += 1
+        if steps == max_steps:
+            self._accumulator = min(self._accumulator, self.dt)
+        return hits
+
+    def step(self):
+        """Advance exactly one tick; return the number of paddle hits."""
+        self.ticks += 1
+
+        # smooth movement
+        h = self.height - self.paddle_h
+        self.p1_y = max(0, min(h, int(self.p1_y * self.smooth + self.p1_target * (1 - self.smooth))))
+        self.p2_y = max(0, min(h, int(self.p2_y * self.smooth + self.p2_target * (1 - self.smooth))))
+
+        hits = 0
+        for _ in range(self.substeps):
+            hits += self._substep(1.0 / self.substeps)
+
+        # scoring
+        if self.ball_x < 0:
+            self.s2 += 1
+            self.ball_x, self.ball_y = self.width // 2, self.height // 2
+            self.ball_vx = -self.ball_vx if self.ball_vx < 0 else self.ball_speed
+        elif self.ball_x > self.width:
+            self.s1 += 1
+            self.ball_x, self.ball_y = self.width // 2, self.height // 2
+            self.ball_vx = -self.ball_vx if self.ball_vx > 0 else -self.ball_speed
+        return hits
+
+    def _substep(self, frac):
+        x0, y0 = self.ball_x, self.ball_y
+        x1 = x0 + self.ball_vx * frac
+        y1 = y0 + self.ball_vy * frac
+        r = self.ball_r
+        hit = 0
+
+        # swept paddle collision: find where the ball's leading edge crosses a face
+        if self.ball_vx < 0 and x0 - r >= self.left_face > x1 - r:
+            t = (x0 - r - self.left_face) / (x0 - x1)
+            yc = y0 + (y1 - y0) * t
+            if self.p1_y <= yc <= self.p1_y + self.paddle_h:
+                x1 = 2 * (self.left_face + r) - x1
+                self.ball_vx = abs(self.ball_vx) + SPEEDUP_PER_HIT
+                self.ball_vy += (yc - (self.p1_y + self.paddle_h / 2)) / ENGLISH_DIVISOR
+                hit = 1
+        elif self.ball_vx > 0 and x0 + r <= self.right_face < x1 + r:
+            t = (self.right_face - x0 - r) / (x1 - x0)
+            yc = y0 + (y1 - y0) * t
+            if self.p2_y <= yc <= self.p2_y + self.paddle_h:
+                x1 = 2 * (self.right_face - r) - x1
+                self.ball_vx = -abs(self.ball_vx) - SPEEDUP_PER_HIT
+                self.ball_vy += (yc - (self.p2_y + self.paddle_h / 2)) / ENGLISH_DIVISOR
+                hit = 1
+
+        # wall bounce: reflect the overshoot back into the field
+        if y1 < 0:
+            y1 = -y1
+            self.ball_vy = abs(self.ball_vy)
+        elif y1 > self.height:
+            y1 = 2 * self.height - y1
+            self.ball_vy = -abs(self.ball_vy)
+
+        self.ball_x, self.ball_y = x1, y1
+        return hit
+
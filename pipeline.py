@@ -0,0 +1,123 @@
+import cv2
+import mediapipe as mp
+
+# model -> settings for each named setup; "size" is the (w, h) the model is fed, None = camera frame
+PIPELINES = {
+    # hand landmarks only: every gesture in arm_tracking.GESTURES reads nothing else
+    "hands": {
+        "hands": {"size": None, "model_complexity": 1},
+    },
+    # plus the lite pose model on a small frame, for the skeleton overlay
+    "hands+pose": {
+        "hands": {"size": None, "model_complexity": 1},
+        "pose": {"size": (320, 240), "model_complexity": 0},
+    },
+    # one graph for hands, full pose and the face mesh (nothing reads the face)
+    "holistic": {
+        "holistic": {"size": None, "model_complexity": 1},
+    },
+}
+
+# MediaPipe Hands labels handedness as if the frame were mirrored and Holistic as if it were not,
+# so on arm_tracking's mirrored frame Hands' "Right" is the hand Holistic calls left
+HAND_SLOTS = {"Right": 0, "Left": 1}
+
+
+class PipelineResult:
+    """The part of a Holistic result arm_tracking reads, whichever models produced it."""
+
+    __slots__ = ("left_hand_landmarks", "right_hand_landmarks", "pose_landmarks")
+
+    def __init__(self, left=None, right=None, pose=None):
+        self.left_hand_landmarks = left
+        self.right_hand_landmarks = right
+        self.pose_landmarks = pose
+
+
+class ModelPipeline:
+    """Run only the MediaPipe models one PIPELINES entry names, each at its own size.
+
+    Every model gets an RGB frame resized into a reused buffer (landmarks
+    are normalized, so they need no mapping back). With a `timer`, each
+    model's resize + inference is lapped as "<model>.process".
+    """
+
+    def __init__(self, name="holistic", config=None, timer=None,
+                 min_detection_confidence=0.5, min_tracking_confidence=0.5):
+        if config is None:
+            if name not in PIPELINES:
+                raise ValueError(f"unknown pipeline {name!r}; expected one of {sorted(PIPELINES)}")
+            config = PIPELINES[name]
+        self.name = name
+        self.config = config
+        self.timer = timer
+        confidence = dict(min_detection_confidence=min_detection_confidence,
+                          min_tracking_confidence=min_tracking_confidence)
+        self._models = {}
+        for model, settings in config.items():
+            complexity = settings.get("model_complexity", 1)
+            if model == "hands":
+                graph = mp.solutions.hands.Hands(max_num_hands=2, model_complexity=complexity, **confidence)
+            elif model == "pose":
+                graph = mp.solutions.pose.Pose(model_complexity=complexity, **confidence)
+            elif model == "holistic":
+                graph = mp.solutions.holistic.Holistic(model_complexity=complexity, **confidence)
+            else:
+                raise ValueError(f"unknown model {model!r} in pipeline {name!r}")
+            self._models[model] = graph
+        self._buffers = {}
+
+    @property
+    def models(self):
+        return list(self._models)
+
+    def _input(self, model, rgb):
+        size = self.config[model].get("size")
+        if size is None or (rgb.shape[1], rgb.shape[0]) == tuple(size):
+            return rgb
+        buf = self._buffers.get(model)
+        if buf is None or buf.shape[:2] != (size[1], size[0]):
+            buf = self._buffers[model] = cv2.resize(rgb, tuple(size), interpolation=cv2.INTER_AREA)
+            return buf
+        return cv2.resize(rgb, tuple(size), dst=buf, interpolation=cv2.INTER_AREA)
+
+    def process(self, rgb):
+        result = PipelineResult()
+        for model, graph in self._models.items():
+            out = graph.process(self._input(model, rgb))
+            if model == "holistic":
+                result.left_hand_landmarks = out.left_hand_landmarks
+                result.right_hand_landmarks = out.right_hand_landmarks
+                result.pose_landmarks = out.pose_landmarks
+            elif model == "pose":
+                result.pose_landmarks = out.pose_landmarks
+            else:
+                self._assign_hands(result, out)
+            if self.timer is not None:
+                self.timer.lap(f"{model}.process")
+        return result
+
+    @staticmethod
+    def _assign_hands(result, out):
+        slots = [None, None]
+        hands = out.multi_hand_landmarks or []
+        labels = out.multi_handedness or [None] * len(hands)
+        for hand, label in zip(hands, labels):
+            slot = HAND_SLOTS.get(label.classification[0].label, 0) if label is not None else 0
+            if slots[slot] is not None:
+                slot = 1 - slot  # both hands given the same label: keep the second anyway
+                if slots[slot] is not None:
+                    continue
+            slots[slot] = hand
+        result.left_hand_landmarks, result.right_hand_landmarks = slots
+
+    def close(self):
+        for graph in self._models.values():
+            graph.close()
+        self._models = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,88 @@
+import math
+
+
+class PlayerTracker:
+    """Keep each detected hand on the same player from one result to the next.
+
+    MediaPipe returns hands in no stable order, so sorting them by x swaps
+    paddles whenever two players cross or one drops out for a frame. Here
+    every player keeps a track (palm position, velocity, last seen). Each
+    result's hands are matched to the tracks' predicted positions, closest
+    pairs first, within `max_jump` (normalized units). A hand that matches
+    no track joins the free player slot whose home column is nearest, so
+    at the start players are still numbered left to right. A player not
+    seen for `lost_after` seconds frees their slot; after each update,
+    `joined` lists the slots a new hand took, whose per-player state
+    (paddle filters) belongs to someone else.
+    """
+
+    def __init__(self, n_players=2, max_jump=0.25, lost_after=0.75):
+        self.n_players = n_players
+        self.max_jump = max_jump
+        self.lost_after = lost_after
+        # home column of each slot: players stand left to right across the camera view
+        self.homes = [(i + 0.5) / n_players for i in range(n_players)]
+        self._tracks = [None] * n_players  # [x, y, vx, vy, last_seen] per player
+        self.swaps_avoided = 0
+        self.joined = []
+
+    def reset(self):
+        self._tracks = [None] * self.n_players
+        self.joined = []
+
+    def active(self):
+        return [i for i, tr in enumerate(self._tracks) if tr is not None]
+
+    def update(self, t, points):
+        """Assign this result's palm points; returns {player: index into points}."""
+        for i, tr in enumerate(self._tracks):
+            if tr is not None and t - tr[4] > self.lost_after:
+                self._tracks[i] = None
+
+        pairs = []
+        for i, tr in enumerate(self._tracks):
+            if tr is None:
+                continue
+            dt = min(max(t - tr[4], 0.0), 0.2)
+            px, py = tr[0] + tr[2] * dt, tr[1] + tr[3] * dt
+            for j, (x, y) in enumerate(points):
+                d = math.hypot(x - px, y - py)
+                if d <= self.max_jump:
+                    pairs.append((d, i, j))
+        pairs.sort()
+
+        assigned = {}
+        used = set()
+        for _, i, j in pairs:
+            if i not in assigned and j not in used:
+                assigned[i] = j
+                used.add(j)
+
+        for j in sorted((j for j in range(len(points)) if j not in used), key=lambda j: points[j][0]):
+            free = [i for i in range(self.n_players) if self._tracks[i] is None and i not in assigned]
+            if not free:
+                break
+            i = min(free, key=lambda i: abs(self.homes[i] - points[j][0]))
+            assigned[i] = j
+            used.add(j)
+
+        if len(assigned) > 1:
+            order = sorted(assigned, key=lambda i: points[assigned[i]][0])
+            if order != sorted(order):
+                self.swaps_avoided += 1  # x-sorting would have handed these paddles to someone else
+
+        self.joined = []
+        for i, j in assigned.items():
+            x, y = points[j]
+            tr = self._tracks[i]
+            if tr is None:
+                self._tracks[i] = [x, y, 0.0, 0.0, t]
+                self.joined.append(i)
+                continue
+            dt = t - tr[4]
+            if dt > 0:
+                # lightly smoothed velocity, only used to predict the next match
+                tr[2] = 0.5 * tr[2] + 0.5 * (x - tr[0]) / dt
+                tr[3] = 0.5 * tr[3] + 0.5 * (y - tr[1]) / dt
+            tr[0], tr[1], tr[4] = x, y, t
+        return assigned
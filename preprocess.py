@@ -0,0 +1,139 @@
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+
+class FramePreprocessor:
+    """BGR camera frame -> RGB model input without allocating per frame.
+
+    Output buffers are allocated on the first frame (and again only if the
+    camera resolution changes) and then filled in place through OpenCV's
+    `dst=` arguments.
+
+    With `mirror_pixels=False` the image is left unmirrored and callers flip
+    landmark x with `mirror_landmarks` instead, which skips a full-frame
+    copy. `mirror_pixels=True` is for loops that display the frame itself.
+    """
+
+    def __init__(self, mirror_pixels=False):
+        self.mirror_pixels = mirror_pixels
+        self._bgr = None
+        self._rgb = None
+
+    def process(self, frame):
+        """Return (bgr, rgb); both are reused buffers, valid until the next call."""
+        if self._rgb is None or self._rgb.shape != frame.shape:
+            self._rgb = np.empty_like(frame)
+            self._bgr = np.empty_like(frame) if self.mirror_pixels else None
+        bgr = frame
+        if self.mirror_pixels:
+            bgr = cv2.flip(frame, 1, dst=self._bgr)
+        cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        return bgr, self._rgb
+
+
+def crop_roi(frame, box, margin, size, out=None):
+    """Crop a square region around a normalized box and downscale it.
+
+    Returns (crop, (x0, y0, cw, ch)) where the tuple is the crop window in
+    full-frame pixels, needed to map landmarks back. Pass a (size, size, 3)
+    `out` buffer to have the crop resized into it instead of allocated,
+    also when the window is no bigger than `size` (a frame smaller than
+    the ROI); the window still maps landmarks back either way.
+    """
+    h, w = frame.shape[:2]
+    cx = (box[0] + box[2]) / 2 * w
+    cy = (box[1] + box[3]) / 2 * h
+    side = max((box[2] - box[0]) * w, (box[3] - box[1]) * h) * (1 + 2 * margin)
+    side = int(min(max(side, size), w, h))
+
+    x0 = int(min(max(cx - side / 2, 0), w - side))
+    y0 = int(min(max(cy - side / 2, 0), h - side))
+    crop = frame[y0:y0 + side, x0:x0 + side]
+    if out is not None or side > size:
+        # also copies a strided view into `out` at side == size: MediaPipe needs a contiguous buffer
+        interpolation = cv2.INTER_AREA if side > size else cv2.INTER_LINEAR
+        crop = cv2.resize(crop, (size, size), dst=out, interpolation=interpolation)
+    else:
+        crop = crop.copy()
+    return crop, (x0, y0, side, side)
+
+
+def mirror_landmarks(hand_landmarks):
+    """Flip normalized landmark x in place, as if the image had been mirrored."""
+    for lm in hand_landmarks.landmark:
+        lm.x = 1.0 - lm.x
+    return hand_landmarks
+
+
+def image_allocations(frames=200, warmup=10, size=(1280, 720), roi_tracking=True, roi_size=192,
+                      preview_size=(192, 144)):
+    """Count image-sized allocations per frame in the steady-state camera-to-preview path.
+
+    Drives the real pipeline the game runs: CameraCapture reading
+    bench.SyntheticCamera frames, HandInferenceWorker (RGB conversion, ROI
+    crops, the model) and, on this thread, the game's read of each new
+    result into a CameraPreview, holding the frame as run_game does. After
+    `warmup` inferences, reports how many allocations of at least one ROI's
+    worth of pixels survived across `frames` more. Expected: 0.
+    """
+    from bench import SyntheticCamera
+    from capture import CameraCapture
+    from inference import HandInferenceWorker
+    from preview import CameraPreview
+
+    capture = CameraCapture(lambda: SyntheticCamera(size, fps=60)).start()
+    worker = HandInferenceWorker(capture, roi_tracking=roi_tracking, roi_size=roi_size).start()
+    preview = CameraPreview(preview_size, rate_hz=0)
+    last_id = None
+
+    def consume(until):
+        nonlocal last_id
+        while worker.inferences < until:
+            result = worker.latest(hold=True)
+            if result is not None and result.frame_id != last_id:
+                last_id = result.frame_id
+                preview.update(result.frame, result.multi_hand_landmarks)
+            worker.release(result)
+            time.sleep(0.002)
+
+    # the smallest image buffer on the path: a preview thumbnail or an ROI crop
+    threshold = min(preview_size[0] * preview_size[1], worker.roi_size ** 2) * 3
+    try:
+        consume(warmup)
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            consume(warmup + frames)
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+    finally:
+        worker.stop()
+        capture.stop()
+
+    grown = [d for d in after.compare_to(before, "traceback") if d.size_diff >= threshold]
+    return {
+        "frames": frames,
+        "size": size,
+        "image_allocations": sum(d.count_diff for d in grown if d.count_diff > 0),
+        "peak_bytes": peak,
+        "image_bytes": threshold,
+        "frames_dropped": capture.frames_dropped,
+    }
+
+
+if __name__ == "__main__":
+    from quality import QUALITY_LEVELS
+
+    lowest = QUALITY_LEVELS[-1]
+    for stats in (image_allocations(), image_allocations(size=lowest["camera"], roi_size=lowest["roi_size"])):
+        print(stats)
+        # every transient image buffer would show up in the peak even if freed again
+        assert stats["image_allocations"] == 0, "steady-state frames allocated image buffers"
+        assert stats["peak_bytes"] < stats["image_bytes"], "a transient image buffer was allocated"
+    print("ok: no image allocations after warm-up, at full and at the lowest quality")
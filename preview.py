@@ -0,0 +1,136 @@
+import argparse
+import os
+import time
+
+import cv2
+import numpy as np
+import pygame
+
+
+class CameraPreview:
+    """Picture-in-picture camera view drawn inside the pygame window.
+
+    Replaces the second cv2.imshow window. Each update downsizes the raw
+    frame first and only then mirrors it, converts it and draws landmarks, all
+    into reused buffers. The pygame surface wraps the RGB buffer via
+    pygame.image.frombuffer, so refreshing it needs no extra copy. Updates are
+    throttled to `rate_hz`; with `enabled=False` nothing is done at all.
+    """
+
+    def __init__(self, size=(192, 144), rate_hz=15, enabled=True, connections=()):
+        self.size = size
+        self.rate_hz = rate_hz
+        self.enabled = enabled
+        self.connections = list(connections)
+
+        w, h = size
+        self._small = np.empty((h, w, 3), np.uint8)
+        self._mirror = np.empty((h, w, 3), np.uint8)
+        self._rgb = np.empty((h, w, 3), np.uint8)
+        self.surface = None
+        self._last_update = 0.0
+        self.updates = 0
+
+    def update(self, frame, hands, now=None):
+        """Refresh from a raw BGR frame and mirrored landmarks if the rate allows it."""
+        if not self.enabled or frame is None:
+            return False
+        now = now if now is not None else time.perf_counter()
+        if self.rate_hz and now - self._last_update < 1.0 / self.rate_hz:
+            return False
+        self._last_update = now
+
+        # bilinear: INTER_AREA is ~30x slower for this shrink and a thumbnail doesn't need it
+        cv2.resize(frame, self.size, dst=self._small, interpolation=cv2.INTER_LINEAR)
+        cv2.flip(self._small, 1, dst=self._mirror)
+        for hand in hands or ():
+            self._draw_hand(hand)
+        cv2.cvtColor(self._mirror, cv2.COLOR_BGR2RGB, dst=self._rgb)
+
+        if self.surface is None:
+            # shares memory with self._rgb, so later updates show up without a new surface
+            self.surface = pygame.image.frombuffer(self._rgb, self.size, "RGB")
+        self.updates += 1
+        return True
+
+    def _draw_hand(self, hand):
+        w, h = self.size
+        pts = [(int(lm.x * w), int(lm.y * h)) for lm in hand.landmark]
+        for a, b in self.connections:
+            cv2.line(self._mirror, pts[a], pts[b], (0, 255, 0), 1)
+        for p in pts:
+            cv2.circle(self._mirror, p, 2, (0, 0, 255), -1)
+
+    def draw(self, screen, pos):
+        """Blit the preview and return the touched rect (None when there is nothing to show)."""
+        if not self.enabled or self.surface is None:
+            return None
+        rect = screen.blit(self.surface, pos)
+        pygame.draw.rect(screen, (80, 80, 100), rect, 1)
+        return rect
+
+
+def _synthetic_hand(cx, cy):
+    class _LM:
+        def __init__(self, x, y):
+            self.x, self.y = x, y
+
+    class _Hand:
+        landmark = [_LM(cx + 0.01 * (i % 5), cy + 0.015 * (i // 5)) for i in range(21)]
+
+    return _Hand()
+
+
+def benchmark(frames=300, shape=(720, 1280, 3)):
+    """Per-frame cost of the old full-res imshow window versus the in-window preview."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    screen = pygame.display.set_mode((900, 600))
+    frame = np.random.randint(0, 255, shape, dtype=np.uint8)
+    hands = [_synthetic_hand(0.3, 0.4), _synthetic_hand(0.6, 0.4)]
+    connections = [(i, i + 1) for i in range(20)]
+    results = {}
+
+    # old path: mirror the full frame, draw on it at full res, show it in a second window
+    has_window = True
+    start = time.perf_counter()
+    for _ in range(frames):
+        shown = cv2.flip(frame, 1)
+        for hand in hands:
+            pts = [(int(lm.x * shape[1]), int(lm.y * shape[0])) for lm in hand.landmark]
+            for a, b in connections:
+                cv2.line(shown, pts[a], pts[b], (0, 255, 0), 2)
+            for p in pts:
+                cv2.circle(shown, p, 4, (0, 0, 255), -1)
+        if has_window:
+            try:
+                cv2.imshow("preview benchmark", shown)
+                cv2.waitKey(1)
+            except cv2.error:
+                has_window = False  # headless OpenCV build: time the drawing only
+    results["imshow"] = (time.perf_counter() - start) / frames * 1e6
+    if has_window:
+        cv2.destroyAllWindows()
+
+    for name, rate in (("pip_every_frame", 0), ("pip_15hz_at_60fps", 15)):
+        preview = CameraPreview(rate_hz=rate, connections=connections)
+        start = time.perf_counter()
+        for i in range(frames):
+            preview.update(frame, hands, now=i / 60.0)
+            preview.draw(screen, (10, 10))
+        results[name] = (time.perf_counter() - start) / frames * 1e6
+
+    results["window_shown"] = has_window
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Camera preview cost: cv2.imshow vs in-window PiP")
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+    res = benchmark(args.frames)
+    window_shown = res.pop("window_shown")
+    for name, us in res.items():
+        print(f"{name:<20}{us:9.1f} us/frame")
+    if not window_shown:
+        print("(no GUI in this OpenCV build; the imshow window cost is not included)")
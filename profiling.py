@@ -0,0 +1,109 @@
+import collections
+import csv
+import json
+import threading
+import time
+
+
+class StageTimer:
+    """Low-overhead per-stage frame timings with rolling percentiles.
+
+    Recording a sample is one perf_counter() call and a deque append; the
+    percentiles are only computed when the HUD refreshes or on export.
+
+    The main loop uses `begin_frame()` then `lap(stage)` after each stage,
+    which times the gap since the previous lap, and `end_frame()` to record
+    the whole frame. Other threads time their own
+    work and call `add(stage, seconds)`.
+    """
+
+    def __init__(self, window=600, enabled=True):
+        self.window = window
+        self.enabled = enabled
+        self._samples = {}
+        self._counts = collections.Counter()
+        self._lock = threading.Lock()
+        self._last = 0.0
+        self._frame_start = 0.0
+        self.started_at = time.time()
+
+    def _series(self, stage):
+        series = self._samples.get(stage)
+        if series is None:
+            with self._lock:
+                series = self._samples.setdefault(stage, collections.deque(maxlen=self.window))
+        return series
+
+    def add(self, stage, seconds):
+        if self.enabled:
+            self._series(stage).append(seconds)
+            self._counts[stage] += 1
+
+    def begin_frame(self):
+        self._last = self._frame_start = time.perf_counter()
+
+    def end_frame(self):
+        """Record the whole frame, begin_frame() to now, as the "frame" stage."""
+        self.add("frame", time.perf_counter() - self._frame_start)
+
+    def lap(self, stage):
+        now = time.perf_counter()
+        self.add(stage, now - self._last)
+        self._last = now
+
+    def stages(self):
+        return list(self._samples)
+
+    def samples(self, stage):
+        """Seconds for the last `window` samples of a stage, oldest first."""
+        return list(self._samples.get(stage, ()))
+
+    def percentiles(self, stage, qs=(50, 95, 99)):
+        values = sorted(self._samples.get(stage, ()))
+        if not values:
+            return [0.0 for _ in qs]
+        return [values[min(len(values) - 1, int(len(values) * q / 100))] for q in qs]
+
+    def summary(self):
+        """{stage: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}} over the rolling window."""
+        out = {}
+        for stage in self.stages():
+            values = list(self._samples[stage])
+            if not values:
+                continue
+            p50, p95, p99 = self.percentiles(stage)
+            out[stage] = {
+                "count": self._counts[stage],
+                "mean_ms": sum(values) / len(values) * 1000.0,
+                "p50_ms": p50 * 1000.0,
+                "p95_ms": p95 * 1000.0,
+                "p99_ms": p99 * 1000.0,
+                "max_ms": max(values) * 1000.0,
+            }
+        return out
+
+    def hud_lines(self):
+        lines = ["stage            p50    p95    p99 ms"]
+        for stage, row in self.summary().items():
+            lines.append(f"{stage:<14}{row['p50_ms']:6.2f} {row['p95_ms']:6.2f} {row['p99_ms']:6.2f}")
+        return lines
+
+    def export_json(self, path, include_samples=False):
+        data = {"started_at": self.started_at, "window": self.window, "stages": self.summary()}
+        if include_samples:
+            data["samples_ms"] = {s: [v * 1000.0 for v in self._samples[s]] for s in self.stages()}
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+    def export_csv(self, path):
+        fields = ["stage", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for stage, row in self.summary().items():
+                writer.writerow({"stage": stage, **{k: round(v, 4) for k, v in row.items()}})
+
+    def export(self, prefix):
+        """Write <prefix>.json and <prefix>.csv."""
+        self.export_json(prefix + ".json")
+        self.export_csv(prefix + ".csv")
@@ -0,0 +1,108 @@
+import collections
+import time
+
+# most expensive first; the governor moves one step at a time
+QUALITY_LEVELS = (
+    {"name": "high", "camera": None, "roi_size": 192, "detect_scale": 1.0, "model_complexity": 1,
+     "inference_hz": None, "glow": 12, "preview": True, "shake": True},
+    {"name": "medium", "camera": None, "roi_size": 160, "detect_scale": 0.75, "model_complexity": 1,
+     "inference_hz": 30, "glow": 8, "preview": True, "shake": True},
+    {"name": "low", "camera": (640, 480), "roi_size": 128, "detect_scale": 0.5, "model_complexity": 0,
+     "inference_hz": 30, "glow": 4, "preview": False, "shake": True},
+    {"name": "minimum", "camera": (320, 240), "roi_size": 128, "detect_scale": 1.0, "model_complexity": 0,
+     "inference_hz": 20, "glow": 0, "preview": False, "shake": False},
+)
+
+
+class QualityGovernor:
+    """Step quality down while frames run over budget and back up when there is headroom.
+
+    Each frame reports its interval and its busy time (the frame minus
+    the frame cap's idle). Over budget means the frame rate is below
+    target or busy time is close to the whole budget; headroom means the
+    target rate is held with busy time under half the budget. Hysteresis:
+    a drop needs `down_after` seconds over budget, a raise `up_after`
+    seconds of headroom, and after any change the governor holds still
+    for `hold` seconds so the new level's cost shows up first.
+    """
+
+    def __init__(self, levels=QUALITY_LEVELS, target_fps=60, start=0, window=60,
+                 down_after=1.0, up_after=5.0, hold=2.0, log=print):
+        self.levels = levels
+        self.budget = 1.0 / target_fps
+        self.level = min(max(start, 0), len(levels) - 1)
+        self.down_after = down_after
+        self.up_after = up_after
+        self.hold = hold
+        self.log = log
+        self._intervals = collections.deque(maxlen=window)
+        self._busy = collections.deque(maxlen=window)
+        self._over_since = None
+        self._under_since = None
+        self._changed_at = None
+        self.history = []  # (time, old name, new name, reason)
+
+    @property
+    def current(self):
+        return self.levels[self.level]
+
+    def status(self):
+        return f"quality {self.current['name']} ({self.level + 1}/{len(self.levels)})"
+
+    def observe(self, frame_s, busy_s, now=None):
+        """Record one frame; returns True when the level changed."""
+        now = now if now is not None else time.perf_counter()
+        self._intervals.append(frame_s)
+        self._busy.append(busy_s)
+        if len(self._intervals) < self._intervals.maxlen // 2:
+            return False
+        if self._changed_at is not None and now - self._changed_at < self.hold:
+            return False
+
+        interval = sum(self._intervals) / len(self._intervals)
+        busy = sorted(self._busy)[int(len(self._busy) * 0.9)]
+        over = interval > self.budget * 1.1 or busy > self.budget * 0.9
+        under = interval < self.budget * 1.03 and busy < self.budget * 0.5
+
+        if not over:
+            self._over_since = None
+        elif self._over_since is None:
+            self._over_since = now
+        if not under:
+            self._under_since = None
+        elif self._under_since is None:
+            self._under_since = now
+        if over and now - self._over_since >= self.down_after and self.level < len(self.levels) - 1:
+            reason = f"{1 / interval:.0f} fps, busy p90 {busy * 1000:.1f} ms"
+            return self._set(self.level + 1, now, reason)
+        if under and now - self._under_since >= self.up_after and self.level > 0:
+            reason = f"headroom, busy p90 {busy * 1000:.1f} ms"
+            return self._set(self.level - 1, now, reason)
+        return False
+
+    def _set(self, level, now, reason):
+        old = self.current["name"]
+        self.level = level
+        self.history.append((now, old, self.current["name"], reason))
+        if self.log is not None:
+            self.log(f"[quality] {old} -> {self.current['name']} ({reason})")
+        self._intervals.clear()
+        self._busy.clear()
+        self._over_since = self._under_since = None
+        self._changed_at = now
+        return True
+
+
+if __name__ == "__main__":
+    # a laptop that can only do ~40 fps at "high", with costs falling at each lower level
+    costs = [0.025, 0.018, 0.012, 0.008]
+    gov = QualityGovernor()
+    t = 0.0
+    for _ in range(60 * 30):
+        busy = costs[gov.level]
+        frame = max(busy, gov.budget)
+        t += frame
+        gov.observe(frame, busy, now=t)
+    print(f"settled at {gov.current['name']} after {len(gov.history)} changes")
+    for when, old, new, reason in gov.history:
+        print(f"  {when:6.2f} s  {old} -> {new}: {reason}")
@@ -0,0 +1,53 @@
+import pygame
+
+
+class DirtyRenderer:
+    """Redraw only what moved, over a cached background.
+
+    Each frame: `begin()` paints the background back over last frame's
+    sprites, the caller draws and reports the rects it touched with `add()`,
+    then `present()` pushes just those regions with pygame.display.update.
+    A full frame (first frame, background change, screen shake) repaints the
+    whole background and flips instead.
+    """
+
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background
+        self._prev = []
+        self._rects = []
+        self._full = True
+        self.full_frames = 0
+        self.partial_frames = 0
+
+    def set_background(self, background):
+        self.background = background
+        self.invalidate()
+
+    def invalidate(self):
+        self._full = True
+
+    def begin(self, full=False):
+        if full:
+            self._full = True
+        if self._full:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for r in self._prev:
+                self.screen.blit(self.background, r, r)
+        self._rects = []
+
+    def add(self, rect):
+        if rect is not None:
+            self._rects.append(pygame.Rect(rect))
+        return rect
+
+    def present(self):
+        if self._full:
+            pygame.display.flip()
+            self.full_frames += 1
+        else:
+            pygame.display.update(self._prev + self._rects)
+            self.partial_frames += 1
+        self._prev = self._rects
+        self._full = False
@@ -0,0 +1,586 @@
+import argparse
+import glob
+import os
+import threading
+import time
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+WIN = 400  # 25 ms analysis window
+HOP = 160  # 10 ms between feature frames
+NFFT = 512
+N_MELS = 26
+N_CEPS = 12  # cepstra 1..12; c0 (loudness) is left out so matching ignores level
+# mean per-frame distance under which a template match counts; see `selftest` / `test` to tune
+THRESHOLD = 0.8
+
+
+def _mel_matrix(rate=SAMPLE_RATE, nfft=NFFT, n_mels=N_MELS, fmin=60.0, fmax=7600.0):
+    mel = lambda f: 2595.0 * np.log10(1.0 + f / 700.0)
+    hz = lambda m: 700.0 * (10.0 ** (m / 2595.0) - 1.0)
+    edges = hz(np.linspace(mel(fmin), mel(fmax), n_mels + 2))
+    bins = np.fft.rfftfreq(nfft, 1.0 / rate)
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    tri = np.minimum((bins - lower) / (center - lower), (upper - bins) / (upper - center))
+    return np.maximum(tri, 0.0).T.astype(np.float32)  # (nfft/2+1, n_mels)
+
+
+def _dct_matrix(n_mels=N_MELS, n_ceps=N_CEPS):
+    k = np.arange(1, n_ceps + 1)[None, :]
+    n = np.arange(n_mels)[:, None]
+    return np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)).astype(np.float32)  # (n_mels, n_ceps)
+
+
+MEL = _mel_matrix()
+DCT = _dct_matrix()
+WINDOW = np.hamming(WIN).astype(np.float32)
+
+
+def frame_features(frames):
+    """(n, WIN) sample frames -> ((n, N_CEPS) cepstra, (n,) energy in dB)."""
+    energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+    emphasized = np.empty_like(frames)
+    emphasized[:, 0] = frames[:, 0]
+    emphasized[:, 1:] = frames[:, 1:] - 0.97 * frames[:, :-1]
+    power = np.abs(np.fft.rfft(emphasized * WINDOW, NFFT)) ** 2
+    logmel = np.log(power @ MEL + 1e-8)
+    return logmel @ DCT, energy_db
+
+
+def mfcc(samples):
+    """Cepstra and energies of a whole signal, framed exactly as FeatureStream frames a stream."""
+    samples = np.asarray(samples, np.float32)
+    if len(samples) < WIN:
+        return np.zeros((0, N_CEPS), np.float32), np.zeros(0)
+    n = 1 + (len(samples) - WIN) // HOP
+    frames = np.lib.stride_tricks.sliding_window_view(samples, WIN)[::HOP][:n]
+    return frame_features(np.ascontiguousarray(frames))
+
+
+class FeatureStream:
+    """Turn arbitrary-sized sample chunks into 10 ms feature frames, carrying the remainder over."""
+
+    def __init__(self):
+        self._tail = np.zeros(0, np.float32)
+        self.frames_out = 0
+
+    def push(self, samples):
+        buf = np.concatenate((self._tail, np.asarray(samples, np.float32)))
+        if len(buf) < WIN:
+            self._tail = buf
+            return np.zeros((0, N_CEPS), np.float32), np.zeros(0)
+        n = 1 + (len(buf) - WIN) // HOP
+        frames = np.lib.stride_tricks.sliding_window_view(buf, WIN)[::HOP][:n]
+        self._tail = buf[n * HOP:]
+        self.frames_out += n
+        return frame_features(np.ascontiguousarray(frames))
+
+
+class NoiseGate:
+    """Energy voice-activity detection against a noise floor that is calibrated once, then tracked.
+
+    The first `calibrate_s` of audio set the floor (their median energy);
+    this replaces re-measuring ambient noise before every utterance. After
+    that the floor follows non-speech frames: quickly when the room gets
+    quieter, slowly when it gets louder, so speech never drags it up.
+    A frame is speech when it is `margin_db` above the floor; the gate
+    opens on speech and closes after `hangover_s` without any.
+    """
+
+    def __init__(self, calibrate_s=1.0, margin_db=10.0, hangover_s=0.25, fall=0.05, rise=0.005):
+        self.calibrate_frames = int(calibrate_s * SAMPLE_RATE / HOP)
+        self.margin_db = margin_db
+        self.hangover = int(hangover_s * SAMPLE_RATE / HOP)
+        self.fall = fall
+        self.rise = rise
+        self.floor = None
+        self.open = False
+        self._calibration = []
+        self._quiet = 0
+
+    @property
+    def calibrated(self):
+        return self.floor is not None
+
+    def update(self, energy_db):
+        """Feed one frame's energy; returns whether the gate is open for it."""
+        energy_db = float(energy_db)
+        if self.floor is None:
+            self._calibration.append(energy_db)
+            if len(self._calibration) >= self.calibrate_frames:
+                self.floor = float(np.median(self._calibration))
+                self._calibration = []
+            return False
+        speech = energy_db > self.floor + self.margin_db
+        if not speech:
+            rate = self.fall if energy_db < self.floor else self.rise
+            self.floor += rate * (energy_db - self.floor)
+        if speech:
+            self.open = True
+            self._quiet = 0
+        elif self.open:
+            self._quiet += 1
+            if self._quiet > self.hangover:
+                self.open = False
+        return self.open
+
+
+class Hit:
+    __slots__ = ("time", "score", "template", "latency", "at")
+
+    def __init__(self, time, score, template, latency=None, at=None):
+        self.time = time  # audio time (s) of the frame that completed the match
+        self.score = score
+        self.template = template
+        self.latency = latency  # wall time from that frame being captured to the hit, when known
+        self.at = at  # time.time() at which that frame was captured, when known
+
+    def __repr__(self):
+        return f"Hit(time={self.time:.2f}, score={self.score:.3f}, template={self.template})"
+
+
+class KeywordSpotter:
+    """Streaming template matcher for one keyword, gated by a NoiseGate.
+
+    Templates are feature sequences of the keyword (see `load_templates`).
+    While the gate is open, every new frame advances a subsequence DTW
+    against all templates at once: a match may start on any frame, and the
+    template may advance 0, 1 or 2 frames per input frame, with at most
+    `max_skips` 2-frame steps in a row. A path only counts once it spans
+    at least `min_span` of its template's length in input frames, so a
+    fragment of the keyword squeezed onto the whole template ("six...")
+    does not match. Once the best path cost per frame falls under
+    `threshold`, the lowest score is tracked until it has not improved for
+    `settle_s`; that frame, where the keyword ends, becomes the Hit,
+    reported `settle_s` later rather than after the whole utterance. Then
+    the spotter waits `refractory_s`.
+    A few frames before the gate opens are replayed so onsets are not cut.
+    """
+
+    def __init__(self, templates, threshold=THRESHOLD, gate=None, refractory_s=0.6, preroll_s=0.15,
+                 min_span=0.8, max_skips=1, settle_s=0.03):
+        if not templates:
+            raise ValueError("no keyword templates")
+        self.threshold = threshold
+        self.max_skips = max_skips
+        self.settle = settle_s
+        self.gate = gate or NoiseGate()
+        self.refractory = refractory_s
+        stacked = np.concatenate(templates)
+        # scale cepstra so each carries equal weight in the distance
+        self.scale = 1.0 / (stacked.std(axis=0) + 1e-6)
+        longest = max(len(t) for t in templates)
+        self._templates = np.zeros((len(templates), longest, N_CEPS), np.float32)
+        self._valid = np.zeros((len(templates), longest), bool)
+        for k, t in enumerate(templates):
+            self._templates[k, :len(t)] = t * self.scale
+            self._valid[k, :len(t)] = True
+        self._last = np.asarray([len(t) - 1 for t in templates])
+        self._min_length = min_span * (self._last + 1)
+        self._rows = np.arange(len(templates))
+        self._preroll = int(preroll_s * SAMPLE_RATE / HOP)
+        self._stream = FeatureStream()
+        self.reset()
+        self.hits = []
+        self.audio_s = 0.0
+        self.cpu_s = 0.0
+
+    def reset(self):
+        self._reset_buffers()
+        self._blocked_until = -1.0
+
+    def _reset_buffers(self):
+        """Forget the partial matches; a gate close keeps the refractory period running."""
+        k, m = self._valid.shape
+        self._cost = np.full((k, m), np.inf)
+        self._length = np.zeros((k, m))
+        self._skips = np.zeros((k, m), np.intp)  # 2-frame steps in a row at the end of each path
+        self._recent = []
+        self._active = False
+        self._candidate = None  # (score, template, frame end) of the best match not reported yet
+
+    def _advance(self, feat):
+        """One subsequence-DTW step; returns (best score, template) at the templates' last frames."""
+        x = feat * self.scale
+        local = np.sqrt(np.mean((self._templates - x) ** 2, axis=2))
+        local[~self._valid] = np.inf
+        cost, length, skips = self._cost, self._length, self._skips
+        # predecessors: same template frame, one back, two back (unless that path just skipped enough)
+        options = np.full((3,) + cost.shape, np.inf)
+        options[0] = cost
+        options[1, :, 1:] = cost[:, :-1]
+        options[2, :, 2:] = np.where(skips[:, :-2] < self.max_skips, cost[:, :-2], np.inf)
+        lengths = np.zeros((3,) + cost.shape)
+        lengths[0] = length
+        lengths[1, :, 1:] = length[:, :-1]
+        lengths[2, :, 2:] = length[:, :-2]
+        runs = np.zeros((3,) + cost.shape, np.intp)
+        runs[2, :, 2:] = skips[:, :-2] + 1
+        pick = np.argmin(options, axis=0)[None]
+        best = np.take_along_axis(options, pick, 0)[0]
+        new_length = np.take_along_axis(lengths, pick, 0)[0] + 1
+        new_skips = np.take_along_axis(runs, pick, 0)[0]
+        best[:, 0] = 0.0  # a match can start on any frame
+        new_length[:, 0] = 1
+        new_skips[:, 0] = 0
+        self._cost = best + local
+        self._length = new_length
+        self._skips = new_skips
+        end_length = new_length[self._rows, self._last]
+        end_cost = np.where(end_length >= self._min_length,
+                            self._cost[self._rows, self._last] / end_length, np.inf)
+        k = int(np.argmin(end_cost))
+        return float(end_cost[k]), k
+
+    def process(self, samples, captured_at=None):
+        """Feed a chunk of 16 kHz mono float samples; returns the Hits it completed.
+
+        `captured_at` is the wall time at which the chunk's last sample was
+        captured; with it each Hit carries its detection latency.
+        """
+        cpu = time.thread_time()
+        chunk_end = self.audio_s + len(samples) / SAMPLE_RATE
+        first_frame = self._stream.frames_out
+        feats, energy = self._stream.push(samples)
+        hits = []
+        for i in range(len(feats)):
+            frame_end = ((first_frame + i) * HOP + WIN) / SAMPLE_RATE
+            if not self.gate.update(energy[i]):
+                if self._active:
+                    hits += self._flush(captured_at, chunk_end)
+                    self._reset_buffers()
+                self._recent.append(feats[i])
+                del self._recent[:-self._preroll]
+                continue
+            if not self._active:
+                self._active = True
+                for old in self._recent:
+                    self._advance(old)
+                self._recent = []
+            score, k = self._advance(feats[i])
+            best = self._candidate
+            if score < self.threshold and frame_end >= self._blocked_until and (best is None or score < best[0]):
+                self._candidate = (score, k, frame_end)
+            elif best is not None and frame_end - best[2] >= self.settle:
+                hits += self._flush(captured_at, chunk_end)
+        self.audio_s = chunk_end
+        self.cpu_s += time.thread_time() - cpu
+        self.hits.extend(hits)
+        return hits
+
+    def _flush(self, captured_at, chunk_end):
+        """The pending best match as a Hit, if there is one."""
+        if self._candidate is None:
+            return []
+        score, k, frame_end = self._candidate
+        self._candidate = None
+        latency = at = None
+        if captured_at is not None:
+            at = captured_at - (chunk_end - frame_end)
+            latency = time.time() - at
+        self._blocked_until = frame_end + self.refractory
+        return [Hit(frame_end, score, k, latency, at)]
+
+    def stats(self):
+        latencies = [h.latency for h in self.hits if h.latency is not None]
+        return {
+            "hits": len(self.hits),
+            "audio_s": self.audio_s,
+            "cpu_per_audio_s": self.cpu_s / self.audio_s if self.audio_s else 0.0,
+            "latency_ms": 1000.0 * float(np.median(latencies)) if latencies else None,
+            "noise_floor_db": self.gate.floor,
+        }
+
+    def listen(self, mic):
+        """Yield Hits from a running MicStream until it stops."""
+        cursor = mic.ring.written
+        while mic.running:
+            samples, cursor, captured_at = mic.ring.read(cursor, timeout=0.2)
+            if len(samples):
+                yield from self.process(samples, captured_at)
+
+
+def trim_silence(samples, margin_db=15.0):
+    """Cut a recording down to its loud part: frames within `margin_db` of the loudest."""
+    feats, energy = mfcc(samples)
+    if not len(feats):
+        return feats
+    loud = np.flatnonzero(energy > energy.max() - margin_db)
+    return feats[loud[0]:loud[-1] + 1]
+
+
+def read_wav(path):
+    """Mono float32 samples at SAMPLE_RATE from a 16-bit PCM WAV (other rates are resampled)."""
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        rate, channels = w.getframerate(), w.getnchannels()
+        data = np.frombuffer(w.readframes(w.getnframes()), "<i2").astype(np.float32) / 32768.0
+    if channels > 1:
+        data = data.reshape(-1, channels).mean(axis=1)
+    if rate != SAMPLE_RATE:
+        t = np.arange(int(len(data) * SAMPLE_RATE / rate)) * (rate / SAMPLE_RATE)
+        data = np.interp(t, np.arange(len(data)), data).astype(np.float32)
+    return data
+
+
+def write_wav(path, samples, rate=SAMPLE_RATE):
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2")
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(pcm.tobytes())
+
+
+def load_templates(directory):
+    """Trimmed feature sequences of every *.wav in `directory`."""
+    paths = sorted(glob.glob(os.path.join(directory, "*.wav")))
+    return [trim_silence(read_wav(p)) for p in paths]
+
+
+class AudioRing:
+    """Fixed-size sample ring written by the audio callback and read by the spotter thread.
+
+    Single producer, single consumer: the writer only advances `written`
+    after the samples are in place, so the reader needs no lock. A reader
+    that falls more than the ring behind skips ahead and counts `dropped`.
+    """
+
+    def __init__(self, seconds=4.0):
+        self._buf = np.zeros(int(seconds * SAMPLE_RATE), np.float32)
+        self.written = 0
+        self.written_at = 0.0
+        self.dropped = 0
+        self._event = threading.Event()
+
+    def write(self, samples):
+        n, size = len(samples), len(self._buf)
+        start = self.written % size
+        first = min(n, size - start)
+        self._buf[start:start + first] = samples[:first]
+        self._buf[:n - first] = samples[first:]
+        self.written_at = time.time()
+        self.written += n
+        self._event.set()
+
+    def read(self, cursor, timeout=None):
+        """Samples after `cursor` -> (samples, new cursor, wall time of the newest sample)."""
+        if cursor == self.written:
+            self._event.clear()
+            if cursor == self.written:
+                self._event.wait(timeout)
+        end, captured_at = self.written, self.written_at
+        size = len(self._buf)
+        if end - cursor > size:
+            self.dropped += end - cursor - size
+            cursor = end - size
+        idx = np.arange(cursor, end) % size
+        return self._buf[idx], end, captured_at
+
+
+class MicStream:
+    """Default microphone into an AudioRing, via a PyAudio callback stream (16 kHz mono)."""
+
+    def __init__(self, ring=None, device=None, chunk_ms=20):
+        self.ring = ring or AudioRing()
+        self.device = device
+        self.chunk = int(SAMPLE_RATE * chunk_ms / 1000)
+        self.running = False
+        self._pa = self._stream = None
+
+    def _callback(self, data, frames, time_info, status):
+        import pyaudio
+        self.ring.write(np.frombuffer(data, "<i2").astype(np.float32) / 32768.0)
+        return None, pyaudio.paContinue
+
+    def start(self):
+        import pyaudio
+        self._pa = pyaudio.PyAudio()
+        self._stream = self._pa.open(format=pyaudio.paInt16, channels=1, rate=SAMPLE_RATE, input=True,
+                                     input_device_index=self.device, frames_per_buffer=self.chunk,
+                                     stream_callback=self._callback)
+        self.running = True
+        return self
+
+    def stop(self):
+        self.running = False
+        if self._stream is not None:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._pa.terminate()
+            self._stream = self._pa = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def run_wav(spotter, path, chunk_ms=20):
+    """Stream a WAV fixture through `spotter` in microphone-sized chunks, as fast as possible."""
+    samples = read_wav(path)
+    step = int(SAMPLE_RATE * chunk_ms / 1000)
+    chunk_cpu = []
+    for start in range(0, len(samples), step):
+        cpu = time.thread_time()
+        spotter.process(samples[start:start + step])
+        chunk_cpu.append(time.thread_time() - cpu)
+    return spotter.hits, chunk_cpu
+
+
+# --- synthetic speech for the self-test: harmonic vowels with moving formants, noise for fricatives
+
+def _syllables(parts, f0=120.0, rate=1.0, seed=0):
+    rng = np.random.default_rng(seed)
+    out = []
+    for kind, dur, f1, f2 in parts:
+        n = int(dur / rate * SAMPLE_RATE)
+        t = np.arange(n) / SAMPLE_RATE
+        if kind == "noise":
+            # "s"-like hiss: white noise, crudely high-passed
+            s = rng.normal(0, 1, n)
+            s = np.diff(s, prepend=0.0) * 0.15
+        elif kind == "gap":
+            s = np.zeros(n)
+        else:
+            pitch = f0 * (1.0 + 0.08 * np.sin(np.pi * t / max(t[-1], 1e-3)))
+            phase = 2 * np.pi * np.cumsum(pitch) / SAMPLE_RATE
+            s = np.zeros(n)
+            for h in range(1, int(3800 / f0)):
+                freq = h * f0
+                gain = np.exp(-((freq - f1) / 120.0) ** 2) + 0.6 * np.exp(-((freq - f2) / 180.0) ** 2) + 0.02
+                s += gain * np.sin(h * phase)
+            s *= 0.12 * np.hanning(n) ** 0.3
+        out.append(s)
+    return np.concatenate(out).astype(np.float32)
+
+
+KEYWORD = [("noise", 0.09, 0, 0), ("voice", 0.12, 390, 2000), ("gap", 0.04, 0, 0), ("voice", 0.10, 290, 2250),
+           ("noise", 0.08, 0, 0), ("voice", 0.14, 550, 1800), ("voice", 0.10, 350, 1100), ("voice", 0.12, 500, 1500)]
+# the keyword's first syllables ("six..."), which must not count on their own
+PREFIXES = [KEYWORD[:2], KEYWORD[:5]]
+DISTRACTORS = [
+    [("voice", 0.15, 700, 1200), ("gap", 0.05, 0, 0), ("voice", 0.2, 300, 870)],
+    [("noise", 0.1, 0, 0), ("voice", 0.25, 650, 1700), ("voice", 0.2, 450, 1000)],
+    [("voice", 0.12, 300, 2300), ("voice", 0.18, 750, 1300), ("noise", 0.06, 0, 0), ("voice", 0.12, 400, 800)],
+]
+
+
+def selftest(tmp, threshold=THRESHOLD):
+    """Write template and fixture WAVs, then spot the keyword in the fixture; returns a report."""
+    rng = np.random.default_rng(1)
+    template_dir = os.path.join(tmp, "templates")
+    os.makedirs(template_dir, exist_ok=True)
+    for i, (f0, rate) in enumerate(((118, 1.0), (124, 0.95), (112, 1.05))):
+        write_wav(os.path.join(template_dir, f"67_{i}.wav"),
+                  np.concatenate((np.zeros(1600), _syllables(KEYWORD, f0, rate, seed=i), np.zeros(1600))))
+
+    # 60 s: the room gets 4x noisier half way through; keywords, other words and keyword
+    # prefixes cut off after "six" at random spots
+    seconds = 60.0
+    audio = rng.normal(0, 0.003, int(seconds * SAMPLE_RATE)).astype(np.float32)
+    audio[len(audio) // 2:] *= 4.0
+    truth, prefixes, t = [], 0, 2.0
+    while t < seconds - 2.0:
+        pick = rng.random()
+        if pick < 0.4:
+            parts = KEYWORD
+        elif pick < 0.7:
+            parts = DISTRACTORS[rng.integers(len(DISTRACTORS))]
+        else:
+            parts = PREFIXES[rng.integers(len(PREFIXES))]
+            prefixes += 1
+        word = _syllables(parts, rng.uniform(105, 140), rng.uniform(0.85, 1.2), seed=int(t * 10))
+        if parts is KEYWORD:
+            truth.append(t + len(word) / SAMPLE_RATE)
+        start = int(t * SAMPLE_RATE)
+        audio[start:start + len(word)] += word * rng.uniform(0.6, 1.4)
+        t += len(word) / SAMPLE_RATE + rng.uniform(0.8, 2.0)
+    fixture = os.path.join(tmp, "fixture.wav")
+    write_wav(fixture, audio)
+
+    spotter = KeywordSpotter(load_templates(template_dir), threshold=threshold)
+    hits, chunk_cpu = run_wav(spotter, fixture)
+    matched = []
+    for end in truth:
+        near = [h for h in hits if end - 0.3 <= h.time <= end + 0.3]
+        if near:
+            matched.append(near[0].time - end)
+    stats = spotter.stats()
+    return {
+        "keywords": len(truth),
+        "prefixes": prefixes,
+        "detected": len(matched),
+        "false_alarms": len(hits) - len(matched),
+        "latency_ms": 1000.0 * float(np.median(matched)) if matched else None,
+        "chunk_cpu_p95_ms": 1000.0 * float(np.percentile(chunk_cpu, 95)),
+        "cpu_per_audio_s": stats["cpu_per_audio_s"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline keyword spotting for the '67' audio channel")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("enroll", help="record keyword templates from the microphone")
+    p.add_argument("directory")
+    p.add_argument("--count", type=int, default=3)
+    p = sub.add_parser("test", help="spot the keyword in a WAV fixture")
+    p.add_argument("wav")
+    p.add_argument("--templates", required=True)
+    p.add_argument("--threshold", type=float, default=THRESHOLD)
+    p.add_argument("--expect", type=int, help="exit 1 unless exactly this many hits")
+    p = sub.add_parser("selftest", help="synthetic templates and fixture, no microphone or network")
+    p.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.command == "enroll":
+        os.makedirs(args.directory, exist_ok=True)
+        gate, stream, speech, taken = NoiseGate(), FeatureStream(), [], 0
+        print("calibrating the noise floor, stay quiet for a second...")
+        with MicStream() as mic:
+            cursor = mic.ring.written
+            while taken < args.count:
+                samples, cursor, _ = mic.ring.read(cursor, timeout=0.2)
+                was_open = gate.open
+                _, energy = stream.push(samples)
+                for e in energy:
+                    gate.update(e)
+                if gate.open or was_open:
+                    speech.append(samples)
+                if was_open and not gate.open:
+                    path = os.path.join(args.directory, f"keyword_{taken}.wav")
+                    write_wav(path, np.concatenate(speech))
+                    print(f"saved {path}")
+                    speech, taken = [], taken + 1
+                elif gate.calibrated and not gate.open and not speech:
+                    print(f"say the keyword ({taken + 1}/{args.count})", end="\r")
+        return 0
+
+    if args.command == "test":
+        spotter = KeywordSpotter(load_templates(args.templates), threshold=args.threshold)
+        hits, chunk_cpu = run_wav(spotter, args.wav)
+        for hit in hits:
+            print(f"  {hit.time:7.2f} s  score {hit.score:.3f}  template {hit.template}")
+        stats = spotter.stats()
+        print(f"{len(hits)} hits in {stats['audio_s']:.1f} s of audio; cpu {stats['cpu_per_audio_s']:.1%} "
+              f"of real time, p95 {1000 * np.percentile(chunk_cpu, 95):.2f} ms per 20 ms chunk; "
+              f"noise floor {stats['noise_floor_db']:.1f} dB")
+        return 1 if args.expect is not None and len(hits) != args.expect else 0
+
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        report = selftest(tmp, args.threshold)
+    when = report["latency_ms"] or 0.0
+    print(f"{report['detected']}/{report['keywords']} keywords, {report['false_alarms']} false alarms "
+          f"(fixture includes {report['prefixes']} keyword prefixes); "
+          f"median hit {abs(when):.0f} ms {'after' if when >= 0 else 'before'} the keyword's last sample; "
+          f"cpu {report['cpu_per_audio_s']:.1%} of real time, p95 {report['chunk_cpu_p95_ms']:.2f} ms per chunk")
+    return 0 if report["detected"] == report["keywords"] and not report["false_alarms"] else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
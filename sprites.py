@@ -0,0 +1,156 @@
+import collections
+import os
+import time
+
+import pygame
+
+
+class GlowCache:
+    """Pre-rendered glow sprites keyed by (shape, size, color, glow).
+
+    Each glow is drawn once to a per-pixel-alpha surface with a smooth
+    falloff and then just blitted. Least recently used entries are evicted
+    once `maxsize` sprites are held.
+    """
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self._sprites = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, shape, size, color, glow):
+        """Return (surface, offset) where offset is the core's top-left inside the sprite."""
+        key = (shape, size, tuple(color), glow)
+        entry = self._sprites.get(key)
+        if entry is not None:
+            self._sprites.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        if shape == "circle":
+            entry = render_glow_circle(size, color, glow)
+        else:
+            entry = render_glow_rect(size[0], size[1], color, glow)
+        self._sprites[key] = entry
+        if len(self._sprites) > self.maxsize:
+            self._sprites.popitem(last=False)
+        return entry
+
+    def clear(self):
+        self._sprites.clear()
+
+
+class TextCache:
+    """Rendered text surfaces keyed by (text, font, color, antialias), LRU-bounded."""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._surfaces = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, text, font, color, antialias=True):
+        key = (text, font, tuple(color), antialias)
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.maxsize:
+            self._surfaces.popitem(last=False)
+        return surf
+
+    def clear(self):
+        self._surfaces.clear()
+
+
+def _glow_color(color, i, glow):
+    # same darkening as the old ring colors, fading out towards the edge
+    alpha = int(255 * (1 - i / (glow + 1)) ** 2)
+    return max(0, color[0] - i * 2), max(0, color[1] - i), max(0, color[2] - i), alpha
+
+
+def _finish(surf):
+    return surf.convert_alpha() if pygame.display.get_surface() is not None else surf
+
+
+def render_glow_circle(r, color, glow):
+    size = 2 * (r + glow) + 1
+    surf = pygame.Surface((size, size), pygame.SRCALPHA)
+    c = r + glow
+    # outside-in: each smaller, more opaque disc overwrites the middle of the last
+    for i in range(glow, 0, -1):
+        pygame.draw.circle(surf, _glow_color(color, i, glow), (c, c), r + i)
+    pygame.draw.circle(surf, color, (c, c), r)
+    return _finish(surf), (glow, glow)
+
+
+def render_glow_rect(w, h, color, glow):
+    off = glow // 2 + 1
+    surf = pygame.Surface((w + glow + 2, h + glow + 2), pygame.SRCALPHA)
+    for i in range(glow, 0, -1):
+        pygame.draw.rect(surf, _glow_color(color, i, glow),
+                         (off - i // 2, off - i // 2, w + i, h + i), border_radius=10)
+    pygame.draw.rect(surf, color, (off, off, w, h), border_radius=10)
+    return _finish(surf), (off, off)
+
+
+def _legacy_glow_circle(screen, x, y, r, color, glow):
+    for i in range(glow, 0, -3):
+        gl = (max(0, color[0] - i * 2), max(0, color[1] - i), max(0, color[2] - i))
+        pygame.draw.circle(screen, gl, (x, y), r + i)
+    pygame.draw.circle(screen, color, (x, y), r)
+
+
+def _legacy_glow_rect(screen, x, y, w, h, color, glow):
+    for i in range(glow, 0, -3):
+        gl = (max(0, color[0] - i * 2), max(0, color[1] - i), max(0, color[2] - i))
+        pygame.draw.rect(screen, gl, (x - i // 2, y - i // 2, w + i, h + i), border_radius=10)
+    pygame.draw.rect(screen, color, (x, y, w, h), border_radius=10)
+
+
+def benchmark(frames=5000, glow=12):
+    """Per-frame cost of one ball + two fallback paddles + the 50 px skins preview."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    screen = pygame.display.set_mode((900, 600))
+    cache = GlowCache()
+    ball = (255, 240, 100)
+
+    def legacy_frame(k):
+        _legacy_glow_circle(screen, 450 + k % 7, 300, 10, ball, glow)
+        _legacy_glow_rect(screen, 40, 200 + k % 5, 20, 140, (0, 200, 255), glow)
+        _legacy_glow_rect(screen, 840, 220 - k % 5, 20, 140, (255, 100, 0), glow)
+        _legacy_glow_circle(screen, 450, 250, 50, ball, glow)
+
+    def cached_frame(k):
+        for shape, size, color, x, y in (("circle", 10, ball, 450 + k % 7, 300),
+                                         ("rect", (20, 140), (0, 200, 255), 40, 200 + k % 5),
+                                         ("rect", (20, 140), (255, 100, 0), 840, 220 - k % 5),
+                                         ("circle", 50, ball, 450, 250)):
+            surf, (ox, oy) = cache.get(shape, size, color, glow)
+            if shape == "circle":
+                screen.blit(surf, (x - size - ox, y - size - oy))
+            else:
+                screen.blit(surf, (x - ox, y - oy))
+
+    results = {}
+    for name, fn in (("draw", legacy_frame), ("cached", cached_frame)):
+        fn(0)  # warm-up (fills the cache)
+        start = time.perf_counter()
+        for k in range(frames):
+            fn(k)
+        results[name] = (time.perf_counter() - start) / frames * 1e6
+    return results
+
+
+if __name__ == "__main__":
+    res = benchmark()
+    print(f"draw calls:   {res['draw']:.1f} us/frame")
+    print(f"glow sprites: {res['cached']:.1f} us/frame  ({res['draw'] / res['cached']:.1f}x faster)")
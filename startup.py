@@ -0,0 +1,34 @@
+import threading
+import time
+
+
+class StartupTimeline:
+    """Wall-clock milestones since the game process began loading.
+
+    Stages are recorded once (the first `mark` wins) from any thread; when
+    every stage in `expected` has been seen the report is printed.
+    """
+
+    def __init__(self, expected=("import", "window-up", "camera-ready", "model-ready")):
+        self.t0 = time.perf_counter()
+        self.expected = expected
+        self.marks = {}
+        self._lock = threading.Lock()
+        self._reported = False
+
+    def mark(self, stage):
+        with self._lock:
+            if stage in self.marks:
+                return
+            self.marks[stage] = time.perf_counter() - self.t0
+            done = not self._reported and all(s in self.marks for s in self.expected)
+            if done:
+                self._reported = True
+        if done:
+            print(self.report())
+
+    def report(self):
+        lines = ["startup timeline:"]
+        for stage, t in sorted(self.marks.items(), key=lambda kv: kv[1]):
+            lines.append(f"  {stage:<14}{t * 1000:8.1f} ms")
+        return "\n".join(lines)
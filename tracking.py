@@ -0,0 +1,105 @@
+import threading
+
+
+class TrackingSession:
+    """Camera + hand model, brought up on a background thread and kept for the whole run.
+
+    OpenCV and MediaPipe are only imported inside that thread, so the menu
+    can be on screen while the camera negotiates and the model loads. Once
+    loaded, capture and inference stay paused while in the menus; `resume()`
+    on PLAY and `pause()` on the way out keep the device open and the graph
+    built, so later matches start within a frame. The capture thread reopens
+    the camera on its own if the device drops out.
+
+    `camera_index` is passed straight to CameraCapture, so it may also be a
+    video path or a factory for a recorded/synthetic source.
+    """
+
+    def __init__(self, timeline=None, camera_index=0, max_num_hands=2, roi_tracking=False,
+                 camera_timeout=5.0, model_timeout=30.0, timer=None):
+        self.timeline = timeline
+        self.timer = timer
+        self.camera_index = camera_index
+        self.max_num_hands = max_num_hands
+        self.roi_tracking = roi_tracking
+        self.camera_timeout = camera_timeout
+        self.model_timeout = model_timeout
+
+        self.capture = None
+        self.tracker = None
+        self.error = None
+        self.ready = threading.Event()  # set when loading finished, successfully or not
+        self._thread = None
+        self._lock = threading.Lock()
+        self._wanted = False  # whether the game asked for tracking to run
+
+    def start(self):
+        self._thread = threading.Thread(target=self._load, daemon=True)
+        self._thread.start()
+        return self
+
+    def _mark(self, stage):
+        if self.timeline is not None:
+            self.timeline.mark(stage)
+
+    def _load(self):
+        try:
+            # heavy imports happen here, off the main thread
+            from capture import CameraCapture
+            from inference import HandInferenceWorker
+            self._mark("vision-imported")
+
+            self.capture = CameraCapture(self.camera_index, timer=self.timer).start()
+            self.tracker = HandInferenceWorker(self.capture, max_num_hands=self.max_num_hands,
+                                               min_detection_confidence=0.5,
+                                               min_tracking_confidence=0.5,
+                                               roi_tracking=self.roi_tracking,
+                                               timer=self.timer).start(active=False)
+
+            if self.capture.first_frame.wait(self.camera_timeout):
+                self._mark("camera-ready")
+                with self._lock:
+                    if not self._wanted:
+                        self.capture.pause()  # idle until PLAY
+            else:
+                self.error = "camera did not deliver a frame"
+                return
+            if self.tracker.ready.wait(self.model_timeout):
+                self._mark("model-ready")
+            else:
+                self.error = "hand model did not load"
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.ready.set()
+
+    def ok(self):
+        return self.ready.is_set() and self.error is None
+
+    def failed(self):
+        return self.ready.is_set() and self.error is not None
+
+    def resume(self):
+        with self._lock:
+            self._wanted = True
+            if self.capture is not None:
+                self.capture.resume()
+            if self.tracker is not None:
+                self.tracker.resume()
+
+    def pause(self):
+        with self._lock:
+            self._wanted = False
+            if self.tracker is not None:
+                self.tracker.pause()
+            if self.capture is not None:
+                self.capture.pause()
+
+    def close(self):
+        if self._thread is not None:
+            self._thread.join(timeout=self.camera_timeout + 1.0)
+            self._thread = None
+        if self.tracker is not None:
+            self.tracker.stop()
+        if self.capture is not None:
+            self.capture.stop()